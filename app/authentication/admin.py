@@ -6,3 +6,11 @@ from rest_framework.authtoken.models import Token
 # But we can customize the User admin if needed
 
 # Register your models here.
+from .models import WelcomeEmail
+
+
+@admin.register(WelcomeEmail)
+class WelcomeEmailAdmin(admin.ModelAdmin):
+    list_display = ('email', 'user', 'attempts', 'available_at', 'created_at')
+    readonly_fields = ('user', 'email', 'attempts', 'last_error', 'available_at', 'created_at')
+    search_fields = ('email', 'user__username')
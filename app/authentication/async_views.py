@@ -0,0 +1,122 @@
+from collections.abc import Mapping
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+
+from app.shared.async_views import AsyncAPIView
+
+from .authentication import load_user
+from .hashing import HashingPoolFull, hashing_pool
+from .serializers import ChangePasswordSerializer, UserSerializer
+from .tokens import get_or_create_fresh_token
+from .views import ChangePasswordView, LoginView, RegisterView, change_password, create_account
+
+
+class HashingBusy(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many authentication requests, please retry shortly.')
+    default_code = 'hashing_busy'
+
+    def __init__(self):
+        super().__init__()
+        # DRF's exception handler turns this into a Retry-After header
+        self.wait = settings.AUTH_HASH_RETRY_AFTER
+
+
+class AsyncAuthView(AsyncAPIView):
+    """
+    Base for the async auth views, which run their DRF view's request cycle.
+
+    Parsing, content negotiation, throttling and error responses are the
+    DRF view's own; only the body of post() differs. Password hashing runs
+    on the bounded `hashing_pool`. When it is full the view answers 503
+    with Retry-After (AUTH_HASH_RETRY_AFTER) instead of queueing.
+    """
+    async_methods = ('POST',)
+
+    async def handle(self, view, request, *args, **kwargs):
+        try:
+            return await self.post(view, request)
+        except HashingPoolFull:
+            raise HashingBusy()
+
+    def get_data(self, request):
+        data = request.data
+        if not isinstance(data, Mapping):
+            raise exceptions.ParseError('JSON parse error - expected an object')
+        return data
+
+
+class AsyncRegisterView(AsyncAuthView):
+    """
+    Register a new user account
+    """
+    view_class = RegisterView
+
+    async def post(self, view, request):
+        return await hashing_pool.run(self.register, view, self.get_data(request))
+
+    def register(self, view, data):
+        serializer = view.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        user, token = create_account(serializer)
+
+        return Response({
+            'user': UserSerializer(user).data,
+            'token': token.key
+        }, status=status.HTTP_201_CREATED)
+
+
+class AsyncLoginView(AsyncAuthView):
+    """
+    Login with username and password to get authentication token
+    """
+    view_class = LoginView
+
+    async def post(self, view, request):
+        data = self.get_data(request)
+        username = data.get('username')
+        password = data.get('password')
+
+        if not username or not password:
+            return Response(
+                {'error': 'Please provide both username and password'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user = await hashing_pool.run(authenticate, request, username=username, password=password)
+
+        if not user:
+            return Response(
+                {'error': 'Invalid credentials'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        token = await sync_to_async(get_or_create_fresh_token)(user)
+
+        return Response({
+            'user': UserSerializer(user).data,
+            'token': token.key
+        }, status=status.HTTP_200_OK)
+
+
+class AsyncChangePasswordView(AsyncAuthView):
+    """
+    Change password for the authenticated user
+    """
+    view_class = ChangePasswordView
+
+    async def post(self, view, request):
+        # The cached user defers its password; load it before the pool runs
+        user = await sync_to_async(load_user)(request.user)
+        return await hashing_pool.run(self.change_password, user, self.get_data(request))
+
+    def change_password(self, user, data):
+        serializer = ChangePasswordSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        data, status_code = change_password(user, serializer)
+        return Response(data, status=status_code)
@@ -0,0 +1,216 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from app.shared.cache import CacheStats
+
+from .tokens import is_token_expired
+
+local_stats = CacheStats()
+shared_stats = CacheStats()
+
+
+class LocalTokenCache:
+    """
+    Small thread-safe LRU of recently seen token entries, with per-entry expiry.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, token = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token, timeout, maxsize):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalTokenCache()
+
+
+def _shared_cache():
+    return caches[getattr(settings, 'TOKEN_CACHE_ALIAS', 'default')]
+
+
+def _shared_timeout():
+    return getattr(settings, 'TOKEN_CACHE_TIMEOUT', 300)
+
+
+def _cache_key(key):
+    # Keep raw token keys out of the cache keyspace
+    return 'auth:token:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _version_key(key):
+    return 'auth:token-version:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _revoke(keys):
+    cache = _shared_cache()
+    cache.set_many({_version_key(key): uuid.uuid4().hex for key in keys}, _shared_timeout())
+    cache.delete_many([_cache_key(key) for key in keys])
+
+
+def invalidate_tokens(keys):
+    """
+    Forget cached tokens in every process.
+
+    A new version is written to the shared cache for each key, so entries
+    cached under the old one are refused everywhere; other processes' LRU
+    copies expire within TOKEN_CACHE_LOCAL_TIMEOUT. This is done again on
+    commit, so a request that read a row before the transaction committed
+    cannot cache it under the new version. Each step is one shared-cache
+    round trip however many keys are given.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    for key in keys:
+        local_cache.delete(key)
+    _revoke(keys)
+    transaction.on_commit(lambda: _revoke(keys))
+
+
+def invalidate_token(key):
+    invalidate_tokens([key])
+
+
+def invalidate_user_tokens(user):
+    invalidate_tokens(Token.objects.filter(user=user).values_list('key', flat=True))
+
+
+def token_cache_stats():
+    """
+    Return this process's hit/miss counters for both cache levels.
+    """
+    return {
+        'local': local_stats.as_dict(),
+        'shared': shared_stats.as_dict(),
+    }
+
+
+def _user_fields(user_model):
+    # Everything but the password hash, which stays out of the cache
+    return [field.attname for field in user_model._meta.concrete_fields if field.attname != 'password']
+
+
+def load_user(user):
+    """
+    Load the fields that authentication left deferred on `user` (the
+    password hash) in one query, for views that check or set passwords.
+    """
+    deferred = user.get_deferred_fields()
+    if deferred:
+        user.refresh_from_db(fields=deferred)
+    return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches the token lookup.
+
+    The token's creation time and the user's fields other than the
+    password hash are cached, and every request gets its own User built
+    from them, with only the password deferred (see load_user). Entries
+    are looked up in a per-process LRU first (TOKEN_CACHE_LOCAL_TIMEOUT /
+    TOKEN_CACHE_LOCAL_SIZE), then in the shared cache (TOKEN_CACHE_ALIAS /
+    TOKEN_CACHE_TIMEOUT), and only then in the database. Signals replace
+    a per-token version in the shared cache when a token is deleted or
+    its user is saved, and shared entries cached under an older version
+    are refused. LRU copies are trusted without that check, so logout,
+    password changes and user edits apply at once in the process that
+    made them and within TOKEN_CACHE_LOCAL_TIMEOUT seconds in the others.
+    Tokens older than TOKEN_TTL are rejected even when cached.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = self.get_token_entry(key)
+        if entry is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        fields = entry['user']
+        model = self.get_model()
+        token = model(key=key, user_id=fields['id'], created=entry['created'])
+        if is_token_expired(token):
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+
+        if not fields['is_active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        user_model = model._meta.get_field('user').related_model
+        token.user = user_model.from_db(model.objects.db, list(fields), list(fields.values()))
+        return (token.user, token)
+
+    def get_token_entry(self, key):
+        local_timeout = getattr(settings, 'TOKEN_CACHE_LOCAL_TIMEOUT', 5)
+        local_size = getattr(settings, 'TOKEN_CACHE_LOCAL_SIZE', 1024)
+        cache = _shared_cache()
+        cache_key = _cache_key(key)
+        version_key = _version_key(key)
+
+        if local_timeout:
+            entry = local_cache.get(key)
+            local_stats.record(entry is not None)
+            if entry is not None:
+                return entry
+
+        cached = cache.get_many([cache_key, version_key])
+        entry = cached.get(cache_key)
+        version = cached.get(version_key)
+        hit = entry is not None and version is not None and entry['version'] == version
+        shared_stats.record(hit)
+        if not hit:
+            if version is None:
+                version = uuid.uuid4().hex
+                if not cache.add(version_key, version, _shared_timeout()):
+                    version = cache.get(version_key)
+            model = self.get_model()
+            user_fields = _user_fields(model._meta.get_field('user').related_model)
+            row = (
+                model.objects.filter(key=key)
+                .values_list('created', *(f'user__{field}' for field in user_fields))
+                .first()
+            )
+            if row is None:
+                return None
+            entry = {'created': row[0], 'user': dict(zip(user_fields, row[1:])), 'version': version}
+            if version is None:
+                # The version was revoked while we read it: use the row uncached
+                return entry
+            cache.set(cache_key, entry, _shared_timeout())
+
+        if local_timeout:
+            local_cache.set(key, entry, local_timeout, local_size)
+        return entry
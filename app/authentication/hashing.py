@@ -0,0 +1,78 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class HashingPoolFull(Exception):
+    """
+    Raised when the hashing pool already has as many jobs as it accepts.
+    """
+
+
+class HashingPool:
+    """
+    Bounded thread pool for password hashing called from async views.
+
+    At most AUTH_HASH_MAX_WORKERS jobs run at once and at most
+    AUTH_HASH_MAX_QUEUE more wait for a thread. Further jobs are refused
+    with HashingPoolFull straight away, so a login storm gets fast 503s
+    instead of ever longer queues. Jobs run outside the request thread, so
+    each closes its stale database connections before and after it runs.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.AUTH_HASH_MAX_WORKERS,
+                    thread_name_prefix='auth-hash',
+                )
+            return self._executor
+
+    @property
+    def capacity(self):
+        return settings.AUTH_HASH_MAX_WORKERS + settings.AUTH_HASH_MAX_QUEUE
+
+    @property
+    def pending(self):
+        return self._pending
+
+    async def run(self, func, *args, **kwargs):
+        executor = self.executor
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise HashingPoolFull()
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(self._call, func, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @staticmethod
+    def _call(func, *args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+hashing_pool = HashingPool()
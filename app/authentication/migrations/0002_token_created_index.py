@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index authtoken_token.created for expiry checks and batched cleanup.
+
+    The Token model belongs to rest_framework.authtoken, so the index is
+    created with SQL rather than Meta.indexes.
+    """
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('authtoken', '0003_tokenproxy'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS authtoken_token_created_idx '
+                'ON authtoken_token (created);',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS authtoken_token_created_idx;',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_token_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='welcomeemail',
+            name='available_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,28 @@
+from django.conf import settings
 from django.db import models
 
 # Using Django's built-in User model
 # from django.contrib.auth.models import User
 
-# Create your custom models here if needed
+
+class WelcomeEmail(models.Model):
+    """
+    A welcome email waiting to go out with the next batch.
+
+    Rows are deleted once sent. Rows that failed WELCOME_EMAIL_MAX_ATTEMPTS
+    times stay behind with their last error for inspection. A flush skips
+    rows whose `available_at` lies ahead: it is pushed out while a flush
+    is sending the row, and by an increasing backoff after each failure.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    email = models.EmailField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return self.email
@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user_tokens
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """
+    Drop a token from the auth cache on logout or deletion
+    """
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user_tokens(sender, instance, created, **kwargs):
+    """
+    Drop cached tokens after a password change, deactivation or profile edit
+    """
+    if not created:
+        invalidate_user_tokens(instance)
@@ -1,33 +1,205 @@
+import logging
+from datetime import timedelta
+
 from celery import shared_task
-from django.core.mail import send_mail
-import time
+from celery.utils.time import get_exponential_backoff_interval
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from app.outbox.models import OutboxMessage
+from .authentication import invalidate_tokens
+from .models import WelcomeEmail
+from .tokens import expired_tokens
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SCHEDULED_KEY = 'auth:welcome-email:flush-scheduled'
+
 
+def build_welcome_message(welcome_email, connection=None):
+    username = welcome_email.user.username
+    return EmailMessage(
+        subject=f'Welcome {username}!',
+        body=f'Thank you for registering, {username}. Welcome to our platform!',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[welcome_email.email],
+        connection=connection,
+    )
 
-@shared_task
+
+def schedule_welcome_email_flush():
+    """
+    Schedule a flush WELCOME_EMAIL_BATCH_WINDOW seconds from now, unless
+    one is already pending. Everything queued in the meantime goes out in
+    that flush.
+
+    The flush goes through the outbox, so it is only published if the
+    current transaction commits, and never on the request's time. The
+    pending marker is likewise set only on commit; registrations racing
+    before that may schedule an extra flush, which finds nothing to send.
+    """
+    if cache.get(FLUSH_SCHEDULED_KEY) is not None:
+        return
+    window = settings.WELCOME_EMAIL_BATCH_WINDOW
+    OutboxMessage.objects.enqueue(flush_welcome_emails.name, countdown=window)
+    # The marker outlives the window a little. If the flush is lost anyway,
+    # the periodic flush on Celery Beat sends what was queued.
+    transaction.on_commit(lambda: cache.set(FLUSH_SCHEDULED_KEY, True, timeout=window + 60))
+
+
+def queue_welcome_email(user):
+    """
+    Queue a welcome email for `user` in the current transaction.
+    """
+    if not user.email:
+        return None
+    welcome_email = WelcomeEmail.objects.create(user=user, email=user.email)
+    schedule_welcome_email_flush()
+    return welcome_email
+
+
+@shared_task(ignore_result=True)
 def send_welcome_email(user_email, username):
     """
-    Send a welcome email to newly registered users.
-    This is an example of a Celery task for authentication.
+    Queue a welcome email for the next batch.
+
+    Registration calls queue_welcome_email() directly; this task remains so
+    messages already sitting in the broker are still handled.
+    """
+    user = User.objects.filter(username=username).first()
+    if user is not None:
+        WelcomeEmail.objects.create(user=user, email=user_email)
+        schedule_welcome_email_flush()
+
+
+def welcome_email_retry_delay(attempts):
+    """
+    Seconds to wait before retrying a message that failed `attempts`
+    times: WELCOME_EMAIL_RETRY_BACKOFF, doubled per attempt up to
+    WELCOME_EMAIL_RETRY_BACKOFF_MAX.
     """
-    subject = f'Welcome {username}!'
-    message = f'Thank you for registering, {username}. Welcome to our platform!'
+    return get_exponential_backoff_interval(
+        settings.WELCOME_EMAIL_RETRY_BACKOFF, attempts - 1, settings.WELCOME_EMAIL_RETRY_BACKOFF_MAX,
+    )
 
-    # Simulate email sending delay
-    time.sleep(2)
 
-    # In production, configure email backend in settings
-    # send_mail(subject, message, 'noreply@example.com', [user_email])
+def claim_welcome_emails(batch_size, max_attempts):
+    """
+    Take up to `batch_size` due welcome emails and commit at once.
 
-    print(f"Welcome email sent to {user_email}")
-    return f"Email sent to {user_email}"
+    The rows are locked with SKIP LOCKED only while their `available_at`
+    is pushed WELCOME_EMAIL_CLAIM_TIMEOUT seconds out, so other flushes
+    pass over them but no lock is held while they are sent. If the flush
+    dies mid-send, the rows come due again when the claim runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            WelcomeEmail.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('user')
+            .filter(Q(available_at__isnull=True) | Q(available_at__lte=now), attempts__lt=max_attempts)
+            .order_by('pk')[:batch_size]
+        )
+        claimed_until = now + timedelta(seconds=settings.WELCOME_EMAIL_CLAIM_TIMEOUT)
+        WelcomeEmail.objects.filter(pk__in=[welcome_email.pk for welcome_email in batch]).update(
+            available_at=claimed_until
+        )
+    return batch
 
 
-@shared_task
+@shared_task(bind=True, ignore_result=True)
+def flush_welcome_emails(self):
+    """
+    Send queued welcome emails in batches over a single mail connection.
+
+    Each batch is claimed first (see claim_welcome_emails), so a slow
+    mail server holds no transaction open. Each message is sent and
+    retried on its own: a failure bumps that row's attempts and backs it
+    off (see welcome_email_retry_delay) while the rest of the batch goes
+    out. The task then retries itself when the first failed row comes
+    due, at most WELCOME_EMAIL_MAX_ATTEMPTS times; the periodic flush
+    picks up anything left after that.
+    """
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    batch_size = settings.WELCOME_EMAIL_BATCH_SIZE
+    max_attempts = settings.WELCOME_EMAIL_MAX_ATTEMPTS
+
+    sent = 0
+    retry_in = None
+    failed = 0
+    connection = get_connection()
+    with connection:
+        while True:
+            batch = claim_welcome_emails(batch_size, max_attempts)
+            if not batch:
+                break
+
+            delivered, errors = [], []
+            for welcome_email in batch:
+                try:
+                    connection.send_messages([build_welcome_message(welcome_email, connection)])
+                except Exception as exc:
+                    welcome_email.attempts += 1
+                    welcome_email.last_error = repr(exc)
+                    delay = welcome_email_retry_delay(welcome_email.attempts)
+                    welcome_email.available_at = timezone.now() + timedelta(seconds=delay)
+                    errors.append(welcome_email)
+                    if welcome_email.attempts < max_attempts:
+                        retry_in = delay if retry_in is None else min(retry_in, delay)
+                else:
+                    delivered.append(welcome_email.pk)
+
+            WelcomeEmail.objects.filter(pk__in=delivered).delete()
+            WelcomeEmail.objects.bulk_update(errors, ['attempts', 'last_error', 'available_at'])
+            sent += len(delivered)
+            failed += len(errors)
+
+            if len(batch) < batch_size:
+                break
+
+    logger.info('Sent %d welcome emails', sent)
+    if failed:
+        logger.warning('Failed to send %d welcome emails', failed)
+        if retry_in is not None and self.request.retries < max_attempts:
+            raise self.retry(countdown=retry_in, max_retries=max_attempts)
+    return sent
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
 def cleanup_expired_tokens():
     """
-    Example scheduled task to clean up expired tokens.
-    Could be configured with Celery Beat.
+    Delete tokens older than TOKEN_TTL, TOKEN_CLEANUP_BATCH_SIZE at a time.
+
+    Each batch picks the oldest keys through the index on `created` and
+    deletes them in its own short transaction, so locks are never held
+    across the whole table. The deleted keys leave the auth cache in one
+    batch rather than through a post_delete signal per row. Returns the number of tokens deleted. Running
+    it twice is harmless, so it is acknowledged only once it finishes and
+    redelivered if its worker dies.
     """
-    # Implementation would check token expiry and clean up
-    print("Cleaning up expired tokens...")
-    return "Token cleanup completed"
+    batch_size = settings.TOKEN_CLEANUP_BATCH_SIZE
+    cutoff = timezone.now()
+    deleted = 0
+    while True:
+        keys = list(
+            expired_tokens(cutoff).order_by('created').values_list('key', flat=True)[:batch_size]
+        )
+        if not keys:
+            break
+        with transaction.atomic():
+            # A raw delete skips loading every token to send post_delete;
+            # nothing references Token, and the keys are invalidated in bulk
+            count = Token.objects.filter(key__in=keys)._raw_delete(Token.objects.db)
+            invalidate_tokens(keys)
+        deleted += count
+        if len(keys) < batch_size:
+            break
+
+    logger.info('Deleted %d expired tokens', deleted)
+    return deleted
@@ -1,7 +1,49 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from celery.exceptions import Retry
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
 from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework.throttling import BaseThrottle
+from app.authors.tasks import reconcile_author_stats
+from app.outbox.models import OutboxMessage
+from app.shared.task_metrics import queue_wait, stamp_published_at
+from app.shared.testing import QueryBudgetMixin
+from config.celery import app as celery_app
+from .async_views import AsyncChangePasswordView, AsyncLoginView, AsyncRegisterView
+from .authentication import (
+    CachedTokenAuthentication,
+    _cache_key,
+    local_cache,
+    local_stats,
+    shared_stats,
+    token_cache_stats,
+)
+from .hashing import hashing_pool
+from .models import WelcomeEmail
+from .views import LoginView
+from .tasks import (
+    FLUSH_SCHEDULED_KEY,
+    cleanup_expired_tokens,
+    flush_welcome_emails,
+    send_welcome_email,
+    welcome_email_retry_delay,
+)
 
 
 class AuthenticationTestCase(APITestCase):
@@ -36,3 +78,501 @@ class AuthenticationTestCase(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue('token' in response.data)
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_is_cached(self):
+        """Test repeated requests skip the token query"""
+        self.client.get('/api/auth/profile/')
+        local_stats.reset()
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(token_cache_stats()['local']['hits'], 1)
+
+    def test_shared_cache_is_used_when_local_entry_missing(self):
+        """Test the shared cache answers once the local LRU is cleared"""
+        self.client.get('/api/auth/profile/')
+        local_cache.clear()
+        shared_stats.reset()
+        with self.assertNumQueries(0):
+            self.client.get('/api/auth/profile/')
+        self.assertEqual(token_cache_stats()['shared']['hits'], 1)
+
+    def test_logout_invalidates_cached_token(self):
+        """Test a logged out token is rejected immediately"""
+        self.client.get('/api/auth/profile/')
+        self.client.post('/api/auth/logout/')
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_invalidates_cached_token(self):
+        """Test a deactivated user is rejected immediately"""
+        self.client.get('/api/auth/profile/')
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_reaches_other_processes(self):
+        """Test another process's LRU copy outlives a logout by at most TOKEN_CACHE_LOCAL_TIMEOUT"""
+        self.client.get('/api/auth/profile/')
+        stale_copy = local_cache.get(self.token.key)
+        self.client.post('/api/auth/logout/')
+        # As if TOKEN_CACHE_LOCAL_TIMEOUT were half a second
+        local_cache.set(self.token.key, stale_copy, 0.5, 10)
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, status.HTTP_200_OK)
+        time.sleep(0.6)
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_requests_get_their_own_user(self):
+        """Test cached entries hold no user object or password and each request builds a fresh one"""
+        backend = CachedTokenAuthentication()
+        first, _ = backend.authenticate_credentials(self.token.key)
+        second, token = backend.authenticate_credentials(self.token.key)
+        self.assertIsNot(first, second)
+        self.assertEqual((second.pk, token.user_id), (self.user.pk, self.user.pk))
+        self.assertEqual(second.get_deferred_fields(), {'password'})
+        with self.assertNumQueries(0):
+            self.assertEqual((second.username, second.email, second.is_staff), ('testuser', 'test@example.com', False))
+        entry = local_cache.get(self.token.key)
+        self.assertEqual(set(entry), {'created', 'user', 'version'})
+        self.assertNotIn('password', entry['user'])
+
+    def test_change_password_refreshes_cached_user(self):
+        """Test the cached user is reloaded after a password change"""
+        self.client.get('/api/auth/profile/')
+        response = self.client.post('/api/auth/change-password/', {
+            'old_password': 'testpass123',
+            'new_password': 'newpass456!',
+            'new_password2': 'newpass456!'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post('/api/auth/change-password/', {
+            'old_password': 'newpass456!',
+            'new_password': 'otherpass789!',
+            'new_password2': 'otherpass789!'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(WELCOME_EMAIL_BATCH_WINDOW=10, WELCOME_EMAIL_BATCH_SIZE=2, WELCOME_EMAIL_MAX_ATTEMPTS=2)
+class WelcomeEmailBatchTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _register(self, username):
+        return self.client.post('/api/auth/register/', {
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': 'testpass123',
+            'password2': 'testpass123'
+        }, format='json')
+
+    def test_registrations_share_one_scheduled_flush(self):
+        """Test registrations queue emails and schedule a single flush through the outbox"""
+        with mock.patch('celery.app.base.Celery.send_task') as send_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._register('first')
+            with self.captureOnCommitCallbacks(execute=True):
+                self._register('second')
+        send_task.assert_not_called()
+        self.assertEqual(WelcomeEmail.objects.count(), 2)
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.task_name, message.countdown), (flush_welcome_emails.name, 10))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_failed_registration_schedules_nothing(self):
+        """Test a registration that rolls back leaves no flush behind"""
+        with mock.patch('app.authentication.views.Token.objects.get_or_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self._register('first')
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertFalse(User.objects.filter(username='first').exists())
+        self.assertIsNone(cache.get(FLUSH_SCHEDULED_KEY))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._register('second')
+        self.assertEqual(OutboxMessage.objects.get().task_name, flush_welcome_emails.name)
+
+    def test_periodic_flush_is_scheduled(self):
+        """Test Celery Beat flushes welcome emails even if a scheduled flush is lost"""
+        tasks = {entry['task'] for entry in settings.CELERY_BEAT_SCHEDULE.values()}
+        self.assertIn(flush_welcome_emails.name, tasks)
+
+    def test_flush_sends_batches_over_one_connection(self):
+        """Test every queued email goes out through a single connection"""
+        for username in ('first', 'second', 'third'):
+            self._register(username)
+
+        with mock.patch('app.authentication.tasks.get_connection', wraps=get_connection) as connect:
+            self.assertEqual(flush_welcome_emails(), 3)
+        connect.assert_called_once_with()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox),
+                         ['first@example.com', 'second@example.com', 'third@example.com'])
+        self.assertEqual(mail.outbox[0].subject, 'Welcome first!')
+        self.assertFalse(WelcomeEmail.objects.exists())
+
+    def test_failed_messages_are_retried_individually(self):
+        """Test one failing address does not block the rest of the batch and is retried after a backoff"""
+        self._register('first')
+        self._register('broken')
+        send_messages = locmem.EmailBackend.send_messages
+
+        def flaky_send(backend, messages):
+            if messages[0].to == ['broken@example.com']:
+                raise ConnectionError('mailbox unavailable')
+            return send_messages(backend, messages)
+
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', flaky_send), \
+                mock.patch.object(flush_welcome_emails, 'retry', side_effect=Retry) as retry, \
+                self.assertLogs('app.authentication.tasks', 'WARNING'):
+            with self.assertRaises(Retry):
+                flush_welcome_emails()
+        retry.assert_called_once_with(countdown=settings.WELCOME_EMAIL_RETRY_BACKOFF, max_retries=2)
+        self.assertEqual([m.to for m in mail.outbox], [['first@example.com']])
+        pending = WelcomeEmail.objects.get()
+        self.assertEqual((pending.email, pending.attempts), ('broken@example.com', 1))
+        self.assertIn('mailbox unavailable', pending.last_error)
+        self.assertGreater(pending.available_at, timezone.now())
+
+        # Backed off until the retry is due
+        self.assertEqual(flush_welcome_emails(), 0)
+        later = timezone.now() + timedelta(seconds=settings.WELCOME_EMAIL_RETRY_BACKOFF + 1)
+        with mock.patch('app.authentication.tasks.timezone.now', return_value=later):
+            self.assertEqual(flush_welcome_emails(), 1)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(WelcomeEmail.objects.exists())
+
+    def test_messages_are_sent_outside_the_claiming_transaction(self):
+        """Test no transaction or row lock is held while the mail server is talked to"""
+        self._register('first')
+        depth = len(connection.atomic_blocks)
+        send_messages = locmem.EmailBackend.send_messages
+        depths = []
+
+        def recording_send(backend, messages):
+            depths.append(len(connection.atomic_blocks))
+            return send_messages(backend, messages)
+
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', recording_send):
+            self.assertEqual(flush_welcome_emails(), 1)
+        self.assertEqual(depths, [depth])
+
+    def test_retry_delay_backs_off(self):
+        """Test the retry delay doubles per attempt up to the maximum"""
+        self.assertEqual(
+            [welcome_email_retry_delay(attempts) for attempts in (1, 2, 3, 10)],
+            [60, 120, 240, 3600],
+        )
+
+
+@override_settings(TOKEN_TTL=3600, TOKEN_CLEANUP_BATCH_SIZE=2)
+class TokenExpiryTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+
+    def _age(self, token, seconds):
+        Token.objects.filter(pk=token.pk).update(created=timezone.now() - timedelta(seconds=seconds))
+
+    def test_expired_token_is_rejected_even_when_cached(self):
+        """Test the TTL is checked on every request"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, status.HTTP_200_OK)
+        later = timezone.now() + timedelta(hours=2)
+        with mock.patch('app.authentication.tokens.timezone.now', return_value=later):
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(str(response.data['detail']), 'Token has expired.')
+
+    def test_login_replaces_expired_token(self):
+        """Test login issues a new token once the old one expired"""
+        self._age(self.token, 7200)
+        response = self.client.post('/api/auth/login/', {
+            'username': 'testuser',
+            'password': 'testpass123'
+        }, format='json')
+        self.assertNotEqual(response.data['token'], self.token.key)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+    def test_login_keeps_fresh_token(self):
+        """Test login reuses a token that has not expired"""
+        response = self.client.post('/api/auth/login/', {
+            'username': 'testuser',
+            'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.data['token'], self.token.key)
+
+    def test_cleanup_deletes_expired_tokens_in_batches(self):
+        """Test cleanup removes only expired tokens and reports the count"""
+        self._age(self.token, 7200)
+        for i in range(4):
+            user = User.objects.create_user(username=f'user{i}', password='testpass123')
+            token = Token.objects.create(user=user)
+            if i < 3:
+                self._age(token, 7200)
+
+        with self.assertLogs('app.authentication.tasks', 'INFO') as logs:
+            self.assertEqual(cleanup_expired_tokens(), 4)
+        self.assertIn('Deleted 4 expired tokens', logs.output[0])
+        self.assertEqual(list(Token.objects.values_list('user__username', flat=True)), ['user3'])
+
+    @override_settings(TOKEN_CLEANUP_BATCH_SIZE=2)
+    def test_cleanup_invalidates_tokens_in_bulk(self):
+        """Test cleanup uses a fast delete and drops each batch's cached tokens at once"""
+        tokens = [self.token]
+        for i in range(4):
+            tokens.append(Token.objects.create(user=User.objects.create_user(username=f'user{i}')))
+        for token in tokens:
+            self._age(token, 7200)
+            local_cache.set(token.key, {}, 60, 10)
+            cache.set(_cache_key(token.key), {}, 60)
+
+        with mock.patch.object(cache, 'delete_many', wraps=cache.delete_many) as delete_many, \
+                mock.patch('app.authentication.signals.invalidate_token') as per_row, \
+                self.assertNumQueries(12):
+            self.assertEqual(cleanup_expired_tokens(), 5)
+        # Three batches of a SELECT, a DELETE and a savepoint pair
+        self.assertEqual(delete_many.call_count, 3)
+        per_row.assert_not_called()
+        for token in tokens:
+            self.assertIsNone(local_cache.get(token.key))
+            self.assertIsNone(cache.get(_cache_key(token.key)))
+
+    @override_settings(TOKEN_TTL=0)
+    def test_ttl_zero_disables_expiry(self):
+        """Test tokens never expire when TOKEN_TTL is 0"""
+        self._age(self.token, 10 ** 8)
+        self.assertEqual(cleanup_expired_tokens(), 0)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, status.HTTP_200_OK)
+
+
+@override_settings(AUTH_HASH_MAX_WORKERS=2, AUTH_HASH_MAX_QUEUE=0)
+class AsyncAuthViewTestCase(TransactionTestCase):
+    """
+    The hashing pool runs on its own threads and database connections, so
+    these tests need committed data.
+    """
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def tearDown(self):
+        hashing_pool.shutdown()
+
+    async def _post(self, view, data, headers=None, content_type='application/json'):
+        request = self.factory.post('/', data, content_type=content_type, headers=headers)
+        response = await view.as_view()(request)
+        return response.render()
+
+    async def test_login(self):
+        """Test the async login returns the same payload as the DRF view"""
+        response = await self._post(AsyncLoginView, {'username': 'testuser', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = json.loads(response.content)
+        self.assertEqual(body['user']['username'], 'testuser')
+        self.assertTrue(await Token.objects.filter(key=body['token']).aexists())
+
+    async def test_non_object_json_is_rejected(self):
+        """Test JSON bodies that are not objects get a 400, not a 500"""
+        for body in ('[]', '"x"', '1'):
+            response = await self._post(AsyncLoginView, body)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('expected an object', json.loads(response.content)['detail'])
+
+    async def test_login_invalid_credentials(self):
+        """Test wrong passwords are rejected"""
+        response = await self._post(AsyncLoginView, {'username': 'testuser', 'password': 'wrong'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_register(self):
+        """Test the async register creates the user, token and welcome email"""
+        response = await self._post(AsyncRegisterView, {
+            'username': 'newuser',
+            'email': 'new@example.com',
+            'password': 'testpass123',
+            'password2': 'testpass123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await WelcomeEmail.objects.filter(email='new@example.com').aexists())
+
+        response = await self._post(AsyncRegisterView, {'username': 'newuser'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', json.loads(response.content))
+
+    async def test_change_password(self):
+        """Test the async change password authenticates and re-hashes"""
+        data = {'old_password': 'testpass123', 'new_password': 'newpass456!', 'new_password2': 'newpass456!'}
+        response = await self._post(AsyncChangePasswordView, data)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+        token = await Token.objects.acreate(user=self.user)
+        response = await self._post(AsyncChangePasswordView, data, headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.check_password('newpass456!'))
+
+    async def test_drf_request_cycle(self):
+        """Test the async views parse, negotiate and report errors like their DRF views"""
+        response = await self._post(
+            AsyncLoginView, 'username=testuser&password=testpass123',
+            content_type='application/x-www-form-urlencoded',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        response = await self._post(AsyncLoginView, '{', headers={'Accept': 'application/json'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('JSON parse error', json.loads(response.content)['detail'])
+
+        response = await self._post(AsyncLoginView, {}, headers={'Accept': 'application/xml'})
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+        response = await self._post(AsyncRegisterView, {'username': 'testuser'})
+        self.assertEqual(json.loads(response.content)['username'], ['A user with that username already exists.'])
+
+    async def test_throttles_apply(self):
+        """Test the DRF view's throttles limit the async view"""
+        class Closed(BaseThrottle):
+            def allow_request(self, request, view):
+                return False
+
+            def wait(self):
+                return 30
+
+        with mock.patch.object(LoginView, 'throttle_classes', [Closed]):
+            response = await self._post(AsyncLoginView, {'username': 'testuser', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+
+    async def test_full_pool_sheds_load(self):
+        """Test requests get a 503 while every worker slot is taken"""
+        release = threading.Event()
+        busy = [asyncio.create_task(hashing_pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        try:
+            response = await self._post(AsyncLoginView, {'username': 'testuser', 'password': 'testpass123'})
+        finally:
+            release.set()
+            await asyncio.gather(*busy)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(hashing_pool.pending, 0)
+
+
+class AuthenticationQueryBudgetTestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def test_login_budget(self):
+        """Test login issues and then reuses a token in a few queries"""
+        data = {'username': 'testuser', 'password': 'testpass123'}
+        with self.assertMaxQueries(7):
+            self.client.post('/api/auth/login/', data, format='json')
+        with self.assertMaxQueries(4):
+            self.client.post('/api/auth/login/', data, format='json')
+
+    def test_register_budget(self):
+        """Test registration creates the user, token, welcome email and outbox message"""
+        with self.assertMaxQueries(11):
+            self.client.post('/api/auth/register/', {
+                'username': 'newuser',
+                'email': 'new@example.com',
+                'password': 'testpass123',
+                'password2': 'testpass123'
+            }, format='json')
+
+    def test_authenticated_budgets(self):
+        """Test profile and password changes with a cold token cache"""
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        with self.assertMaxQueries(1):
+            self.client.get('/api/auth/profile/')
+        # Saving the user also reads their published post ids for the detail cache
+        with self.assertMaxQueries(4):
+            self.client.patch('/api/auth/profile/', {'first_name': 'Test'}, format='json')
+        # A password change leaves cached posts alone
+        with self.assertMaxQueries(4):
+            self.client.post('/api/auth/change-password/', {
+                'old_password': 'testpass123',
+                'new_password': 'newpass456!',
+                'new_password2': 'newpass456!'
+            }, format='json')
+
+
+class CeleryExecutionProfileTestCase(TestCase):
+    def route(self, task):
+        return celery_app.amqp.router.route({}, task.name)['queue'].name
+
+    def test_tasks_are_routed_by_class(self):
+        """Test mail and maintenance tasks get their own queues"""
+        self.assertEqual(self.route(send_welcome_email), 'email')
+        self.assertEqual(self.route(flush_welcome_emails), 'email')
+        self.assertEqual(self.route(cleanup_expired_tokens), 'maintenance')
+        self.assertEqual(self.route(reconcile_author_stats), 'maintenance')
+        self.assertEqual(celery_app.amqp.router.route({}, 'config.celery.debug_task')['queue'].name, 'default')
+
+    def test_results_and_acknowledgement(self):
+        """Test no task stores results and only rerunnable ones are acknowledged late"""
+        for task in (send_welcome_email, flush_welcome_emails, cleanup_expired_tokens, reconcile_author_stats):
+            self.assertTrue(task.ignore_result, task.name)
+        self.assertTrue(cleanup_expired_tokens.acks_late)
+        self.assertTrue(reconcile_author_stats.acks_late)
+        self.assertFalse(flush_welcome_emails.acks_late)
+
+    def test_task_run_time_is_logged(self):
+        """Test every task run logs its duration, and slow runs warn"""
+        with self.assertLogs('app.shared.task_metrics', 'INFO') as logs:
+            cleanup_expired_tokens.apply()
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertRegex(logs.output[0], r'cleanup_expired_tokens .* SUCCESS, ran [\d.]+ ms, waited n/a')
+
+        with self.settings(SLOW_TASK_MS=-1):
+            with self.assertLogs('app.shared.task_metrics', 'WARNING'):
+                cleanup_expired_tokens.apply()
+
+    def test_queue_wait(self):
+        """Test queue wait is measured from publishing, or from the eta if later"""
+        headers = {}
+        stamp_published_at(headers=headers)
+        self.assertIn('published_at', headers)
+
+        self.assertEqual(queue_wait(SimpleNamespace(published_at=100.0, eta=None), 102.5), 2.5)
+        eta = datetime.fromtimestamp(110, tz=dt_timezone.utc).isoformat()
+        self.assertEqual(queue_wait(SimpleNamespace(published_at=100.0, eta=eta), 112.0), 2.0)
+        self.assertIsNone(queue_wait(SimpleNamespace(eta=None), 112.0))
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+
+def token_ttl():
+    """
+    Return the token lifetime as a timedelta, or None if tokens never expire.
+    """
+    seconds = getattr(settings, 'TOKEN_TTL', 0)
+    return timedelta(seconds=seconds) if seconds else None
+
+
+def token_expires_at(token):
+    ttl = token_ttl()
+    return token.created + ttl if ttl is not None else None
+
+
+def is_token_expired(token, now=None):
+    expires_at = token_expires_at(token)
+    return expires_at is not None and expires_at <= (now or timezone.now())
+
+
+def expired_tokens(now=None):
+    """
+    Return a queryset of expired tokens, served by the index on `created`.
+    """
+    ttl = token_ttl()
+    if ttl is None:
+        return Token.objects.none()
+    return Token.objects.filter(created__lte=(now or timezone.now()) - ttl)
+
+
+def get_or_create_fresh_token(user):
+    """
+    Return the user's token, replacing it first if it has expired.
+    """
+    with transaction.atomic():
+        token, created = Token.objects.get_or_create(user=user)
+        if not created and is_token_expired(token):
+            token.delete()
+            token = Token.objects.create(user=user)
+    return token
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     RegisterView,
@@ -6,13 +7,24 @@ from .views import (
     UserProfileView,
     ChangePasswordView
 )
+from .async_views import AsyncChangePasswordView, AsyncLoginView, AsyncRegisterView
 
 app_name = 'authentication'
 
+register_view = RegisterView.as_view()
+login_view = LoginView.as_view()
+change_password_view = ChangePasswordView.as_view()
+
+# Views that hash passwords have async versions that use a bounded thread pool
+if settings.AUTH_ASYNC_VIEWS:
+    register_view = AsyncRegisterView.as_view()
+    login_view = AsyncLoginView.as_view()
+    change_password_view = AsyncChangePasswordView.as_view()
+
 urlpatterns = [
-    path('register/', RegisterView.as_view(), name='register'),
-    path('login/', LoginView.as_view(), name='login'),
+    path('register/', register_view, name='register'),
+    path('login/', login_view, name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('profile/', UserProfileView.as_view(), name='profile'),
-    path('change-password/', ChangePasswordView.as_view(), name='change-password'),
+    path('change-password/', change_password_view, name='change-password'),
 ]
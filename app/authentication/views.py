@@ -1,13 +1,47 @@
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.db import transaction
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated, AllowAny
 from rest_framework.authtoken.models import Token
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from .serializers import UserSerializer, RegisterSerializer, ChangePasswordSerializer
-from .tasks import send_welcome_email
+from .tasks import queue_welcome_email
+from .tokens import get_or_create_fresh_token
+
+
+def create_account(serializer):
+    """
+    Save a validated RegisterSerializer and return (user, token).
+    """
+    with transaction.atomic():
+        user = serializer.save()
+
+        # Create token for the new user
+        token, created = Token.objects.get_or_create(user=user)
+
+        # Queue the welcome email for the next batch
+        queue_welcome_email(user)
+    return user, token
+
+
+def change_password(user, serializer):
+    """
+    Apply a validated ChangePasswordSerializer to `user`.
+
+    Returns the response body and status code.
+    """
+    # Check old password
+    if not user.check_password(serializer.data.get('old_password')):
+        return {'old_password': 'Wrong password'}, status.HTTP_400_BAD_REQUEST
+
+    # Set new password
+    user.set_password(serializer.data.get('new_password'))
+    # Leave the other fields alone: they may come from the token cache
+    user.save(update_fields=['password'])
+    return {'message': 'Password updated successfully'}, status.HTTP_200_OK
 
 
 class RegisterView(generics.CreateAPIView):
@@ -26,13 +60,7 @@ class RegisterView(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-
-        # Create token for the new user
-        token, created = Token.objects.get_or_create(user=user)
-
-        # Send welcome email asynchronously
-        send_welcome_email.delay(user.email, user.username)
+        user, token = create_account(serializer)
 
         return Response({
             'user': UserSerializer(user).data,
@@ -78,7 +106,7 @@ class LoginView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        token, created = Token.objects.get_or_create(user=user)
+        token = get_or_create_fresh_token(user)
 
         return Response({
             'user': UserSerializer(user).data,
@@ -113,12 +141,19 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = UserSerializer
 
+    def get_object(self):
+        user = self.request.user
+        if self.request.method not in SAFE_METHODS:
+            # Apply edits to the current row, not a cached copy of it
+            user.refresh_from_db()
+        return user
+
     @extend_schema(
         summary="Get current user profile",
         description="Retrieve the authenticated user's profile information"
     )
     def get(self, request, *args, **kwargs):
-        serializer = self.get_serializer(request.user)
+        serializer = self.get_serializer(self.get_object())
         return Response(serializer.data)
 
     @extend_schema(
@@ -126,7 +161,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         description="Update the authenticated user's profile information"
     )
     def put(self, request, *args, **kwargs):
-        serializer = self.get_serializer(request.user, data=request.data, partial=False)
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=False)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
@@ -136,7 +171,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         description="Partially update the authenticated user's profile information"
     )
     def patch(self, request, *args, **kwargs):
-        serializer = self.get_serializer(request.user, data=request.data, partial=True)
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
@@ -157,21 +192,5 @@ class ChangePasswordView(APIView):
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-
-        user = request.user
-
-        # Check old password
-        if not user.check_password(serializer.data.get('old_password')):
-            return Response(
-                {'old_password': 'Wrong password'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Set new password
-        user.set_password(serializer.data.get('new_password'))
-        user.save()
-
-        return Response(
-            {'message': 'Password updated successfully'},
-            status=status.HTTP_200_OK
-        )
+        data, status_code = change_password(request.user, serializer)
+        return Response(data, status=status_code)
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import AuthorStats
+
+
+@admin.register(AuthorStats)
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'post_count', 'published_post_count', 'page_count', 'published_page_count', 'last_post_at')
+    readonly_fields = ('user',) + AuthorStats.STAT_FIELDS
+    search_fields = ('user__username',)
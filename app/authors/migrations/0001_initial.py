@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='author_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('published_post_count', models.PositiveIntegerField(default=0)),
+                ('page_count', models.PositiveIntegerField(default=0)),
+                ('published_page_count', models.PositiveIntegerField(default=0)),
+                ('last_post_at', models.DateTimeField(blank=True, help_text='Creation time of the newest post', null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'author stats',
+            },
+        ),
+    ]
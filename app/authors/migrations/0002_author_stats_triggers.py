@@ -0,0 +1,152 @@
+from django.db import migrations
+
+STAT_COLUMNS = 'post_count, published_post_count, page_count, published_page_count, last_post_at'
+
+# Statement-level triggers with transition tables, so a bulk write touches
+# each author's row once. Counts never go below zero; reconcile_author_stats
+# repairs rows that drifted.
+STATS_TRIGGERS = """
+CREATE FUNCTION authors_{table}_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO authors_authorstats AS stats (user_id, {stat_columns})
+    SELECT author_id, {insert_values}
+    FROM new_rows
+    GROUP BY author_id
+    ON CONFLICT (user_id) DO UPDATE SET {upsert_assignments};
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION authors_{table}_update() RETURNS trigger AS $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM old_rows JOIN new_rows USING (id) WHERE {changed}) THEN
+        RETURN NULL;
+    END IF;
+
+    -- A row can move to an author who has no stats row yet
+    INSERT INTO authors_authorstats (user_id, {stat_columns})
+    SELECT DISTINCT author_id, 0, 0, 0, 0, NULL::timestamptz
+    FROM new_rows
+    ON CONFLICT (user_id) DO NOTHING;
+
+    WITH changed AS (
+        SELECT old_rows.author_id AS old_author_id, old_rows.published AS old_published,
+               new_rows.author_id AS new_author_id, new_rows.published AS new_published
+        FROM old_rows JOIN new_rows USING (id)
+        WHERE {changed}
+    ), deltas AS (
+        SELECT author_id, sum(total) AS total, sum(published) AS published
+        FROM (
+            SELECT old_author_id AS author_id, -1 AS total, -old_published::int AS published FROM changed
+            UNION ALL
+            SELECT new_author_id, 1, new_published::int FROM changed
+        ) AS moves
+        GROUP BY author_id
+    )
+    UPDATE authors_authorstats AS stats SET {delta_assignments}
+    FROM deltas
+    WHERE stats.user_id = deltas.author_id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION authors_{table}_delete() RETURNS trigger AS $$
+BEGIN
+    -- Update only: when a user is deleted, their stats row may already be gone
+    WITH deltas AS (
+        SELECT author_id, -count(*) AS total, -count(*) FILTER (WHERE published) AS published
+        FROM old_rows
+        GROUP BY author_id
+    )
+    UPDATE authors_authorstats AS stats SET {delta_assignments}
+    FROM deltas
+    WHERE stats.user_id = deltas.author_id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER authors_{table}_insert_trigger
+    AFTER INSERT ON {table} REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION authors_{table}_insert();
+
+CREATE TRIGGER authors_{table}_update_trigger
+    AFTER UPDATE ON {table} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION authors_{table}_update();
+
+CREATE TRIGGER authors_{table}_delete_trigger
+    AFTER DELETE ON {table} REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION authors_{table}_delete();
+"""
+
+DROP_STATS_TRIGGERS = """
+DROP TRIGGER IF EXISTS authors_{table}_insert_trigger ON {table};
+DROP TRIGGER IF EXISTS authors_{table}_update_trigger ON {table};
+DROP TRIGGER IF EXISTS authors_{table}_delete_trigger ON {table};
+DROP FUNCTION IF EXISTS authors_{table}_insert();
+DROP FUNCTION IF EXISTS authors_{table}_update();
+DROP FUNCTION IF EXISTS authors_{table}_delete();
+"""
+
+POST_STATS = {
+    'table': 'posts_post',
+    'stat_columns': STAT_COLUMNS,
+    'insert_values': 'count(*), count(*) FILTER (WHERE published), 0, 0, max(created_at)',
+    'upsert_assignments': (
+        'post_count = stats.post_count + EXCLUDED.post_count, '
+        'published_post_count = stats.published_post_count + EXCLUDED.published_post_count, '
+        'last_post_at = GREATEST(stats.last_post_at, EXCLUDED.last_post_at)'
+    ),
+    'changed': (
+        'old_rows.author_id <> new_rows.author_id OR old_rows.published <> new_rows.published '
+        'OR old_rows.created_at <> new_rows.created_at'
+    ),
+    'delta_assignments': (
+        'post_count = GREATEST(stats.post_count + deltas.total, 0), '
+        'published_post_count = GREATEST(stats.published_post_count + deltas.published, 0), '
+        'last_post_at = (SELECT max(created_at) FROM posts_post WHERE author_id = stats.user_id)'
+    ),
+}
+
+PAGE_STATS = {
+    'table': 'pages_page',
+    'stat_columns': STAT_COLUMNS,
+    'insert_values': '0, 0, count(*), count(*) FILTER (WHERE published), NULL::timestamptz',
+    'upsert_assignments': (
+        'page_count = stats.page_count + EXCLUDED.page_count, '
+        'published_page_count = stats.published_page_count + EXCLUDED.published_page_count'
+    ),
+    'changed': 'old_rows.author_id <> new_rows.author_id OR old_rows.published <> new_rows.published',
+    'delta_assignments': (
+        'page_count = GREATEST(stats.page_count + deltas.total, 0), '
+        'published_page_count = GREATEST(stats.published_page_count + deltas.published, 0)'
+    ),
+}
+
+BACKFILL_STATS = """
+INSERT INTO authors_authorstats (user_id, post_count, published_post_count, page_count, published_page_count, last_post_at)
+SELECT author_id, sum(posts), sum(published_posts), sum(pages), sum(published_pages), max(last_post_at)
+FROM (
+    SELECT author_id, count(*) AS posts, count(*) FILTER (WHERE published) AS published_posts,
+           0 AS pages, 0 AS published_pages, max(created_at) AS last_post_at
+    FROM posts_post GROUP BY author_id
+    UNION ALL
+    SELECT author_id, 0, 0, count(*), count(*) FILTER (WHERE published), NULL
+    FROM pages_page GROUP BY author_id
+) AS totals
+GROUP BY author_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authors', '0001_initial'),
+        ('posts', '0005_post_summary_fields'),
+        ('pages', '0005_page_summary_fields'),
+    ]
+
+    operations = [
+        migrations.RunSQL(STATS_TRIGGERS.format(**POST_STATS), DROP_STATS_TRIGGERS.format(**POST_STATS)),
+        migrations.RunSQL(STATS_TRIGGERS.format(**PAGE_STATS), DROP_STATS_TRIGGERS.format(**PAGE_STATS)),
+        migrations.RunSQL(BACKFILL_STATS, 'DELETE FROM authors_authorstats;'),
+    ]
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import models
+
+
+class AuthorStats(models.Model):
+    """
+    Per-author post and page counts, kept current by database triggers.
+
+    Statement-level triggers on the posts and pages tables adjust the
+    counts in the same transaction as the write, so bulk inserts, bulk
+    updates and queryset deletes are covered too. `reconcile_author_stats`
+    repairs any drift. Authors without posts or pages may have no row.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='author_stats'
+    )
+    post_count = models.PositiveIntegerField(default=0)
+    published_post_count = models.PositiveIntegerField(default=0)
+    page_count = models.PositiveIntegerField(default=0)
+    published_page_count = models.PositiveIntegerField(default=0)
+    last_post_at = models.DateTimeField(null=True, blank=True, help_text="Creation time of the newest post")
+
+    STAT_FIELDS = ('post_count', 'published_post_count', 'page_count', 'published_page_count', 'last_post_at')
+
+    class Meta:
+        verbose_name_plural = 'author stats'
+
+    def __str__(self):
+        return f'Stats for {self.user_id}'
+
+    @property
+    def draft_post_count(self):
+        return self.post_count - self.published_post_count
+
+    @property
+    def draft_page_count(self):
+        return self.page_count - self.published_page_count
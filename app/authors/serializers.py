@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from .models import AuthorStats
+
+
+class AuthorStatsSerializer(serializers.ModelSerializer):
+    """
+    Serializer for an author's post and page counts
+    """
+    draft_post_count = serializers.IntegerField(read_only=True)
+    draft_page_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = AuthorStats
+        fields = ('post_count', 'published_post_count', 'draft_post_count',
+                  'page_count', 'published_page_count', 'draft_page_count', 'last_post_at')
+        read_only_fields = fields
@@ -0,0 +1,93 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Max, Q
+
+from app.pages.models import Page
+from app.posts.models import Post
+from .models import AuthorStats
+
+logger = logging.getLogger(__name__)
+
+
+def compute_author_stats(user_ids):
+    """
+    Return the true stats for `user_ids`, aggregated from posts and pages,
+    as unsaved AuthorStats keyed by user id. Users with no content get no
+    entry.
+    """
+    stats = {}
+    posts = (
+        Post.objects.filter(author__in=user_ids).order_by().values('author')
+        .annotate(total=Count('pk'), published=Count('pk', filter=Q(published=True)), last=Max('created_at'))
+    )
+    for row in posts:
+        stats[row['author']] = AuthorStats(
+            user_id=row['author'],
+            post_count=row['total'],
+            published_post_count=row['published'],
+            last_post_at=row['last'],
+        )
+    pages = (
+        Page.objects.filter(author__in=user_ids).order_by().values('author')
+        .annotate(total=Count('pk'), published=Count('pk', filter=Q(published=True)))
+    )
+    for row in pages:
+        entry = stats.setdefault(row['author'], AuthorStats(user_id=row['author']))
+        entry.page_count = row['total']
+        entry.published_page_count = row['published']
+    return stats
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def reconcile_author_stats():
+    """
+    Compare AuthorStats with the posts and pages tables and fix drift.
+
+    Users are walked by primary key, AUTHOR_STATS_RECONCILE_BATCH_SIZE at
+    a time. Each batch locks its stats rows before counting, so a write
+    that commits meanwhile waits and then applies its change on top of
+    the corrected row. Returns the number of rows fixed. Like
+    cleanup_expired_tokens, it is safe to rerun and so acknowledged late.
+    """
+    batch_size = settings.AUTHOR_STATS_RECONCILE_BATCH_SIZE
+    fields = list(AuthorStats.STAT_FIELDS)
+    last_pk = 0
+    fixed = 0
+    while True:
+        user_ids = list(
+            User.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not user_ids:
+            break
+        last_pk = user_ids[-1]
+
+        with transaction.atomic():
+            stored = {
+                stats.user_id: stats
+                for stats in AuthorStats.objects.select_for_update().filter(user__in=user_ids).order_by('pk')
+            }
+            expected = compute_author_stats(user_ids)
+            to_create = []
+            to_update = []
+            for user_id in user_ids:
+                stats = stored.get(user_id)
+                actual = expected.get(user_id, AuthorStats(user_id=user_id))
+                if stats is None:
+                    if user_id in expected:
+                        to_create.append(actual)
+                elif any(getattr(stats, field) != getattr(actual, field) for field in fields):
+                    to_update.append(actual)
+            # ignore_conflicts: a concurrent first post may have created the row
+            AuthorStats.objects.bulk_create(to_create, ignore_conflicts=True)
+            AuthorStats.objects.bulk_update(to_update, fields)
+        fixed += len(to_create) + len(to_update)
+
+        if len(user_ids) < batch_size:
+            break
+
+    logger.info('Reconciled %d author stats rows', fixed)
+    return fixed
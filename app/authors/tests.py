@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+from app.authentication.authentication import local_cache
+from app.pages.models import Page
+from app.posts.models import Post
+from app.shared.testing import QueryBudgetMixin
+from .models import AuthorStats
+from .tasks import reconcile_author_stats
+
+
+class AuthorStatsTriggerTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+
+    def stats(self, user=None):
+        stats = AuthorStats.objects.get(user=user or self.user)
+        return stats.post_count, stats.published_post_count, stats.page_count, stats.published_page_count
+
+    def test_create_publish_and_delete(self):
+        """Test stats follow post creation, publishing and deletion"""
+        first = Post.objects.create(title='First', content='One', author=self.user, published=True)
+        second = Post.objects.create(title='Second', content='Two', author=self.user)
+        self.assertEqual(self.stats(), (2, 1, 0, 0))
+        self.assertEqual(AuthorStats.objects.get(user=self.user).last_post_at, second.created_at)
+
+        second.published = True
+        second.save()
+        self.assertEqual(self.stats(), (2, 2, 0, 0))
+
+        second.delete()
+        self.assertEqual(self.stats(), (1, 1, 0, 0))
+        self.assertEqual(AuthorStats.objects.get(user=self.user).last_post_at, first.created_at)
+
+        first.delete()
+        self.assertEqual(self.stats(), (0, 0, 0, 0))
+        self.assertIsNone(AuthorStats.objects.get(user=self.user).last_post_at)
+
+    def test_content_edits_do_not_touch_stats(self):
+        """Test updates that change no counted column leave the stats row alone"""
+        post = Post.objects.create(title='Post', content='One', author=self.user)
+        AuthorStats.objects.filter(user=self.user).update(post_count=7)
+        Post.objects.filter(pk=post.pk).update(content='Changed')
+        self.assertEqual(self.stats(), (7, 0, 0, 0))
+
+    def test_bulk_writes_and_moves(self):
+        """Test bulk API writes, queryset updates and author changes are counted"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/posts/bulk/', [
+            {'title': f'Bulk {i}', 'content': 'Text', 'published': i % 2 == 0} for i in range(5)
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.stats(), (5, 3, 0, 0))
+
+        ids = [item['id'] for item in response.data['created']]
+        self.client.patch('/api/posts/bulk/', [{'id': pk, 'published': True} for pk in ids], format='json')
+        self.assertEqual(self.stats(), (5, 5, 0, 0))
+
+        Post.objects.filter(pk__in=ids[:2]).update(author=self.other, published=False)
+        self.assertEqual(self.stats(), (3, 3, 0, 0))
+        self.assertEqual(self.stats(self.other), (2, 0, 0, 0))
+
+        Post.objects.filter(pk__in=ids).delete()
+        self.assertEqual(self.stats(), (0, 0, 0, 0))
+        self.assertEqual(self.stats(self.other), (0, 0, 0, 0))
+
+    def test_pages_are_counted(self):
+        """Test page writes update the page counts only"""
+        Post.objects.create(title='Post', content='One', author=self.user)
+        page = Page.objects.create(title='About', content='Text', author=self.user, published=True)
+        Page.objects.create(title='Draft', content='Text', author=self.user)
+        self.assertEqual(self.stats(), (1, 0, 2, 1))
+        page.delete()
+        self.assertEqual(self.stats(), (1, 0, 1, 0))
+        self.assertIsNotNone(AuthorStats.objects.get(user=self.user).last_post_at)
+
+    def test_deleting_an_author(self):
+        """Test deleting a user with content removes their stats row"""
+        Post.objects.create(title='Post', content='One', author=self.user)
+        Page.objects.create(title='Page', content='Text', author=self.user)
+        self.user.delete()
+        self.assertFalse(AuthorStats.objects.filter(user_id=self.user.pk).exists())
+
+
+class AuthorStatsAPITestCase(QueryBudgetMixin, APITestCase):
+    url = '/api/authors/me/stats/'
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def test_requires_authentication(self):
+        """Test anonymous users cannot read author stats"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_author_without_content(self):
+        """Test an author who never wrote anything gets zeros"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['post_count'], 0)
+        self.assertIsNone(response.data['last_post_at'])
+
+    def test_stats_from_one_query(self):
+        """Test stats come from a single-row lookup"""
+        Post.objects.create(title='Live', content='One', author=self.user, published=True)
+        Post.objects.create(title='Draft', content='Two', author=self.user)
+        self.client.force_authenticate(user=self.user)
+        with self.assertMaxQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(
+            (response.data['post_count'], response.data['published_post_count'], response.data['draft_post_count']),
+            (2, 1, 1)
+        )
+
+
+class ReconcileAuthorStatsTestCase(APITestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'user{i}', password='testpass123') for i in range(3)]
+        for user in self.users:
+            Post.objects.create(title='Post', content='One', author=user, published=True)
+        Page.objects.create(title='Page', content='Text', author=self.users[0])
+
+    def test_fixes_drift_in_batches(self):
+        """Test reconciliation repairs wrong and missing rows, a batch at a time"""
+        AuthorStats.objects.filter(user=self.users[0]).update(post_count=9, page_count=0)
+        AuthorStats.objects.filter(user=self.users[1]).update(
+            last_post_at=AuthorStats.objects.get(user=self.users[1]).last_post_at - timedelta(days=1)
+        )
+        AuthorStats.objects.filter(user=self.users[2]).delete()
+
+        with self.settings(AUTHOR_STATS_RECONCILE_BATCH_SIZE=2):
+            with self.assertLogs('app.authors.tasks', 'INFO') as logs:
+                self.assertEqual(reconcile_author_stats(), 3)
+        self.assertIn('Reconciled 3 author stats rows', logs.output[0])
+
+        first = AuthorStats.objects.get(user=self.users[0])
+        self.assertEqual((first.post_count, first.page_count), (1, 1))
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.users[1]).last_post_at,
+            Post.objects.get(author=self.users[1]).created_at
+        )
+        self.assertEqual(AuthorStats.objects.get(user=self.users[2]).published_post_count, 1)
+        self.assertEqual(reconcile_author_stats(), 0)
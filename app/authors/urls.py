@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import MyAuthorStatsView
+
+app_name = 'authors'
+
+urlpatterns = [
+    path('me/stats/', MyAuthorStatsView.as_view(), name='my-stats'),
+]
@@ -0,0 +1,21 @@
+from rest_framework import generics, permissions
+from drf_spectacular.utils import extend_schema
+from .models import AuthorStats
+from .serializers import AuthorStatsSerializer
+
+
+@extend_schema(
+    summary="Get your author stats",
+    description="Post and page counts and the time of your latest post. "
+                "Read from a table that is kept current on every write, so this is a single-row lookup."
+)
+class MyAuthorStatsView(generics.RetrieveAPIView):
+    """
+    Statistics for the authenticated author
+    """
+    serializer_class = AuthorStatsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        # Authors who never wrote anything have no row; report zeros
+        return AuthorStats.objects.filter(user=self.request.user).first() or AuthorStats(user=self.request.user)
@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import OutboxMessage
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('task_name', 'attempts', 'available_at', 'created_at')
+    readonly_fields = (
+        'task_name', 'args', 'kwargs', 'countdown', 'attempts', 'last_error', 'available_at', 'created_at',
+    )
+    list_filter = ('task_name',)
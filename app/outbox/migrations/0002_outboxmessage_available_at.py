@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='available_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
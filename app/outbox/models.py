@@ -0,0 +1,46 @@
+from django.db import models
+
+
+class OutboxQuerySet(models.QuerySet):
+    def enqueue(self, task_name, args=(), kwargs=None, countdown=None):
+        """
+        Record a Celery task to be published by relay_outbox.
+
+        Call it inside the transaction whose changes the task depends on:
+        the message is published only if that transaction commits, and
+        the caller never waits on the broker. `countdown` counts from
+        now, not from when the relay gets to the message.
+        """
+        return self.create(
+            task_name=task_name,
+            args=list(args),
+            kwargs=kwargs or {},
+            countdown=countdown,
+        )
+
+
+class OutboxMessage(models.Model):
+    """
+    A Celery task waiting to be published by the outbox relay.
+
+    Rows are deleted once published. Rows that failed OUTBOX_MAX_ATTEMPTS
+    times stay behind with their last error for inspection. While a relay
+    is publishing a row, `available_at` is set ahead and other relays
+    skip it.
+    """
+    task_name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    countdown = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = OutboxQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return self.task_name
@@ -0,0 +1,116 @@
+import logging
+from datetime import timedelta
+
+from celery import current_app, shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Publishing errors that mean the broker is unreachable, not that the
+# message is at fault
+BROKER_ERRORS = (OperationalError, OSError)
+
+
+def publish(message, now):
+    """
+    Send `message` to the broker, keeping what is left of its countdown.
+    """
+    options = {}
+    if message.countdown is not None:
+        elapsed = (now - message.created_at).total_seconds()
+        options['countdown'] = max(message.countdown - elapsed, 0)
+    current_app.send_task(message.task_name, args=message.args, kwargs=message.kwargs, **options)
+
+
+def claim_messages(batch_size, max_attempts):
+    """
+    Take up to `batch_size` due messages and commit at once.
+
+    The rows are locked with SKIP LOCKED only while their `available_at`
+    is pushed OUTBOX_CLAIM_TIMEOUT seconds out, so other relays pass over
+    them but no lock is held while the broker is called. If the relay
+    dies mid-batch, the rows come due again when the claim runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(Q(available_at__isnull=True) | Q(available_at__lte=now), attempts__lt=max_attempts)
+            .order_by('pk')[:batch_size]
+        )
+        claimed_until = now + timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+        OutboxMessage.objects.filter(pk__in=[message.pk for message in batch]).update(available_at=claimed_until)
+    return batch
+
+
+@shared_task(ignore_result=True)
+def relay_outbox():
+    """
+    Publish pending outbox messages to Celery, OUTBOX_RELAY_BATCH_SIZE at a
+    time, and delete them.
+
+    Each batch is claimed first (see claim_messages), so overlapping
+    relays never publish the same message twice and nothing stays locked
+    while the broker is called. A message is deleted after it is
+    published; if the relay dies in between, it goes out again once its
+    claim runs out, so tasks must tolerate duplicates.
+
+    When the broker cannot be reached, the unpublished rest of the batch
+    is released and the run stops until the next scheduled relay, without
+    counting an attempt against any message, so an outage of any length
+    loses nothing. Any other error is the message's own: its attempts are
+    bumped, it is retried once its claim runs out, and the run moves on.
+    A message that fails OUTBOX_MAX_ATTEMPTS times is logged as an error
+    and left in the table.
+    """
+    batch_size = settings.OUTBOX_RELAY_BATCH_SIZE
+    max_attempts = settings.OUTBOX_MAX_ATTEMPTS
+
+    published = 0
+    while True:
+        batch = claim_messages(batch_size, max_attempts)
+        if not batch:
+            break
+
+        sent, failed, unsent = [], [], []
+        outage = None
+        for index, message in enumerate(batch):
+            try:
+                publish(message, timezone.now())
+            except BROKER_ERRORS as exc:
+                outage = exc
+                unsent = batch[index:]
+                break
+            except Exception as exc:
+                message.attempts += 1
+                message.last_error = repr(exc)
+                failed.append(message)
+                if message.attempts >= max_attempts:
+                    logger.error(
+                        'Gave up on outbox message %d (%s) after %d attempts: %r',
+                        message.pk, message.task_name, message.attempts, exc,
+                    )
+            else:
+                sent.append(message.pk)
+
+        OutboxMessage.objects.filter(pk__in=sent).delete()
+        OutboxMessage.objects.bulk_update(failed, ['attempts', 'last_error'])
+        published += len(sent)
+
+        if outage is not None:
+            OutboxMessage.objects.filter(pk__in=[message.pk for message in unsent]).update(
+                available_at=None, last_error=repr(outage)
+            )
+            logger.warning('Broker unavailable, stopped relaying the outbox after %d messages: %r', published, outage)
+            break
+        if len(batch) < batch_size:
+            break
+
+    logger.info('Relayed %d outbox messages', published)
+    return published
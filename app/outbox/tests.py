@@ -0,0 +1,118 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from kombu.exceptions import EncodeError, OperationalError
+from .models import OutboxMessage
+from .tasks import relay_outbox
+
+
+@mock.patch('app.outbox.tasks.current_app.send_task')
+class RelayOutboxTestCase(TestCase):
+    def test_enqueue_rolls_back_with_transaction(self, send_task):
+        """Test messages enqueued in a failed transaction are never relayed"""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                OutboxMessage.objects.enqueue('app.tasks.first')
+                raise RuntimeError
+        self.assertEqual(relay_outbox(), 0)
+        send_task.assert_not_called()
+
+    def test_relay_publishes_and_deletes(self, send_task):
+        """Test the relay publishes messages in order and removes them"""
+        OutboxMessage.objects.enqueue('app.tasks.first', args=[1], kwargs={'flag': True})
+        OutboxMessage.objects.enqueue('app.tasks.second')
+        with self.assertLogs('app.outbox.tasks', 'INFO'):
+            self.assertEqual(relay_outbox(), 2)
+        self.assertEqual(send_task.call_args_list, [
+            mock.call('app.tasks.first', args=[1], kwargs={'flag': True}),
+            mock.call('app.tasks.second', args=[], kwargs={}),
+        ])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_countdown_counts_from_enqueue(self, send_task):
+        """Test time spent in the outbox is taken off the countdown"""
+        message = OutboxMessage.objects.enqueue('app.tasks.first', countdown=10)
+        OutboxMessage.objects.filter(pk=message.pk).update(created_at=timezone.now() - timedelta(seconds=4))
+        late = OutboxMessage.objects.enqueue('app.tasks.second', countdown=10)
+        OutboxMessage.objects.filter(pk=late.pk).update(created_at=timezone.now() - timedelta(seconds=60))
+        relay_outbox()
+        first, second = send_task.call_args_list
+        self.assertAlmostEqual(first.kwargs['countdown'], 6, delta=1)
+        self.assertEqual(second.kwargs['countdown'], 0)
+
+    def test_broker_outage_stops_the_run_without_using_attempts(self, send_task):
+        """Test an unreachable broker keeps the rest of the batch, however often it happens"""
+        OutboxMessage.objects.enqueue('app.tasks.first')
+        OutboxMessage.objects.enqueue('app.tasks.second')
+        OutboxMessage.objects.enqueue('app.tasks.third')
+        send_task.side_effect = [None, ConnectionError('broker down')]
+        with self.assertLogs('app.outbox.tasks', 'WARNING'):
+            self.assertEqual(relay_outbox(), 1)
+        self.assertEqual(send_task.call_count, 2)
+
+        send_task.side_effect = OperationalError('broker down')
+        for _ in range(settings.OUTBOX_MAX_ATTEMPTS + 1):
+            with self.assertLogs('app.outbox.tasks', 'WARNING'):
+                self.assertEqual(relay_outbox(), 0)
+
+        failed, waiting = OutboxMessage.objects.all()
+        self.assertEqual((failed.task_name, failed.attempts, failed.available_at), ('app.tasks.second', 0, None))
+        self.assertIn('broker down', failed.last_error)
+        self.assertEqual((waiting.task_name, waiting.attempts), ('app.tasks.third', 0))
+
+        send_task.side_effect = None
+        self.assertEqual(relay_outbox(), 2)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_message_failure_is_counted_and_skipped(self, send_task):
+        """Test a message the broker rejects uses up an attempt while the rest go out"""
+        bad = OutboxMessage.objects.enqueue('app.tasks.bad')
+        OutboxMessage.objects.enqueue('app.tasks.good')
+
+        def send(name, **options):
+            if name == 'app.tasks.bad':
+                raise EncodeError('cannot serialize')
+
+        send_task.side_effect = send
+        self.assertEqual(relay_outbox(), 1)
+        bad.refresh_from_db()
+        self.assertEqual(bad.attempts, 1)
+        self.assertIn('cannot serialize', bad.last_error)
+        # Held back until its claim runs out
+        self.assertEqual(relay_outbox(), 0)
+        OutboxMessage.objects.filter(pk=bad.pk).update(available_at=timezone.now())
+        self.assertEqual(relay_outbox(), 0)
+        self.assertEqual(OutboxMessage.objects.get().attempts, 2)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=1)
+    def test_dead_messages_are_logged(self, send_task):
+        """Test a message that runs out of attempts is logged as an error"""
+        OutboxMessage.objects.enqueue('app.tasks.bad')
+        send_task.side_effect = EncodeError('cannot serialize')
+        with self.assertLogs('app.outbox.tasks', 'ERROR') as logs:
+            relay_outbox()
+        self.assertIn('Gave up on outbox message', logs.output[0])
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=3)
+    def test_exhausted_messages_are_skipped(self, send_task):
+        """Test messages that failed too often stay behind unpublished"""
+        message = OutboxMessage.objects.enqueue('app.tasks.first')
+        OutboxMessage.objects.filter(pk=message.pk).update(attempts=3)
+        self.assertEqual(relay_outbox(), 0)
+        send_task.assert_not_called()
+        self.assertTrue(OutboxMessage.objects.exists())
+
+    @override_settings(OUTBOX_RELAY_BATCH_SIZE=2)
+    def test_relay_in_batches(self, send_task):
+        """Test the relay drains the outbox across several batches"""
+        for index in range(5):
+            OutboxMessage.objects.enqueue(f'app.tasks.task_{index}')
+        # Per batch: claim (savepoint, lock, update, release), then delete
+        with self.assertNumQueries(15):
+            self.assertEqual(relay_outbox(), 5)
+        self.assertEqual(send_task.call_count, 5)
+        self.assertFalse(OutboxMessage.objects.exists())
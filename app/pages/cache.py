@@ -0,0 +1,9 @@
+from app.shared.cache import GenerationalCache
+
+# Navigation payload, invalidated by the Page save/delete signals
+navigation_cache = GenerationalCache(
+    'pages:navigation',
+    alias_setting='NAVIGATION_CACHE_ALIAS',
+    timeout_setting='NAVIGATION_CACHE_TIMEOUT',
+    default_timeout=60 * 60,
+)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(fields=['-created_at', '-id'], name='pages_page_created_1bd618_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:46
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION pages_page_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.meta_description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.content, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER pages_page_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, meta_description, content ON pages_page
+    FOR EACH ROW EXECUTE FUNCTION pages_page_search_vector_update();
+
+UPDATE pages_page SET search_vector =
+        setweight(to_tsvector('english', coalesce(pages_page.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(pages_page.meta_description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(pages_page.content, '')), 'C');
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER IF EXISTS pages_page_search_vector_trigger ON pages_page;
+DROP FUNCTION IF EXISTS pages_page_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0002_page_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+        migrations.AddIndex(
+            model_name='page',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='pages_page_search__6d0d45_gin'),
+        ),
+    ]
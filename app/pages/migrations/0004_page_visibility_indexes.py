@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0003_search_vector'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='page',
+            name='pages_page_publish_fd6605_idx',
+        ),
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(condition=models.Q(('published', True)), fields=['order', 'title'], name='pages_page_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(fields=['author', 'order', 'title'], name='pages_page_author_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0004_page_visibility_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='page',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(editable=False, help_text='Minutes', null=True),
+        ),
+        migrations.AddField(
+            model_name='page',
+            name='word_count',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
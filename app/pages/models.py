@@ -1,10 +1,11 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import User
-from django.utils.text import slugify
-from app.shared.models import TimestampMixin
+from app.shared.models import ContentSummaryMixin, PublishableQuerySet, TimestampMixin, UniqueSlugMixin
 
 
-class Page(TimestampMixin):
+class Page(ContentSummaryMixin, UniqueSlugMixin, TimestampMixin):
     """
     Static page model for content like About, Contact, Terms, etc.
     """
@@ -16,25 +17,27 @@ class Page(TimestampMixin):
     published = models.BooleanField(default=False)
     order = models.IntegerField(default=0, help_text="Order for displaying in navigation")
     show_in_navigation = models.BooleanField(default=True, help_text="Show this page in navigation menu")
+    # Maintained by a database trigger from title, meta_description and content
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PublishableQuerySet.as_manager()
 
     class Meta:
         ordering = ['order', 'title']
         indexes = [
             models.Index(fields=['slug']),
-            models.Index(fields=['published']),
             models.Index(fields=['order']),
+            # Serve PublishableQuerySet.visible_to(): published pages in
+            # list order, and each author's pages in list order
+            models.Index(
+                fields=['order', 'title'],
+                condition=models.Q(published=True),
+                name='pages_page_published_idx',
+            ),
+            models.Index(fields=['author', 'order', 'title'], name='pages_page_author_idx'),
+            models.Index(fields=['-created_at', '-id']),
+            GinIndex(fields=['search_vector']),
         ]
 
     def __str__(self):
         return self.title
-
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-            # Ensure uniqueness
-            original_slug = self.slug
-            counter = 1
-            while Page.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from app.shared.fieldsets import SparseFieldsetSerializerMixin
 from .models import Page
 
 
@@ -13,20 +14,25 @@ class AuthorSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class PageListSerializer(serializers.ModelSerializer):
+class PageListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for listing pages (minimal fields)
+
+    `search_rank` and `search_headline` are only present in search results.
     """
     author = AuthorSerializer(read_only=True)
+    search_rank = serializers.FloatField(read_only=True)
+    search_headline = serializers.CharField(read_only=True)
 
     class Meta:
         model = Page
-        fields = ('id', 'title', 'slug', 'meta_description', 'author', 'published',
-                  'order', 'show_in_navigation', 'created_at', 'updated_at')
+        fields = ('id', 'title', 'slug', 'meta_description', 'excerpt', 'word_count',
+                  'reading_time', 'author', 'published', 'order', 'show_in_navigation',
+                  'created_at', 'updated_at', 'search_rank', 'search_headline')
         read_only_fields = ('id', 'slug', 'created_at', 'updated_at')
 
 
-class PageDetailSerializer(serializers.ModelSerializer):
+class PageDetailSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for detailed page view
     """
@@ -34,8 +40,9 @@ class PageDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Page
-        fields = ('id', 'title', 'slug', 'content', 'meta_description', 'author',
-                  'published', 'order', 'show_in_navigation', 'created_at', 'updated_at')
+        fields = ('id', 'title', 'slug', 'content', 'meta_description', 'excerpt',
+                  'word_count', 'reading_time', 'author', 'published', 'order',
+                  'show_in_navigation', 'created_at', 'updated_at')
         read_only_fields = ('id', 'slug', 'author', 'created_at', 'updated_at')
 
 
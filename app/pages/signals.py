@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import navigation_cache
+from .models import Page
+
+
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Page)
+def invalidate_navigation_cache(sender, **kwargs):
+    """
+    Drop the cached navigation menu whenever a page changes
+    """
+    navigation_cache.invalidate()
@@ -1,8 +1,19 @@
-from django.test import TestCase
-from django.contrib.auth.models import User
+import json
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, When
+from django.test import AsyncRequestFactory, TestCase
+from django.contrib.auth.models import AnonymousUser, User
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 from rest_framework import status
+from app.authentication.authentication import local_cache
+from app.shared.async_views import AsyncReadView
+from app.shared.testing import QueryBudgetMixin
 from .models import Page
+from .views import NavigationPagesView, PageListCreateView, PageRetrieveUpdateDestroyView
 
 
 class PageModelTestCase(TestCase):
@@ -23,6 +34,14 @@ class PageModelTestCase(TestCase):
         self.assertEqual(page.author, self.user)
         self.assertIsNotNone(page.slug)
 
+    def test_duplicate_titles_get_unique_slugs(self):
+        """Test pages with the same title get numbered slugs"""
+        slugs = [
+            Page.objects.create(title='Contact', content='x', author=self.user).slug
+            for _ in range(3)
+        ]
+        self.assertEqual(slugs, ['contact', 'contact-1', 'contact-2'])
+
 
 class PageAPITestCase(APITestCase):
     def setUp(self):
@@ -49,6 +68,13 @@ class PageAPITestCase(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_get_page_by_slug_conditional(self):
+        """Test a matching ETag returns 304 for a page"""
+        url = f'/api/pages/{self.page.slug}/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
     def test_create_page_authenticated(self):
         """Test authenticated user can create page"""
         self.client.force_authenticate(user=self.user)
@@ -69,3 +95,306 @@ class PageAPITestCase(APITestCase):
         }
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PageCursorPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        for i in range(15):
+            Page.objects.create(
+                title=f'Page {i:02d}',
+                content='Content',
+                author=self.user,
+                published=True,
+                order=i % 3
+            )
+
+    def test_cursor_walks_all_pages(self):
+        """Test following next cursors ordered by order visits every page once"""
+        expected = list(Page.objects.order_by('order', 'id').values_list('id', flat=True))
+        ids = []
+        url = '/api/pages/?ordering=order&cursor='
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+
+    def test_cursor_matches_page_number_order(self):
+        """Test cursor mode lists pages in the same order as page numbers by default"""
+        sequences = []
+        for url in ('/api/pages/', '/api/pages/?cursor='):
+            ids = []
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                ids.extend(item['id'] for item in response.data['results'])
+                url = response.data['next']
+            sequences.append(ids)
+        expected = list(Page.objects.order_by('order', 'title').values_list('id', flat=True))
+        self.assertEqual(sequences, [expected, expected])
+
+        response = self.client.get('/api/pages/?cursor=')
+        response = self.client.get(self.client.get(response.data['next']).data['previous'])
+        self.assertEqual([item['id'] for item in response.data['results']], expected[:10])
+
+
+class PageSearchTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.page = Page.objects.create(
+            title='Contact',
+            content='Write to us any time.',
+            meta_description='Support and sales enquiries',
+            author=self.user,
+            published=True
+        )
+        Page.objects.create(
+            title='About Us',
+            content='About our company',
+            author=self.user,
+            published=True
+        )
+
+    def test_search_meta_description(self):
+        """Test search covers the meta description"""
+        response = self.client.get('/api/pages/?search=enquiry')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [self.page.id])
+
+
+class NavigationCacheTestCase(APITestCase):
+    url = '/api/pages/navigation/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.page = Page.objects.create(
+            title='About Us',
+            content='About our company',
+            author=self.user,
+            published=True
+        )
+
+    def test_navigation_is_served_from_cache(self):
+        """Test repeated navigation requests do not query the database"""
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.data, first.data)
+
+    def test_if_none_match_returns_304(self):
+        """Test a matching ETag returns 304 Not Modified"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_page_changes_invalidate_cache(self):
+        """Test saving or deleting a page refreshes the menu and ETag"""
+        etag = self.client.get(self.url)['ETag']
+
+        self.page.title = 'About'
+        self.page.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['title'], 'About')
+
+        self.page.delete()
+        self.assertEqual(self.client.get(self.url).data, [])
+
+
+class PageExportTestCase(APITestCase):
+    def test_ndjson_export(self):
+        """Test pages export as NDJSON"""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        page = Page.objects.create(title='About Us', content='About', author=user, published=True)
+        response = self.client.get('/api/pages/export/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['slug'] for line in lines], [page.slug])
+
+
+class PageVisibilityIndexTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Plans are checked with the planner's default settings, so the
+        # table needs realistic rows: 2000 pages of about 1 kB from 20
+        # authors, 90% published. testuser has 100 of them, 10 drafts.
+        authors = User.objects.bulk_create([User(username=f'author{i}') for i in range(20)])
+        cls.user = authors[0]
+        Page.objects.bulk_create([
+            Page(
+                title=f'Page {i}',
+                slug=f'page-{i}',
+                content='word ' * 200,
+                author=authors[i % 20],
+                published=i // 20 % 10 != 0,
+                order=i % 50
+            )
+            for i in range(2000)
+        ])
+        cls.analyze()
+
+    @staticmethod
+    def analyze():
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE pages_page')
+
+    def test_visible_to_anonymous_scans_published_index(self):
+        """Test anonymous lists walk the partial index in list order"""
+        queryset = Page.objects.visible_to(AnonymousUser())
+        self.assertEqual(queryset.count(), 1800)
+        plan = queryset[:10].explain()
+        self.assertIn('Index Scan using pages_page_published_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_visible_to_user_list_walks_ordering_index(self):
+        """Test the ordered, limited list of published OR own pages stops early on the ordering index"""
+        plan = Page.objects.visible_to(self.user)[:10].explain()
+        self.assertIn('Limit', plan)
+        self.assertIn('Index Scan using pages_page_order_', plan)
+        self.assertIn(f'Filter: (published OR ((author_id = {self.user.pk}) AND (NOT published)))', plan)
+        # Rows come presorted on `order`; only ties are sorted by title
+        self.assertNotRegex(plan, r'(?<!Incremental )Sort  ')
+
+    def test_visible_to_user_count_combines_both_indexes(self):
+        """Test the unordered count of published OR own drafts is a BitmapOr over both indexes"""
+        queryset = Page.objects.visible_to(self.user)
+        self.assertEqual(queryset.count(), 1810)
+        # With most rows visible a sequential scan is cheaper. The indexes
+        # pay off once visible rows are a small share of the table.
+        Page.objects.update(published=Case(When(published=True, then=False), default=True))
+        self.analyze()
+        self.assertEqual(queryset.count(), 290)
+        # Counts drop the ordering, as the paginator's count query does
+        plan = queryset.order_by().explain()
+        self.assertIn('BitmapOr', plan)
+        self.assertIn('pages_page_published_idx', plan)
+        self.assertIn('Bitmap Index Scan on pages_page_author', plan)
+
+    def test_own_pages_scan_author_index(self):
+        """Test an author's pages are read in list order from one index"""
+        plan = Page.objects.filter(author=self.user)[:10].explain()
+        self.assertIn('Index Scan using pages_page_author_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+
+class PageSparseFieldsetTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.page = Page.objects.create(
+            title='About',
+            content='About us',
+            author=self.user,
+            published=True
+        )
+
+    def test_list_and_detail_fields(self):
+        """Test fields and omit apply to page lists and details"""
+        response = self.client.get('/api/pages/', {'fields': 'slug,order'})
+        self.assertEqual(response.data['results'], [{'slug': 'about', 'order': 0}])
+        response = self.client.get(f'/api/pages/{self.page.slug}/', {'omit': 'content,author'})
+        self.assertNotIn('content', response.data)
+        self.assertEqual(response.data['title'], 'About')
+
+    def test_unknown_fields_are_rejected(self):
+        """Test unknown field names are a 400"""
+        response = self.client.get('/api/pages/', {'fields': 'nope'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PageQueryBudgetTestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        for i in range(15):
+            Page.objects.create(title=f'Page {i}', content='Content', author=self.user, published=i % 3 > 0)
+
+    def test_list_budgets(self):
+        """Test list reads: a count and one page of rows"""
+        with self.assertMaxQueries(2):
+            self.client.get('/api/pages/')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        with self.assertMaxQueries(3):
+            self.client.get('/api/pages/my-pages/')
+
+    def test_detail_budget(self):
+        """Test a detail read is a single query"""
+        with self.assertMaxQueries(1):
+            self.client.get('/api/pages/page-1/')
+
+    def test_navigation_budget(self):
+        """Test navigation needs one query, then none while cached"""
+        with self.assertMaxQueries(1):
+            self.client.get('/api/pages/navigation/')
+        with self.assertMaxQueries(0):
+            self.client.get('/api/pages/navigation/')
+
+
+class PageAsyncReadViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        for index in range(4):
+            Page.objects.create(
+                title=f'Page {index}',
+                content='Content',
+                author=self.user,
+                published=index != 3,
+                order=index,
+                show_in_navigation=index != 2
+            )
+
+    def fetch(self, view, path, **kwargs):
+        request = self.factory.get(path)
+        response = async_to_sync(view)(request, **kwargs) if iscoroutinefunction(view) else view(request, **kwargs)
+        response.render()
+        return response
+
+    def assertSameResponse(self, view_class, action, path, **kwargs):
+        sync_response = self.fetch(view_class.as_view(), path, **kwargs)
+        async_response = self.fetch(AsyncReadView.as_view(view_class=view_class, action=action), path, **kwargs)
+        self.assertEqual(async_response.status_code, sync_response.status_code, path)
+        self.assertEqual(async_response.content, sync_response.content, path)
+        return async_response
+
+    def test_list_and_detail_match_sync_views(self):
+        """Test async page list and detail answer like the sync views"""
+        self.assertSameResponse(PageListCreateView, 'list', '/api/pages/?ordering=-order')
+        self.assertSameResponse(PageListCreateView, 'list', '/api/pages/?show_in_navigation=true')
+        page = Page.objects.get(title='Page 1')
+        self.assertSameResponse(PageRetrieveUpdateDestroyView, 'retrieve', f'/api/pages/{page.slug}/', slug=page.slug)
+        draft = Page.objects.get(title='Page 3')
+        response = self.assertSameResponse(PageRetrieveUpdateDestroyView, 'retrieve',
+                                           f'/api/pages/{draft.slug}/', slug=draft.slug)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_navigation_is_cached(self):
+        """Test the async navigation view fills and then reads the navigation cache"""
+        view = AsyncReadView.as_view(view_class=NavigationPagesView, action='list')
+        response = self.assertSameResponse(NavigationPagesView, 'list', '/api/pages/navigation/')
+        self.assertEqual([item['title'] for item in json.loads(response.content)], ['Page 0', 'Page 1'])
+        with self.assertNumQueries(0):
+            cached = self.fetch(view, '/api/pages/navigation/')
+        self.assertEqual(cached['ETag'], response['ETag'])
@@ -1,16 +1,30 @@
+from django.conf import settings
 from django.urls import path
+from app.shared.async_views import AsyncReadView
 from .views import (
     PageListCreateView,
     PageRetrieveUpdateDestroyView,
     NavigationPagesView,
-    MyPagesListView
+    MyPagesListView,
+    PageExportView
 )
 
 app_name = 'pages'
 
+list_create_view = PageListCreateView.as_view()
+navigation_view = NavigationPagesView.as_view()
+detail_view = PageRetrieveUpdateDestroyView.as_view()
+
+# Under ASGI, reads go through the async ORM; writes still use the DRF views
+if settings.ASYNC_READ_VIEWS:
+    list_create_view = AsyncReadView.as_view(view_class=PageListCreateView, action='list')
+    navigation_view = AsyncReadView.as_view(view_class=NavigationPagesView, action='list')
+    detail_view = AsyncReadView.as_view(view_class=PageRetrieveUpdateDestroyView, action='retrieve')
+
 urlpatterns = [
-    path('', PageListCreateView.as_view(), name='page-list-create'),
-    path('navigation/', NavigationPagesView.as_view(), name='navigation-pages'),
+    path('', list_create_view, name='page-list-create'),
+    path('navigation/', navigation_view, name='navigation-pages'),
     path('my-pages/', MyPagesListView.as_view(), name='my-pages'),
-    path('<slug:slug>/', PageRetrieveUpdateDestroyView.as_view(), name='page-detail'),
+    path('export/', PageExportView.as_view(), name='page-export'),
+    path('<slug:slug>/', detail_view, name='page-detail'),
 ]
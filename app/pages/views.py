@@ -1,7 +1,22 @@
 from rest_framework import generics, permissions, filters
-from django.db import models
+from django.db.models import F
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+from rest_framework.response import Response
+from app.shared.async_views import AsyncReadMixin
+from app.shared.conditional import (
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    conditional_response,
+    make_etag,
+)
+from app.shared.export import StreamingExportMixin
+from app.shared.fast_serializers import FastListMixin
+from app.shared.fieldsets import SparseFieldsetMixin
+from app.shared.pagination import PageNumberOrCursorPagination
+from app.shared.search import FullTextSearchFilter
+from .cache import navigation_cache
 from .models import Page
 from .serializers import (
     PageListSerializer,
@@ -15,19 +30,23 @@ from .permissions import IsAuthorOrReadOnly
 @extend_schema_view(
     get=extend_schema(
         summary="List all pages",
-        description="Get a paginated list of pages. Public users see only published pages. Authors can see their own drafts."
+        description="Get a paginated list of pages. Public users see only published pages. Authors can see their own drafts. Pass `cursor=` to switch to cursor pagination."
     ),
     post=extend_schema(
         summary="Create a new page",
         description="Create a new page. Requires authentication."
     )
 )
-class PageListCreateView(generics.ListCreateAPIView):
+class PageListCreateView(ConditionalListMixin, FastListMixin, SparseFieldsetMixin, AsyncReadMixin,
+                         generics.ListCreateAPIView):
     """
     List all pages or create a new page
     """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = PageNumberOrCursorPagination
+    # Page.Meta.ordering, so that cursor mode lists pages in the same order
+    cursor_ordering = ('order', 'title')
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['published', 'author', 'show_in_navigation']
     search_fields = ['title', 'content', 'meta_description']
     ordering_fields = ['order', 'created_at', 'updated_at', 'title']
@@ -37,16 +56,7 @@ class PageListCreateView(generics.ListCreateAPIView):
         Return published pages for anonymous users,
         but allow authenticated users to see their own drafts
         """
-        queryset = Page.objects.select_related('author')
-
-        if self.request.user.is_authenticated:
-            # Authenticated users see all published pages + their own pages
-            return queryset.filter(
-                models.Q(published=True) | models.Q(author=self.request.user)
-            )
-        else:
-            # Anonymous users only see published pages
-            return queryset.filter(published=True)
+        return Page.objects.select_related('author').visible_to(self.request.user)
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -75,7 +85,8 @@ class PageListCreateView(generics.ListCreateAPIView):
         description="Delete a page. Only the author can delete their pages."
     )
 )
-class PageRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class PageRetrieveUpdateDestroyView(ConditionalRetrieveMixin, SparseFieldsetMixin, AsyncReadMixin,
+                                    generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a page by slug
     """
@@ -92,23 +103,19 @@ class PageRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         """
         Allow users to view published pages or their own pages
         """
-        queryset = super().get_queryset()
-
-        if self.request.user.is_authenticated:
-            return queryset.filter(
-                models.Q(published=True) | models.Q(author=self.request.user)
-            )
-        else:
-            return queryset.filter(published=True)
+        return super().get_queryset().visible_to(self.request.user)
 
 
 @extend_schema(
     summary="Get navigation pages",
-    description="Get all published pages that should be shown in navigation, ordered by order field"
+    description="Get all published pages that should be shown in navigation, ordered by order field. "
+                "Responses carry an ETag; send it back in If-None-Match to get a 304."
 )
-class NavigationPagesView(generics.ListAPIView):
+class NavigationPagesView(AsyncReadMixin, generics.ListAPIView):
     """
     List pages for navigation menu
+
+    The serialized menu is cached until a page is saved or deleted.
     """
     serializer_class = NavigationPageSerializer
     permission_classes = [permissions.AllowAny]
@@ -120,12 +127,30 @@ class NavigationPagesView(generics.ListAPIView):
             show_in_navigation=True
         ).order_by('order', 'title')
 
+    def make_entry(self, pages):
+        data = [dict(item) for item in self.get_serializer(pages, many=True).data]
+        return {'etag': make_etag(data), 'data': data}
+
+    def list(self, request, *args, **kwargs):
+        entry = navigation_cache.get('payload')
+        if entry is None:
+            entry = self.make_entry(self.get_queryset())
+            navigation_cache.set('payload', entry)
+        return conditional_response(request, Response(entry['data']), etag=entry['etag'])
+
+    async def alist(self, request, *args, **kwargs):
+        entry = await navigation_cache.aget('payload')
+        if entry is None:
+            entry = self.make_entry([page async for page in self.get_queryset()])
+            await navigation_cache.aset('payload', entry)
+        return conditional_response(request, Response(entry['data']), etag=entry['etag'])
+
 
 @extend_schema(
     summary="List user's own pages",
     description="Get all pages created by the authenticated user"
 )
-class MyPagesListView(generics.ListAPIView):
+class MyPagesListView(ConditionalListMixin, FastListMixin, SparseFieldsetMixin, generics.ListAPIView):
     """
     List all pages by the authenticated user
     """
@@ -134,3 +159,23 @@ class MyPagesListView(generics.ListAPIView):
 
     def get_queryset(self):
         return Page.objects.filter(author=self.request.user).select_related('author')
+
+
+@extend_schema(
+    summary="Export pages",
+    description="Stream every page visible to the caller as NDJSON (default) or CSV. "
+                "Accepts the same filter, search and ordering parameters as the list endpoint.",
+    parameters=[
+        OpenApiParameter('output', str, enum=['ndjson', 'csv'], description='Export format'),
+    ],
+    responses={(200, 'application/x-ndjson'): OpenApiTypes.STR, (200, 'text/csv'): OpenApiTypes.STR}
+)
+class PageExportView(StreamingExportMixin, PageListCreateView):
+    """
+    Stream pages as NDJSON or CSV
+    """
+    http_method_names = ['get', 'head', 'options']
+    export_fields = ('id', 'title', 'slug', 'content', 'meta_description', 'published', 'order',
+                     'show_in_navigation', 'author_id', 'created_at', 'updated_at')
+    export_expressions = {'author_username': F('author__username')}
+    export_filename = 'pages'
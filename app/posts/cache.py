@@ -0,0 +1,41 @@
+from app.shared.cache import GenerationalCache, SingleFlightCache
+
+# Anonymous post list responses, invalidated by the Post save/delete
+# signals and by the bulk create/update paths
+post_list_cache = GenerationalCache(
+    'posts:list',
+    alias_setting='POST_LIST_CACHE_ALIAS',
+    timeout_setting='POST_LIST_CACHE_TIMEOUT',
+    default_timeout=60,
+)
+
+# Anonymous post detail payloads, keyed on the post id
+post_detail_cache = SingleFlightCache(
+    'posts:detail',
+    alias_setting='POST_DETAIL_CACHE_ALIAS',
+    timeout_setting='POST_DETAIL_CACHE_TIMEOUT',
+    default_timeout=5 * 60,
+)
+
+
+def invalidate_post_details(posts):
+    """
+    Let edits to published posts be refreshed in the background, but drop
+    unpublished posts at once so they are never served again.
+    """
+    published = [post.pk for post in posts if post.published]
+    hidden = [post.pk for post in posts if not post.published]
+    if published:
+        post_detail_cache.expire(*published)
+    if hidden:
+        post_detail_cache.delete(*hidden)
+
+
+def invalidate_post_summaries(pks):
+    """
+    Refresh cached lists and details after summaries were written in bulk,
+    e.g. by backfill_summaries. Only published posts are cached, so the
+    rest are no-ops.
+    """
+    post_list_cache.invalidate()
+    post_detail_cache.expire(*pks)
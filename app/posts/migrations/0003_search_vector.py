@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:46
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION posts_post_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_post_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, content ON posts_post
+    FOR EACH ROW EXECUTE FUNCTION posts_post_search_vector_update();
+
+UPDATE posts_post SET search_vector =
+        setweight(to_tsvector('english', coalesce(posts_post.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(posts_post.content, '')), 'B');
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER IF EXISTS posts_post_search_vector_trigger ON posts_post;
+DROP FUNCTION IF EXISTS posts_post_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_post_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='posts_post_search__e0bb56_gin'),
+        ),
+    ]
@@ -1,10 +1,11 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import User
-from django.utils.text import slugify
-from app.shared.models import TimestampMixin
+from app.shared.models import ContentSummaryMixin, PublishableQuerySet, TimestampMixin, UniqueSlugMixin
 
 
-class Post(TimestampMixin):
+class Post(ContentSummaryMixin, UniqueSlugMixin, TimestampMixin):
     """
     Blog post model
     """
@@ -13,25 +14,26 @@ class Post(TimestampMixin):
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     published = models.BooleanField(default=False)
+    # Maintained by a database trigger from title and content
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PublishableQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['-created_at']),
+            models.Index(fields=['-created_at', '-id']),
             models.Index(fields=['slug']),
-            models.Index(fields=['published']),
+            # Serve PublishableQuerySet.visible_to(): published rows in list
+            # order, and each author's posts in list order
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(published=True),
+                name='posts_post_published_idx',
+            ),
+            models.Index(fields=['author', '-created_at', '-id'], name='posts_post_author_idx'),
+            GinIndex(fields=['search_vector']),
         ]
 
     def __str__(self):
         return self.title
-
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-            # Ensure uniqueness
-            original_slug = self.slug
-            counter = 1
-            while Post.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
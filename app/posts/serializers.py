@@ -1,5 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from app.shared.fieldsets import SparseFieldsetSerializerMixin
+from .cache import invalidate_post_details, post_list_cache
 from .models import Post
 
 
@@ -13,19 +17,24 @@ class AuthorSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class PostListSerializer(serializers.ModelSerializer):
+class PostListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for listing blog posts (minimal fields)
+
+    `search_rank` and `search_headline` are only present in search results.
     """
     author = AuthorSerializer(read_only=True)
+    search_rank = serializers.FloatField(read_only=True)
+    search_headline = serializers.CharField(read_only=True)
 
     class Meta:
         model = Post
-        fields = ('id', 'title', 'slug', 'author', 'published', 'created_at', 'updated_at')
+        fields = ('id', 'title', 'slug', 'excerpt', 'word_count', 'reading_time', 'author',
+                  'published', 'created_at', 'updated_at', 'search_rank', 'search_headline')
         read_only_fields = ('id', 'slug', 'created_at', 'updated_at')
 
 
-class PostDetailSerializer(serializers.ModelSerializer):
+class PostDetailSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for detailed blog post view
     """
@@ -33,10 +42,76 @@ class PostDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ('id', 'title', 'slug', 'content', 'author', 'published', 'created_at', 'updated_at')
+        fields = ('id', 'title', 'slug', 'content', 'excerpt', 'word_count', 'reading_time',
+                  'author', 'published', 'created_at', 'updated_at')
         read_only_fields = ('id', 'slug', 'author', 'created_at', 'updated_at')
 
 
+class PostBulkListSerializer(serializers.ListSerializer):
+    """
+    many=True serializer for bulk writes that does not fail the whole batch.
+
+    After is_valid(), `validated_data` holds only the valid items,
+    `item_indexes` their positions in the input and `item_errors` maps
+    the position of every rejected item to its errors.
+    """
+
+    def to_internal_value(self, data):
+        if (not isinstance(data, list)
+                or (self.max_length is not None and len(data) > self.max_length)
+                or (not self.allow_empty and not data)):
+            # Let ListSerializer raise the matching error for the whole payload
+            return super().to_internal_value(data)
+
+        self.item_indexes = []
+        self.item_errors = {}
+        validated = []
+        for index, item in enumerate(data):
+            try:
+                validated.append(self.child.run_validation(item))
+            except serializers.ValidationError as exc:
+                self.item_errors[index] = exc.detail
+            else:
+                self.item_indexes.append(index)
+        return validated
+
+    def create(self, validated_data):
+        posts = [Post(**attrs) for attrs in validated_data]
+        for post in posts:
+            post.update_summary()
+        for attempt in range(Post.slug_max_attempts):
+            Post.assign_slugs(posts)
+            try:
+                with transaction.atomic():
+                    created = Post.objects.bulk_create(posts)
+                # bulk_create() sends no post_save signals
+                post_list_cache.invalidate()
+                return created
+            except IntegrityError:
+                # Another request took one of the slugs; allocate again
+                for post in posts:
+                    post.slug = ''
+                if attempt == Post.slug_max_attempts - 1:
+                    raise
+
+    def update(self, instances, validated_data):
+        posts = [instances[index] for index in self.item_indexes]
+        fields = {'updated_at'}
+        now = timezone.now()
+        for post, attrs in zip(posts, validated_data):
+            for attr, value in attrs.items():
+                setattr(post, attr, value)
+            post.updated_at = now
+            fields.update(attrs)
+            if Post.summary_source_field in attrs:
+                post.update_summary()
+                fields.update(Post.SUMMARY_FIELDS)
+        Post.objects.bulk_update(posts, sorted(fields))
+        post_list_cache.invalidate()
+        invalidate_post_details(posts)
+        return posts
+
+
 class PostCreateUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating and updating blog posts
@@ -44,6 +119,7 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = ('title', 'content', 'published')
+        list_serializer_class = PostBulkListSerializer
 
     def create(self, validated_data):
         # Author is set automatically from request.user in the view
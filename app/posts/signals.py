@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_post_details, post_detail_cache, post_list_cache
+from .models import Post
+
+# User fields that never appear in post payloads
+UNDISPLAYED_USER_FIELDS = frozenset({'is_active', 'last_login', 'password'})
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_list_cache(sender, **kwargs):
+    """
+    Drop cached post lists whenever a post changes
+    """
+    post_list_cache.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_detail_cache(sender, instance, **kwargs):
+    """
+    Refresh or drop the cached detail of a saved post
+    """
+    invalidate_post_details([instance])
+
+
+@receiver(post_delete, sender=Post)
+def drop_post_detail_cache(sender, instance, **kwargs):
+    """
+    Stop serving a deleted post from the detail cache
+    """
+    post_detail_cache.delete(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_post_caches_for_author(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Drop cached post lists and mark the author's cached post details stale
+    when a user is edited, since both show author names
+    """
+    if not created and not (update_fields and update_fields <= UNDISPLAYED_USER_FIELDS):
+        post_list_cache.invalidate()
+        # Anonymous readers only ever cache published posts
+        post_detail_cache.expire(*Post.objects.filter(author=instance, published=True).values_list('pk', flat=True))
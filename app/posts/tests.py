@@ -1,8 +1,39 @@
-from django.test import TestCase
-from django.contrib.auth.models import User
-from rest_framework.test import APITestCase
+import csv
+import io
+import json
+import threading
+import time
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import Case, When
+from django.http import Http404, HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import AnonymousUser, User
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
 from rest_framework import status
+from app.authentication.authentication import local_cache
+from app.shared.async_views import AsyncReadView
+from app.shared.cache import SingleFlightCache
+from app.shared.fast_serializers import values_serializer_for
+from app.shared.middleware import QueryInstrumentationMiddleware, ReplicaRoutingMiddleware
+from app.shared.pagination import EstimatedCountPaginator
+from app.shared.routers import ReplicaRouter, replica_reads
+from app.shared.search import FullTextSearchFilter
+from app.shared.slugs import allocate_slugs
+from app.shared.testing import QueryBudgetMixin
+from .cache import post_detail_cache, post_list_cache
 from .models import Post
+from .serializers import PostListSerializer
+from .views import PostExportView, PostListCreateView, PostRetrieveUpdateDestroyView
 
 
 class PostModelTestCase(TestCase):
@@ -23,6 +54,33 @@ class PostModelTestCase(TestCase):
         self.assertEqual(post.author, self.user)
         self.assertIsNotNone(post.slug)
 
+    def test_duplicate_titles_get_next_free_suffix(self):
+        """Test slugs continue after the highest numbered duplicate"""
+        for slug in ('weekly-update', 'weekly-update-1', 'weekly-update-5', 'weekly-update-notes'):
+            Post.objects.create(title='x', slug=slug, content='x', author=self.user)
+
+        with self.assertNumQueries(1):
+            slug = allocate_slugs(Post.objects.all(), ['weekly-update'])[0]
+        self.assertEqual(slug, 'weekly-update-6')
+
+        post = Post.objects.create(title='Weekly update', content='x', author=self.user)
+        self.assertEqual(post.slug, 'weekly-update-6')
+
+    def test_slug_conflict_is_retried(self):
+        """Test a slug taken by a concurrent insert is reallocated"""
+        Post.objects.create(title='Taken', content='x', author=self.user)
+        with mock.patch('app.shared.models.allocate_slugs', side_effect=[['taken'], ['taken-1']]):
+            post = Post.objects.create(title='Taken', content='x', author=self.user)
+        self.assertEqual(post.slug, 'taken-1')
+
+    def test_assign_slugs_in_batch(self):
+        """Test batch slug assignment handles duplicates within the batch"""
+        Post.objects.create(title='Hello', content='x', author=self.user)
+        posts = [Post(title=title, content='x', author=self.user) for title in ('Hello', 'Hello', 'Other')]
+        with self.assertNumQueries(1):
+            Post.assign_slugs(posts)
+        self.assertEqual([post.slug for post in posts], ['hello-1', 'hello-2', 'other'])
+
 
 class PostAPITestCase(APITestCase):
     def setUp(self):
@@ -63,3 +121,1243 @@ class PostAPITestCase(APITestCase):
         }
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PostCursorPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.posts = [
+            Post.objects.create(
+                title=f'Post {i:02d}',
+                content='Content',
+                author=self.user,
+                published=True
+            )
+            for i in range(25)
+        ]
+        # Give several posts the same timestamp so the id tiebreaker matters
+        same_time = self.posts[10].created_at
+        Post.objects.filter(pk__in=[p.pk for p in self.posts[8:13]]).update(created_at=same_time)
+
+    def _walk(self, url, key='next'):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data[key]
+        return ids
+
+    def test_cursor_walks_all_posts_in_order(self):
+        """Test following next cursors visits every post exactly once"""
+        expected = list(
+            Post.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(self._walk('/api/posts/?cursor='), expected)
+
+    def test_cursor_previous_links(self):
+        """Test previous cursors walk back to the first page"""
+        response = self.client.get('/api/posts/?cursor=')
+        first_page = [item['id'] for item in response.data['results']]
+        self.assertIsNone(response.data['previous'])
+
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['id'] for item in response.data['results']], first_page)
+
+    def test_cursor_respects_ordering_filter(self):
+        """Test cursor mode follows the ordering query parameter"""
+        expected = list(Post.objects.order_by('title', 'id').values_list('id', flat=True))
+        self.assertEqual(self._walk('/api/posts/?ordering=title&cursor='), expected)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor returns 404"""
+        response = self.client.get('/api/posts/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_is_default(self):
+        """Test page number pagination is used without a cursor parameter"""
+        response = self.client.get('/api/posts/')
+        self.assertEqual(response.data['count'], 25)
+
+
+@override_settings(PAGINATION_EXACT_COUNT_LIMIT=5)
+class PostEstimatedCountTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        Post.objects.bulk_create([
+            Post(title=f'Post {i}', slug=f'post-{i}', content='Content', author=self.user, published=True)
+            for i in range(25)
+        ])
+
+    def test_count_is_estimated_above_the_limit(self):
+        """Test large lists report a planner estimate flagged as approximate"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/posts/')
+        self.assertTrue(response.data['count_approximate'])
+        self.assertGreater(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertTrue(any(query['sql'].startswith('EXPLAIN') for query in queries))
+        self.assertFalse(any('COUNT(*)' in query['sql'] and 'LIMIT' not in query['sql'] for query in queries))
+
+    def test_count_is_exact_below_the_limit(self):
+        """Test small result sets are counted exactly"""
+        response = self.client.get('/api/posts/?search=nothing-matches')
+        self.assertEqual(response.data['count'], 0)
+        self.assertFalse(response.data['count_approximate'])
+        with self.settings(PAGINATION_EXACT_COUNT_LIMIT=0):
+            response = self.client.get('/api/posts/')
+        self.assertEqual(response.data['count'], 25)
+        self.assertFalse(response.data['count_approximate'])
+
+    def test_pages_past_the_estimate_are_served(self):
+        """Test an estimated count does not turn real pages into 404s"""
+        response = self.client.get('/api/posts/?page=3')
+        self.assertEqual(len(response.data['results']), 5)
+        response = self.client.get('/api/posts/?page=1000')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get('/api/posts/?page=abc')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_next_links_reach_rows_past_a_low_estimate(self):
+        """Test next links follow the rows, not the estimate, when the planner under-counts"""
+        with mock.patch('app.shared.pagination.estimate_count', return_value=6):
+            ids = []
+            url = '/api/posts/'
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.data['count'], 6)
+                ids.extend(item['id'] for item in response.data['results'])
+                url = response.data['next']
+        self.assertEqual(sorted(ids), sorted(Post.objects.values_list('id', flat=True)))
+
+        with mock.patch('app.shared.pagination.estimate_count', return_value=6):
+            paginator = EstimatedCountPaginator(Post.objects.order_by('pk'), 10)
+            page = paginator.page(2)
+        # As the async paginator does, replace the lazy rows before use
+        page.object_list = list(page.object_list)
+        self.assertEqual((len(page), page.has_next()), (10, True))
+        self.assertFalse(paginator.page(3).has_next())
+
+    def test_async_count_matches_sync(self):
+        """Test the async paginator reports the same count"""
+        paginator = EstimatedCountPaginator(Post.objects.order_by('pk'), 10)
+        self.assertEqual(async_to_sync(paginator.acount)(), paginator.count)
+        self.assertTrue(paginator.count_approximate)
+        self.assertEqual(len(paginator.page(3).object_list), 5)
+
+    def test_list_etag_follows_the_page(self):
+        """Test the list ETag changes when a row on the page goes away"""
+        etag = self.client.get('/api/posts/')['ETag']
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Post.objects.order_by('-created_at').first().delete()
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class PostListCacheTestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        post_list_cache.stats.reset()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(title='Cached post', content='Content', author=self.user, published=True)
+
+    def test_anonymous_hit_runs_no_queries(self):
+        """Test a repeated anonymous list is served from the cache"""
+        response = self.client.get('/api/posts/?search=cached&ordering=title')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        with self.assertMaxQueries(0):
+            cached = self.client.get('/api/posts/?ordering=title&search=cached')
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertEqual(post_list_cache.stats.as_dict(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_hit_honours_if_none_match(self):
+        """Test a cached entry still answers 304 for a matching ETag"""
+        etag = self.client.get('/api/posts/')['ETag']
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_misses_are_filled_from_the_primary(self):
+        """Test an anonymous miss never reads a replica that may lag behind the invalidation"""
+        routed = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            routed.append(db_for_read(router, model, **hints))
+            return routed[-1]
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', record):
+            response = self.client.get('/api/posts/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(set(routed), {'default'})
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        """Test authenticated users never get or fill cached lists"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/posts/')
+        self.assertNotIn('X-Cache', response)
+        self.assertEqual(post_list_cache.stats.as_dict()['misses'], 0)
+
+    def test_post_writes_invalidate(self):
+        """Test saves, deletes and bulk writes all drop cached lists"""
+        self.client.get('/api/posts/')
+        self.post.title = 'Renamed post'
+        self.post.save()
+        response = self.client.get('/api/posts/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['title'], 'Renamed post')
+
+        self.client.force_authenticate(user=self.user)
+        created = self.client.post('/api/posts/bulk/', [{'title': 'Bulk', 'content': 'x', 'published': True}],
+                                   format='json').data['created']
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/api/posts/').data['count'], 2)
+
+        self.client.force_authenticate(user=self.user)
+        self.client.patch('/api/posts/bulk/', [{'id': created[0]['id'], 'published': False}], format='json')
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/api/posts/').data['count'], 1)
+
+        self.post.delete()
+        self.assertEqual(self.client.get('/api/posts/').data['count'], 0)
+
+    def test_author_edit_invalidates(self):
+        """Test renaming an author refreshes the cached lists showing them"""
+        self.client.get('/api/posts/')
+        self.user.first_name = 'Ada'
+        self.user.save()
+        response = self.client.get('/api/posts/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['author']['first_name'], 'Ada')
+
+
+class PostDetailCacheTestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(title='Viral post', content='Content', author=self.user, published=True)
+        self.url = f'/api/posts/{self.post.id}/'
+
+    def hold_refresh_lock(self):
+        cache.add(post_detail_cache.make_lock_key(self.post.pk), 'elsewhere')
+
+    def test_hit_runs_no_queries(self):
+        """Test repeated anonymous reads, conditional or not, skip the database"""
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        with self.assertMaxQueries(0):
+            cached = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_edit_serves_stale_while_one_request_refreshes(self):
+        """Test an edit is recomputed by the lock holder while others get the old copy"""
+        self.client.get(self.url)
+        self.post.title = 'Edited'
+        self.post.save()
+
+        self.hold_refresh_lock()
+        with self.assertMaxQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertEqual(response.data['title'], 'Viral post')
+
+        cache.delete(post_detail_cache.make_lock_key(self.post.pk))
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Edited')
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+    # The held lock never frees up, so the miss waits out lock_timeout
+    @mock.patch.object(post_detail_cache, 'lock_timeout', 0.2)
+    def test_unpublish_and_delete_are_immediate(self):
+        """Test hidden or deleted posts are never served stale"""
+        self.client.get(self.url)
+        self.hold_refresh_lock()
+        self.post.published = False
+        self.post.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+        other = Post.objects.create(title='Other', content='Content', author=self.user, published=True)
+        self.client.get(f'/api/posts/{other.id}/')
+        other.delete()
+        self.assertEqual(self.client.get(f'/api/posts/{other.id}/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_author_edit_refreshes_details(self):
+        """Test renaming an author marks their cached posts stale"""
+        self.client.get(self.url)
+        self.user.first_name = 'Ada'
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['author']['first_name'], 'Ada')
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_refreshes_read_from_the_primary(self):
+        """Test misses and refreshes never read a replica that may predate the edit"""
+        routed = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            routed.append(db_for_read(router, model, **hints))
+            return routed[-1]
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', record):
+            self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+            self.post.title = 'Edited'
+            self.post.save()
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['title'], 'Edited')
+        self.assertEqual(set(routed), {'default'})
+
+    def test_bulk_unpublish_is_immediate(self):
+        """Test the bulk update path drops unpublished posts from the cache"""
+        self.client.get(self.url)
+        self.client.force_authenticate(user=self.user)
+        self.client.patch('/api/posts/bulk/', [{'id': self.post.id, 'published': False}], format='json')
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bypassed_requests(self):
+        """Test authenticated and sparse requests are not served from the cache"""
+        self.client.get(self.url)
+        self.assertNotIn('X-Cache', self.client.get(f'{self.url}?fields=title'))
+        self.client.force_authenticate(user=self.user)
+        self.assertNotIn('X-Cache', self.client.get(self.url))
+
+    def test_early_refresh_probability(self):
+        """Test entries are refreshed early more readily the closer they are to going stale"""
+        entry = {'value': None, 'stale_at': time.time() + 10, 'delta': 1.0}
+        with mock.patch('app.shared.cache.random.random', return_value=0.0):
+            self.assertFalse(post_detail_cache.should_refresh(entry))
+        with mock.patch('app.shared.cache.random.random', return_value=1 - 1e-6):
+            self.assertTrue(post_detail_cache.should_refresh(entry))
+        entry['stale_at'] = 0
+        self.assertTrue(post_detail_cache.should_refresh(entry))
+
+    def test_miss_waits_for_the_lock_holder(self):
+        """Test a caller that loses the lock without a stale copy waits, then computes"""
+        single_flight = SingleFlightCache('test:single-flight', 'POST_DETAIL_CACHE_ALIAS', 'POST_DETAIL_CACHE_TIMEOUT')
+        single_flight.lock_timeout = 0.2
+        cache.add(single_flight.make_lock_key('key'), 'elsewhere')
+        self.assertEqual(single_flight.get_or_set('key', lambda: 'computed'), ('computed', 'MISS'))
+        self.assertEqual(single_flight.get_or_set('key', lambda: 'again'), ('computed', 'HIT'))
+
+    def test_failed_compute_releases_waiters(self):
+        """Test waiters stop waiting as soon as a lock holder fails without an entry"""
+        single_flight = SingleFlightCache('test:single-flight', 'POST_DETAIL_CACHE_ALIAS', 'POST_DETAIL_CACHE_TIMEOUT')
+        computing = threading.Event()
+
+        def missing():
+            computing.set()
+            time.sleep(0.1)
+            raise Http404
+
+        def hold():
+            with self.assertRaises(Http404):
+                single_flight.get_or_set('missing', missing)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        computing.wait()
+        start = time.monotonic()
+        with self.assertRaises(Http404):
+            single_flight.get_or_set('missing', missing)
+        holder.join()
+        self.assertLess(time.monotonic() - start, 1)
+
+
+class PostSearchTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.title_match = Post.objects.create(
+            title='Django tips',
+            content='Some notes about web frameworks.',
+            author=self.user,
+            published=True
+        )
+        self.content_match = Post.objects.create(
+            title='Weekly update',
+            content='This week we upgraded Django and fixed bugs.',
+            author=self.user,
+            published=True
+        )
+        Post.objects.create(
+            title='Unrelated',
+            content='Nothing to see here.',
+            author=self.user,
+            published=True
+        )
+
+    def test_search_ranks_title_matches_first(self):
+        """Test search returns matching posts ordered by relevance"""
+        response = self.client.get('/api/posts/?search=django')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [self.title_match.id, self.content_match.id])
+        self.assertIn('<mark>Django</mark>', response.data['results'][1]['search_headline'])
+        self.assertGreater(response.data['results'][0]['search_rank'], 0)
+
+    def test_search_matches_prefixes_and_all_terms(self):
+        """Test terms match as prefixes and every term must match"""
+        response = self.client.get('/api/posts/?search=upgrad djan')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.content_match.id])
+
+    def test_search_vector_follows_updates(self):
+        """Test edited content is searchable"""
+        self.content_match.content = 'Now about Postgres instead.'
+        self.content_match.save()
+        response = self.client.get('/api/posts/?search=postgres')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.content_match.id])
+
+    def test_list_without_search_has_no_search_fields(self):
+        """Test search annotations are only included in search results"""
+        response = self.client.get('/api/posts/')
+        self.assertNotIn('search_rank', response.data['results'][0])
+
+
+class PostConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(
+            title='Test Post',
+            content='Test content',
+            author=self.user,
+            published=True
+        )
+        self.url = f'/api/posts/{self.post.id}/'
+
+    def test_detail_if_none_match_returns_304_from_one_query(self):
+        """Test a matching ETag is answered from the updated_at query alone"""
+        # Anonymous reads are answered by the detail cache
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_if_modified_since(self):
+        """Test If-Modified-Since returns 304 until the post changes"""
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_changes_on_update(self):
+        """Test editing a post invalidates its ETag"""
+        etag = self.client.get(self.url)['ETag']
+        self.post.content = 'Edited'
+        self.post.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['content'], 'Edited')
+
+    def test_detail_conditional_respects_visibility(self):
+        """Test conditional requests for hidden drafts still return 404"""
+        draft = Post.objects.create(title='Draft', content='x', author=self.user)
+        response = self.client.get(f'/api/posts/{draft.id}/', HTTP_IF_NONE_MATCH='"anything"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_etag_changes_when_posts_change(self):
+        """Test the list ETag covers inserts into the result set"""
+        etag = self.client.get('/api/posts/')['ETag']
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Post.objects.create(title='Another', content='x', author=self.user, published=True)
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_list_validation_never_scans_the_result_set(self):
+        """Test list ETags come from the page, with no COUNT/MAX aggregate in either mode"""
+        self.client.force_authenticate(user=self.user)
+        for url in ('/api/posts/', '/api/posts/?cursor='):
+            etag = self.client.get(url)['ETag']
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertFalse(any('MAX(' in query['sql'] for query in queries), url)
+            self.assertFalse(any('COUNT(' in query['sql'] and 'LIMIT' not in query['sql'] for query in queries), url)
+
+
+class PostBulkTestCase(APITestCase):
+    url = '/api/posts/bulk/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test valid items are created and invalid ones reported by index"""
+        Post.objects.create(title='Import', content='x', author=self.user)
+        data = [
+            {'title': 'Import', 'content': 'one'},
+            {'content': 'missing title'},
+            {'title': 'Import', 'content': 'two', 'published': True},
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([post['slug'] for post in response.data['created']], ['import-1', 'import-2'])
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertIn('title', response.data['errors'][0]['errors'])
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 3)
+
+    def test_bulk_create_rejects_non_list(self):
+        """Test the payload must be a list"""
+        response = self.client.post(self.url, {'title': 'x', 'content': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update_only_own_posts(self):
+        """Test bulk update changes own posts and reports others as not found"""
+        mine = Post.objects.create(title='Mine', content='x', author=self.user)
+        theirs = Post.objects.create(title='Theirs', content='x', author=self.other)
+        data = [
+            {'id': mine.id, 'published': True},
+            {'id': theirs.id, 'published': True},
+            {'id': mine.id, 'title': ''},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+
+        mine.refresh_from_db()
+        theirs.refresh_from_db()
+        self.assertTrue(mine.published)
+        self.assertGreater(mine.updated_at, mine.created_at)
+        self.assertFalse(theirs.published)
+
+    def test_bulk_update_rejects_bool_and_repeated_ids(self):
+        """Test JSON booleans are not taken for ids and a repeated id is applied once"""
+        first = Post.objects.create(title='First', content='x', author=self.user)
+        data = [
+            {'id': True, 'title': 'Bool'},
+            {'id': first.id, 'title': 'Renamed'},
+            {'id': first.id, 'title': 'Again'},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['errors'], [
+            {'index': 0, 'errors': {'id': ['Not found.']}},
+            {'index': 2, 'errors': {'id': ['Duplicate id in this batch.']}},
+        ])
+        self.assertEqual([post['title'] for post in response.data['updated']], ['Renamed'])
+        first.refresh_from_db()
+        self.assertEqual(first.title, 'Renamed')
+
+    def test_bulk_requires_authentication(self):
+        """Test unauthenticated users cannot use the bulk endpoint"""
+        self.client.force_authenticate(user=None)
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PostExportTestCase(APITestCase):
+    url = '/api/posts/export/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.published = Post.objects.create(
+            title='Django tips',
+            content='Content, with "quotes"',
+            author=self.user,
+            published=True
+        )
+        self.draft = Post.objects.create(
+            title='Draft',
+            content='Draft content',
+            author=self.user
+        )
+
+    def _lines(self, response):
+        return b''.join(response.streaming_content).decode('utf-8').splitlines()
+
+    def test_ndjson_export_respects_visibility(self):
+        """Test anonymous exports only contain published posts"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self._lines(response)]
+        self.assertEqual([row['id'] for row in rows], [self.published.id])
+        self.assertEqual(rows[0]['author_username'], 'testuser')
+
+    def test_csv_export_with_filters(self):
+        """Test CSV exports accept the list view filters"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'output': 'csv', 'published': 'false'})
+        rows = list(csv.DictReader(self._lines(response)))
+        self.assertEqual([int(row['id']) for row in rows], [self.draft.id])
+
+    def test_invalid_output_format(self):
+        """Test an unknown output format is rejected"""
+        response = self.client.get(self.url, {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(ASYNC_READ_VIEWS=True)
+    @mock.patch.object(PostExportView, 'export_chunk_size', 1)
+    def test_async_export_streams(self):
+        """Test exports under ASGI stream from an async iterator, one chunk per batch of rows"""
+        Post.objects.create(title='More tips', content='Content', author=self.user, published=True)
+        response = self.client.get(self.url, {'output': 'csv'})
+        self.assertTrue(response.is_async)
+
+        async def consume():
+            return [chunk async for chunk in response.streaming_content]
+
+        chunks = async_to_sync(consume)()
+        self.assertEqual(len(chunks), 2)
+        rows = list(csv.DictReader(b''.join(chunks).decode('utf-8').splitlines()))
+        self.assertEqual({row['title'] for row in rows}, {'Django tips', 'More tips'})
+
+    def test_export_command(self):
+        """Test the export_content command writes the same export"""
+        out = io.StringIO()
+        call_command('export_content', 'posts', '--output-format', 'csv', '--query', 'search=django', stdout=out)
+        rows = list(csv.DictReader(out.getvalue().splitlines()))
+        self.assertEqual([row['title'] for row in rows], ['Django tips'])
+
+
+class PostFastSerializationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            first_name='Test',
+        )
+        for i in range(3):
+            Post.objects.create(
+                title=f'Django post {i}',
+                content='Content about Django',
+                author=self.user,
+                published=True
+            )
+        Post.objects.create(title='Draft', content='Draft content', author=self.user)
+
+    def _render_both(self, queryset):
+        values_queryset, serialize_rows = values_serializer_for(PostListSerializer).bind(queryset)
+        renderer = JSONRenderer()
+        return (
+            renderer.render(PostListSerializer(queryset, many=True).data),
+            renderer.render(serialize_rows(values_queryset)),
+        )
+
+    def test_values_output_is_byte_identical(self):
+        """Test the values() path renders exactly like the DRF serializer"""
+        expected, actual = self._render_both(Post.objects.select_related('author'))
+        self.assertEqual(actual, expected)
+
+    def test_values_output_includes_search_annotations(self):
+        """Test annotated search fields are serialized like DRF does"""
+        request = APIRequestFactory().get('/', {'search': 'django'})
+        queryset = FullTextSearchFilter().filter_queryset(
+            Request(request), Post.objects.select_related('author'), PostListCreateView()
+        )
+        expected, actual = self._render_both(queryset)
+        self.assertEqual(actual, expected)
+        self.assertIn(b'search_headline', actual)
+
+    def test_list_endpoint_uses_values_path(self):
+        """Test list responses match serializing model instances"""
+        response = self.client.get('/api/posts/?ordering=title')
+        expected = PostListSerializer(
+            Post.objects.filter(published=True).order_by('title')[:10], many=True
+        ).data
+        self.assertEqual(response.json()['results'], json.loads(JSONRenderer().render(expected)))
+
+    def test_benchmark_command(self):
+        """Test the benchmark command compares both paths"""
+        out = io.StringIO()
+        call_command('benchmark_serializers', 'posts', '--repeat', '1', stdout=out)
+        self.assertIn('speedup', out.getvalue())
+
+
+class PostVisibilityIndexTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Plans are checked with the planner's default settings, so the
+        # table needs realistic rows: 2000 posts of about 1 kB from 20
+        # authors, 90% published. testuser has 100 of them, 10 drafts.
+        authors = User.objects.bulk_create([User(username=f'author{i}') for i in range(20)])
+        cls.user = authors[0]
+        Post.objects.bulk_create([
+            Post(
+                title=f'Post {i}',
+                slug=f'post-{i}',
+                content='word ' * 200,
+                author=authors[i % 20],
+                published=i // 20 % 10 != 0
+            )
+            for i in range(2000)
+        ])
+        cls.analyze()
+
+    @staticmethod
+    def analyze():
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE posts_post')
+
+    def test_visible_to_anonymous_scans_published_index(self):
+        """Test anonymous lists walk the partial index in list order"""
+        queryset = Post.objects.visible_to(AnonymousUser())
+        self.assertEqual(queryset.count(), 1800)
+        plan = queryset[:10].explain()
+        self.assertIn('Index Scan using posts_post_published_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_visible_to_user_list_walks_ordering_index(self):
+        """Test the ordered, limited list of published OR own posts stops early on the ordering index"""
+        plan = Post.objects.visible_to(self.user)[:10].explain()
+        self.assertIn('Limit', plan)
+        self.assertIn('Index Scan using posts_post_created_', plan)
+        self.assertIn(f'Filter: (published OR ((author_id = {self.user.pk}) AND (NOT published)))', plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_visible_to_user_count_combines_both_indexes(self):
+        """Test the unordered count of published OR own drafts is a BitmapOr over both indexes"""
+        queryset = Post.objects.visible_to(self.user)
+        self.assertEqual(queryset.count(), 1810)
+        # With most rows visible a sequential scan is cheaper. The indexes
+        # pay off once visible rows are a small share of the table.
+        Post.objects.update(published=Case(When(published=True, then=False), default=True))
+        self.analyze()
+        self.assertEqual(queryset.count(), 290)
+        # Counts drop the ordering, as the paginator's count query does
+        plan = queryset.order_by().explain()
+        self.assertIn('BitmapOr', plan)
+        self.assertIn('posts_post_published_idx', plan)
+        self.assertIn('Bitmap Index Scan on posts_post_author', plan)
+
+    def test_own_posts_scan_author_index(self):
+        """Test an author's posts are read in list order from one index"""
+        plan = Post.objects.filter(author=self.user)[:10].explain()
+        self.assertIn('Index Scan using posts_post_author_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+
+class PostSparseFieldsetTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(
+            title='Test Post',
+            content='Long content',
+            author=self.user,
+            published=True
+        )
+
+    def _selects(self, queries, column):
+        return any(f'"posts_post"."{column}"' in query['sql'].split(' FROM ')[0] for query in queries)
+
+    def test_list_fields_and_omit(self):
+        """Test fields and omit shrink list items"""
+        response = self.client.get('/api/posts/', {'fields': 'id,title,author'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'title', 'author'])
+        response = self.client.get('/api/posts/', {'fields': 'id,title,author', 'omit': 'author'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'title'])
+
+    def test_unknown_fields_are_rejected(self):
+        """Test unknown field names are a 400"""
+        response = self.client.get('/api/posts/', {'fields': 'title,content', 'omit': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('content', str(response.data['fields']))
+        self.assertIn('bogus', str(response.data['omit']))
+
+    def test_list_does_not_select_content(self):
+        """Test list queries leave out the content and search columns"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/posts/')
+        self.assertTrue(self._selects(queries, 'title'))
+        self.assertFalse(self._selects(queries, 'content'))
+        self.assertFalse(self._selects(queries, 'search_vector'))
+
+    def test_detail_fields_prune_columns(self):
+        """Test detail fields turn into .only() on the queryset"""
+        url = f'/api/posts/{self.post.id}/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'title'})
+        self.assertEqual(response.data, {'title': 'Test Post'})
+        self.assertFalse(self._selects(queries, 'content'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.data['content'], 'Long content')
+        self.assertFalse(self._selects(queries, 'search_vector'))
+
+    def test_fields_are_ignored_on_writes(self):
+        """Test sparse parameters only apply to reads"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.patch(f'/api/posts/{self.post.id}/?fields=bogus', {'title': 'New'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class PostSummaryTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+
+    def test_summary_is_computed_on_save(self):
+        """Test excerpt, word count and reading time follow the content"""
+        post = Post.objects.create(
+            title='Long read',
+            content='<p>' + 'word ' * 450 + '</p>',
+            author=self.user,
+            published=True
+        )
+        self.assertEqual((post.word_count, post.reading_time), (450, 3))
+        self.assertTrue(post.excerpt.startswith('word word'))
+        self.assertTrue(post.excerpt.endswith('…'))
+        self.assertLessEqual(len(post.excerpt), 281)
+
+        post.content = 'Short now'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual((post.excerpt, post.word_count, post.reading_time), ('Short now', 2, 1))
+
+    def test_summary_in_list_and_bulk_writes(self):
+        """Test bulk writes fill the summary shown in lists"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/posts/bulk/', [
+            {'title': 'Bulk', 'content': 'one two three', 'published': True}
+        ], format='json')
+        post_id = response.data['created'][0]['id']
+        response = self.client.get('/api/posts/')
+        item = response.data['results'][0]
+        self.assertEqual((item['excerpt'], item['word_count'], item['reading_time']), ('one two three', 3, 1))
+
+        self.client.patch('/api/posts/bulk/', [{'id': post_id, 'content': 'four'}], format='json')
+        self.assertEqual(Post.objects.get(pk=post_id).word_count, 1)
+
+    def test_backfill_command_is_resumable(self):
+        """Test the backfill fills rows without a summary and can be rerun"""
+        post = Post.objects.create(title='Old', content='legacy content here', author=self.user)
+        Post.objects.filter(pk=post.pk).update(excerpt='', word_count=None, reading_time=None)
+        updated_at = Post.objects.get(pk=post.pk).updated_at
+
+        out = io.StringIO()
+        call_command('backfill_summaries', 'posts', '--batch-size', '1', stdout=out)
+        self.assertIn('posts: filled in 1 rows', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual((post.excerpt, post.word_count), ('legacy content here', 3))
+        self.assertGreater(post.updated_at, updated_at)
+
+        out = io.StringIO()
+        call_command('backfill_summaries', stdout=out)
+        self.assertIn('posts: filled in 0 rows', out.getvalue())
+
+    def test_backfill_refreshes_validators_and_caches(self):
+        """Test backfilled summaries reach clients holding validators and cached payloads"""
+        cache.clear()
+        post = Post.objects.create(title='Old', content='legacy content here', author=self.user, published=True)
+        Post.objects.filter(pk=post.pk).update(excerpt='', word_count=None, reading_time=None)
+        url = f'/api/posts/{post.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.client.get('/api/posts/')
+
+        call_command('backfill_summaries', 'posts', stdout=io.StringIO())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['word_count'], 3)
+        response = self.client.get('/api/posts/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['excerpt'], 'legacy content here')
+
+
+class PostQueryBudgetTestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        Post.objects.bulk_create([
+            Post(title=f'Post {i}', slug=f'post-{i}', content='Content', author=self.user, published=i % 3 > 0)
+            for i in range(15)
+        ])
+        self.post = Post.objects.filter(published=True).first()
+
+    def _authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_list_budgets(self):
+        """Test list reads: a count and one page of rows"""
+        with self.assertMaxQueries(2):
+            self.client.get('/api/posts/')
+        with self.assertMaxQueries(1):
+            self.client.get('/api/posts/?cursor=')
+        with self.assertMaxQueries(2):
+            self.client.get('/api/posts/?search=post')
+        self._authenticate()
+        with self.assertMaxQueries(3):
+            self.client.get('/api/posts/')
+        with self.assertMaxQueries(2):
+            self.client.get('/api/posts/my-posts/')
+
+    def test_detail_budget(self):
+        """Test a detail read is a single query"""
+        with self.assertMaxQueries(1):
+            self.client.get(f'/api/posts/{self.post.id}/')
+
+    def test_write_budgets(self):
+        """Test writes do not grow with the batch size"""
+        self._authenticate()
+        with self.assertMaxQueries(6):
+            self.client.post('/api/posts/', {'title': 'New', 'content': 'Body'}, format='json')
+        with self.assertMaxQueries(2):
+            self.client.patch(f'/api/posts/{self.post.id}/', {'title': 'Renamed'}, format='json')
+        for size in (5, 50):
+            with self.assertMaxQueries(6):
+                self.client.post('/api/posts/bulk/', [{'title': 'Bulk', 'content': 'Body'}] * size, format='json')
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_server_timing_header(self):
+        """Test responses report the query count and database time"""
+        response = self.client.get('/api/posts/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="2 queries", total;dur=[\d.]+$')
+
+    @override_settings(SERVER_TIMING_HEADER=False, SLOW_REQUEST_QUERY_COUNT=1)
+    def test_server_timing_header_is_opt_in(self):
+        """Test timings are not sent to clients without SERVER_TIMING_HEADER, but still logged"""
+        with self.assertLogs('app.shared.middleware', 'WARNING'):
+            response = self.client.get('/api/posts/')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SLOW_REQUEST_QUERY_COUNT=1)
+    def test_query_storm_is_logged(self):
+        """Test requests over the query threshold log their slowest statements"""
+        with self.assertLogs('app.shared.middleware', 'WARNING') as logs:
+            self.client.get('/api/posts/')
+        self.assertIn('Slow request GET /api/posts/ (200)', logs.output[0])
+        self.assertIn('2 queries', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+class BenchmarkCommandTestCase(TestCase):
+    def test_seed_data_bulk_creates_content(self):
+        """Test seeding creates users, posts and pages with summaries and slugs"""
+        out = io.StringIO()
+        call_command('seed_data', '--users', '3', '--posts', '25', '--pages', '4',
+                     '--batch-size', '10', stdout=out)
+        self.assertIn('Seeded 3 users, 25 posts and 4 pages', out.getvalue())
+        self.assertEqual(User.objects.filter(username__startswith='seed_user_').count(), 3)
+        self.assertEqual(Post.objects.count(), 25)
+        self.assertFalse(Post.objects.filter(slug='').exists())
+        self.assertFalse(Post.objects.filter(word_count__isnull=True).exists())
+        self.assertTrue(User.objects.get(username='seed_user_0').check_password('benchmark'))
+
+        call_command('seed_data', '--users', '1', '--posts', '0', '--pages', '0', stdout=io.StringIO())
+        self.assertTrue(User.objects.filter(username='seed_user_3').exists())
+
+    def test_run_benchmark_reports_json(self):
+        """Test the benchmark runs each scenario and reports latency and queries"""
+        cache.clear()
+        call_command('seed_data', '--users', '2', '--posts', '20', '--pages', '3',
+                     '--published-ratio', '1', stdout=io.StringIO())
+        out = io.StringIO()
+        # Slow-request logging is not under test; keep it out of the output
+        with override_settings(SLOW_REQUEST_MS=60000):
+            call_command('run_benchmark', '--requests', '3', '--warmup', '0', stdout=out)
+        report = json.loads(out.getvalue())['scenarios']
+        self.assertEqual(set(report), {'list', 'detail', 'search', 'navigation', 'login', 'my-posts'})
+        for name, result in report.items():
+            self.assertEqual(result['errors'], 0, name)
+            self.assertEqual(result['requests'], 3)
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_request'):
+                self.assertIn(key, result)
+        self.assertGreater(report['list']['queries_per_request'], 0)
+        # Anonymous list requests after the first are served from the cache
+        self.assertEqual(report['list']['cache_hit_rate'], 0.667)
+        self.assertIn('cache_hit_rate', report['detail'])
+        self.assertNotIn('cache_hit_rate', report['my-posts'])
+
+
+class PostAsyncReadViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        for index in range(12):
+            Post.objects.create(
+                title=f'Django tips {index}',
+                content=f'Content about django number {index}',
+                author=self.user if index % 2 else self.other,
+                published=index % 3 != 0
+            )
+        self.list_views = (
+            PostListCreateView.as_view(),
+            AsyncReadView.as_view(view_class=PostListCreateView, action='list'),
+        )
+        self.detail_views = (
+            PostRetrieveUpdateDestroyView.as_view(),
+            AsyncReadView.as_view(view_class=PostRetrieveUpdateDestroyView, action='retrieve'),
+        )
+
+    def fetch(self, view, path, authenticated=False, method='get', headers=None, data=None, **kwargs):
+        headers = dict(headers or {})
+        if authenticated:
+            headers['Authorization'] = f'Token {self.token.key}'
+        if data is None:
+            request = getattr(self.factory, method)(path, headers=headers)
+        else:
+            request = getattr(self.factory, method)(path, data, content_type='application/json', headers=headers)
+        if iscoroutinefunction(view):
+            response = async_to_sync(view)(request, **kwargs)
+        else:
+            response = view(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def assertSameResponse(self, views, path, **kwargs):
+        sync_response, async_response = (self.fetch(view, path, **kwargs) for view in views)
+        self.assertEqual(async_response.status_code, sync_response.status_code, path)
+        self.assertEqual(async_response.content, sync_response.content, path)
+        self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'), path)
+        return async_response
+
+    def test_async_list_uses_the_cache(self):
+        """Test anonymous async lists are cached and invalidated like sync ones"""
+        view = self.list_views[1]
+        self.assertEqual(self.fetch(view, '/api/posts/')['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.fetch(view, '/api/posts/')['X-Cache'], 'HIT')
+        self.assertNotIn('X-Cache', self.fetch(view, '/api/posts/', authenticated=True))
+        Post.objects.filter(published=True).first().delete()
+        self.assertEqual(self.fetch(view, '/api/posts/')['X-Cache'], 'MISS')
+
+    def test_async_detail_uses_the_cache(self):
+        """Test anonymous async details are served by the single-flight cache"""
+        view = self.detail_views[1]
+        post = Post.objects.filter(published=True).first()
+        self.assertEqual(self.fetch(view, f'/api/posts/{post.pk}/', pk=post.pk)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.fetch(view, f'/api/posts/{post.pk}/', pk=post.pk)['X-Cache'], 'HIT')
+        post.delete()
+        self.assertEqual(self.fetch(view, f'/api/posts/{post.pk}/', pk=post.pk).status_code, 404)
+
+    def test_list_matches_sync_view(self):
+        """Test the async list answers exactly like the sync one"""
+        paths = [
+            '/api/posts/', '/api/posts/?page=2', '/api/posts/?page=last', '/api/posts/?page=9',
+            '/api/posts/?search=django', '/api/posts/?ordering=title', '/api/posts/?published=false',
+            f'/api/posts/?author={self.other.pk}', '/api/posts/?author=999999',
+            '/api/posts/?fields=id,title', '/api/posts/?omit=bogus', '/api/posts/?cursor=',
+            '/api/posts/?cursor=bogus',
+        ]
+        for path in paths:
+            for authenticated in (False, True):
+                self.assertSameResponse(self.list_views, path, authenticated=authenticated)
+
+        first = self.fetch(self.list_views[1], '/api/posts/?cursor=&ordering=title')
+        self.assertSameResponse(self.list_views, json.loads(first.content)['next'])
+
+    def test_list_visibility(self):
+        """Test anonymous users only get published posts and authors also get their drafts"""
+        anonymous = json.loads(self.fetch(self.list_views[1], '/api/posts/').content)
+        authenticated = json.loads(self.fetch(self.list_views[1], '/api/posts/', authenticated=True).content)
+        self.assertEqual(anonymous['count'], Post.objects.filter(published=True).count())
+        self.assertEqual(authenticated['count'], Post.objects.visible_to(self.user).count())
+
+    def test_detail_matches_sync_view(self):
+        """Test the async detail answers exactly like the sync one, including 404s and 304s"""
+        published = Post.objects.filter(published=True, author=self.other).first()
+        own_draft = Post.objects.filter(published=False, author=self.user).first()
+        other_draft = Post.objects.filter(published=False, author=self.other).first()
+        for post, authenticated in ((published, False), (own_draft, True), (own_draft, False), (other_draft, True)):
+            self.assertSameResponse(self.detail_views, f'/api/posts/{post.pk}/',
+                                    authenticated=authenticated, pk=post.pk)
+
+        response = self.assertSameResponse(self.detail_views, f'/api/posts/{published.pk}/?fields=id',
+                                           pk=published.pk)
+        self.assertEqual(json.loads(response.content), {'id': published.pk})
+        not_modified = self.assertSameResponse(
+            self.detail_views, f'/api/posts/{published.pk}/', pk=published.pk,
+            headers={'If-None-Match': response['ETag']},
+        )
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag(self):
+        """Test the async list honours If-None-Match"""
+        response = self.fetch(self.list_views[1], '/api/posts/')
+        response = self.fetch(self.list_views[1], '/api/posts/', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_query_instrumentation_counts_async_queries(self):
+        """Test the instrumentation middleware also wraps async views"""
+        middleware = QueryInstrumentationMiddleware(self.list_views[1])
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(self.factory.get('/api/posts/'))
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+    def test_writes_use_sync_view(self):
+        """Test writes are delegated to the DRF view, with its permissions"""
+        response = self.fetch(self.list_views[1], '/api/posts/', method='post',
+                              data={'title': 'Nope', 'content': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.fetch(self.list_views[1], '/api/posts/', authenticated=True, method='post',
+                              data={'title': 'Async', 'content': 'Created', 'published': True})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Post.objects.filter(title='Async', author=self.user).exists())
+
+        post = Post.objects.filter(author=self.other, published=True).first()
+        response = self.fetch(self.detail_views[1], f'/api/posts/{post.pk}/', authenticated=True,
+                              method='delete', pk=post.pk)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BenchmarkConcurrencyTestCase(TransactionTestCase):
+    def test_run_benchmark_compares_sync_and_async_views(self):
+        """Test --concurrency reports sync and async results for the read scenarios"""
+        call_command('seed_data', '--users', '1', '--posts', '5', '--pages', '2',
+                     '--published-ratio', '1', stdout=io.StringIO())
+        out = io.StringIO()
+        with override_settings(SLOW_REQUEST_MS=60000):
+            call_command('run_benchmark', '--requests', '4', '--warmup', '0', '--concurrency', '2',
+                         '--scenario', 'detail', '--scenario', 'login', '--scenario', 'navigation', stdout=out)
+        comparison = json.loads(out.getvalue())['concurrency']
+        self.assertEqual(comparison['concurrency'], 2)
+        self.assertEqual(set(comparison['scenarios']), {'detail', 'navigation'})
+        for name, modes in comparison['scenarios'].items():
+            self.assertEqual(set(modes), {'sync', 'async'})
+            for mode, result in modes.items():
+                self.assertEqual((result['requests'], result['errors']), (4, 0), f'{name} {mode}')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRoutingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+
+    def route(self, method='get', write=False, headers=None):
+        """Return the alias a read would use while handling the request"""
+        seen = []
+
+        def get_response(request):
+            if write:
+                self.router.db_for_write(Post)
+            seen.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(get_response)(self.factory.generic(method.upper(), '/', headers=headers or {}))
+        return seen[0]
+
+    def test_safe_requests_read_from_replica(self):
+        """Test GETs read from a replica and writes from the primary"""
+        self.assertEqual(self.route('get'), 'replica_0')
+        self.assertEqual(self.route('head'), 'replica_0')
+        self.assertEqual(self.route('post'), 'default')
+        self.assertEqual(self.route('get', write=True), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_reads_outside_requests_use_primary(self):
+        """Test commands and tasks, and token lookups, always read from the primary"""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica_0')
+            self.assertEqual(self.router.db_for_read(Token), 'default')
+
+    def test_client_sticks_to_primary_after_write(self):
+        """Test a client that wrote reads from the primary until the window ends"""
+        author = {'Authorization': 'Token author'}
+        self.assertEqual(self.route('get', headers=author), 'replica_0')
+        self.route('post', write=True, headers=author)
+        self.assertEqual(self.route('get', headers=author), 'default')
+        self.assertEqual(self.route('get', headers={'Authorization': 'Token reader'}), 'replica_0')
+        self.assertEqual(self.route('get'), 'replica_0')
+
+        cache.clear()
+        self.assertEqual(self.route('get', headers=author), 'replica_0')
+
+    def test_failed_writes_are_not_sticky(self):
+        """Test a rejected unsafe request does not pin the client to the primary"""
+        self.route('post', headers={'Authorization': 'Token author'})
+        self.assertEqual(self.route('get', headers={'Authorization': 'Token author'}), 'replica_0')
+
+    @override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+    def test_request_reads_from_one_replica(self):
+        """Test every read of a request goes to the same replica"""
+        for _ in range(20):
+            with replica_reads():
+                aliases = {self.router.db_for_read(Post) for _ in range(10)}
+            self.assertEqual(len(aliases), 1)
+            self.assertIn(aliases.pop(), {'replica_0', 'replica_1'})
+
+
+@skipUnless('replica_0' in settings.DATABASES, 'Set POSTGRES_REPLICA_HOSTS to test against a replica')
+class ReplicaIntegrationTestCase(APITestCase):
+    databases = {'default', *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+
+    def test_author_sees_new_draft(self):
+        """Test lists read from the replica, and an author reads their writes from the primary"""
+        with CaptureQueriesContext(connections['replica_0']) as replica_queries:
+            self.client.get('/api/posts/')
+        self.assertTrue(replica_queries)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.post('/api/posts/', {'title': 'Draft', 'content': 'New'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with CaptureQueriesContext(connections['replica_0']) as replica_queries:
+            response = self.client.get('/api/posts/my-posts/')
+        self.assertFalse(replica_queries)
+        self.assertEqual([post['title'] for post in response.data['results']], ['Draft'])
@@ -1,14 +1,28 @@
+from django.conf import settings
 from django.urls import path
+from app.shared.async_views import AsyncReadView
 from .views import (
     PostListCreateView,
     PostRetrieveUpdateDestroyView,
-    MyPostsListView
+    MyPostsListView,
+    PostBulkView,
+    PostExportView
 )
 
 app_name = 'posts'
 
+list_create_view = PostListCreateView.as_view()
+detail_view = PostRetrieveUpdateDestroyView.as_view()
+
+# Under ASGI, reads go through the async ORM; writes still use the DRF views
+if settings.ASYNC_READ_VIEWS:
+    list_create_view = AsyncReadView.as_view(view_class=PostListCreateView, action='list')
+    detail_view = AsyncReadView.as_view(view_class=PostRetrieveUpdateDestroyView, action='retrieve')
+
 urlpatterns = [
-    path('', PostListCreateView.as_view(), name='post-list-create'),
+    path('', list_create_view, name='post-list-create'),
     path('my-posts/', MyPostsListView.as_view(), name='my-posts'),
-    path('<int:pk>/', PostRetrieveUpdateDestroyView.as_view(), name='post-detail'),
+    path('bulk/', PostBulkView.as_view(), name='post-bulk'),
+    path('export/', PostExportView.as_view(), name='post-export'),
+    path('<int:pk>/', detail_view, name='post-detail'),
 ]
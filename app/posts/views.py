@@ -1,7 +1,20 @@
-from rest_framework import generics, permissions, filters
-from rest_framework.exceptions import PermissionDenied
+from rest_framework import generics, permissions, filters, serializers, status
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import F
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view, inline_serializer
+from app.shared.async_views import AsyncReadMixin
+from app.shared.cache import AnonymousDetailCacheMixin, AnonymousListCacheMixin
+from app.shared.conditional import ConditionalListMixin, ConditionalRetrieveMixin
+from app.shared.export import StreamingExportMixin
+from app.shared.fast_serializers import FastListMixin
+from app.shared.fieldsets import SparseFieldsetMixin
+from app.shared.pagination import PageNumberOrCursorPagination
+from app.shared.search import FullTextSearchFilter
+from .cache import post_detail_cache, post_list_cache
 from .models import Post
 from .serializers import (
     PostListSerializer,
@@ -14,19 +27,22 @@ from .permissions import IsAuthorOrReadOnly
 @extend_schema_view(
     get=extend_schema(
         summary="List all blog posts",
-        description="Get a paginated list of blog posts. Public users see only published posts. Authors can see their own drafts."
+        description="Get a paginated list of blog posts. Public users see only published posts. Authors can see their own drafts. Pass `cursor=` to switch to cursor pagination."
     ),
     post=extend_schema(
         summary="Create a new blog post",
         description="Create a new blog post. Requires authentication."
     )
 )
-class PostListCreateView(generics.ListCreateAPIView):
+class PostListCreateView(AnonymousListCacheMixin, ConditionalListMixin, FastListMixin, SparseFieldsetMixin,
+                         AsyncReadMixin, generics.ListCreateAPIView):
     """
     List all blog posts or create a new post
     """
+    list_cache = post_list_cache
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = PageNumberOrCursorPagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['published', 'author']
     search_fields = ['title', 'content']
     ordering_fields = ['created_at', 'updated_at', 'title']
@@ -36,16 +52,7 @@ class PostListCreateView(generics.ListCreateAPIView):
         Return published posts for anonymous users,
         but allow authenticated users to see their own drafts
         """
-        queryset = Post.objects.select_related('author')
-
-        if self.request.user.is_authenticated:
-            # Authenticated users see all published posts + their own posts
-            return queryset.filter(
-                models.Q(published=True) | models.Q(author=self.request.user)
-            )
-        else:
-            # Anonymous users only see published posts
-            return queryset.filter(published=True)
+        return Post.objects.select_related('author').visible_to(self.request.user)
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -74,10 +81,12 @@ class PostListCreateView(generics.ListCreateAPIView):
         description="Delete a blog post. Only the author can delete their posts."
     )
 )
-class PostRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class PostRetrieveUpdateDestroyView(AnonymousDetailCacheMixin, ConditionalRetrieveMixin, SparseFieldsetMixin,
+                                    AsyncReadMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a blog post
     """
+    detail_cache = post_detail_cache
     queryset = Post.objects.select_related('author')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
 
@@ -90,30 +99,140 @@ class PostRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         """
         Allow users to view published posts or their own posts
         """
-        queryset = super().get_queryset()
-
-        if self.request.user.is_authenticated:
-            return queryset.filter(
-                models.Q(published=True) | models.Q(author=self.request.user)
-            )
-        else:
-            return queryset.filter(published=True)
+        return super().get_queryset().visible_to(self.request.user)
 
 
 @extend_schema(
     summary="List user's own posts",
-    description="Get all posts created by the authenticated user"
+    description="Get all posts created by the authenticated user. Pass `cursor=` to switch to cursor pagination."
 )
-class MyPostsListView(generics.ListAPIView):
+class MyPostsListView(ConditionalListMixin, FastListMixin, SparseFieldsetMixin, generics.ListAPIView):
     """
     List all posts by the authenticated user
     """
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PageNumberOrCursorPagination
 
     def get_queryset(self):
         return Post.objects.filter(author=self.request.user).select_related('author')
 
 
-# Import models for Q queries
-from django.db import models
+@extend_schema(
+    summary="Export blog posts",
+    description="Stream every blog post visible to the caller as NDJSON (default) or CSV. "
+                "Accepts the same filter, search and ordering parameters as the list endpoint.",
+    parameters=[
+        OpenApiParameter('output', str, enum=['ndjson', 'csv'], description='Export format'),
+    ],
+    responses={(200, 'application/x-ndjson'): OpenApiTypes.STR, (200, 'text/csv'): OpenApiTypes.STR}
+)
+class PostExportView(StreamingExportMixin, PostListCreateView):
+    """
+    Stream blog posts as NDJSON or CSV
+    """
+    http_method_names = ['get', 'head', 'options']
+    list_cache = None
+    export_fields = ('id', 'title', 'slug', 'content', 'published', 'author_id', 'created_at', 'updated_at')
+    export_expressions = {'author_username': F('author__username')}
+    export_filename = 'posts'
+
+
+@extend_schema_view(
+    post=extend_schema(
+        summary="Bulk create blog posts",
+        description="Create up to 1000 posts in one request. Valid items are saved in one transaction; "
+                    "invalid items are reported by their index in `errors` without failing the batch.",
+        request=PostCreateUpdateSerializer(many=True),
+        responses={201: inline_serializer('PostBulkCreateResponse', {
+            'created': PostListSerializer(many=True),
+            'errors': serializers.ListField(child=serializers.DictField()),
+        })}
+    ),
+    patch=extend_schema(
+        summary="Bulk update blog posts",
+        description="Partially update up to 1000 of your own posts. Each item must include its `id`. "
+                    "Only the first item for each id is applied. "
+                    "Invalid items are reported by their index in `errors` without failing the batch.",
+        request=PostCreateUpdateSerializer(many=True),
+        responses={200: inline_serializer('PostBulkUpdateResponse', {
+            'updated': PostListSerializer(many=True),
+            'errors': serializers.ListField(child=serializers.DictField()),
+        })}
+    )
+)
+class PostBulkView(generics.GenericAPIView):
+    """
+    Create or update many blog posts at once
+    """
+    serializer_class = PostCreateUpdateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 1000
+
+    def get_queryset(self):
+        return Post.objects.filter(author=self.request.user)
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data, many=True, max_length=self.max_batch_size)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            posts = serializer.save(author=request.user)
+
+        errors = self.format_errors(serializer.item_errors, range(len(request.data)))
+        return Response({
+            'created': PostListSerializer(posts, many=True).data,
+            'errors': errors,
+        }, status=status.HTTP_201_CREATED if posts or not errors else status.HTTP_400_BAD_REQUEST)
+
+    def patch(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of items.']})
+        if len(items) > self.max_batch_size:
+            raise ValidationError({'non_field_errors': [
+                f'Ensure this field has no more than {self.max_batch_size} elements.'
+            ]})
+
+        # JSON true/false arrive as bools, which are ints too
+        ids = [
+            item.get('id') if isinstance(item, dict) and type(item.get('id')) is int else None
+            for item in items
+        ]
+        posts = self.get_queryset().in_bulk([pk for pk in ids if pk is not None])
+
+        # Items whose id is missing, repeated or not one of the user's posts never reach the serializer
+        errors = {}
+        found = []
+        seen = set()
+        for index, pk in enumerate(ids):
+            if pk in seen:
+                errors[index] = {'id': ['Duplicate id in this batch.']}
+            elif pk is not None and pk in posts:
+                found.append(index)
+                seen.add(pk)
+            else:
+                errors[index] = {'id': ['Not found.']}
+
+        serializer = self.get_serializer(
+            [posts[ids[index]] for index in found],
+            data=[items[index] for index in found],
+            many=True,
+            partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            updated = serializer.save()
+
+        for position, item_errors in serializer.item_errors.items():
+            errors[found[position]] = item_errors
+        errors = self.format_errors(errors, range(len(items)))
+        return Response({
+            'updated': PostListSerializer(updated, many=True).data,
+            'errors': errors,
+        }, status=status.HTTP_200_OK if updated or not errors else status.HTTP_400_BAD_REQUEST)
+
+    def format_errors(self, errors, indexes):
+        return [{'index': index, 'errors': errors[index]} for index in indexes if index in errors]
+
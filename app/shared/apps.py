@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SharedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app.shared'
+
+    def ready(self):
+        from . import task_metrics  # noqa: F401
@@ -0,0 +1,111 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+
+class AsyncReadMixin:
+    """
+    Async twins of the GenericAPIView read helpers, for AsyncReadView.
+
+    Filter backends can query the database (django-filter validates
+    `?author=` against the users table), so filter_queryset() runs in a
+    thread. Everything after that goes through the async ORM.
+    """
+
+    async def afilter_queryset(self, queryset):
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            # The same cases as DRF's get_object_or_404()
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        if hasattr(self.paginator, 'apaginate_queryset'):
+            return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        return await sync_to_async(self.paginator.paginate_queryset)(queryset, self.request, view=self)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        rows = [obj async for obj in queryset.aiterator()]
+        return Response(self.get_serializer(rows, many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAPIView(View):
+    """
+    Run a DRF view's request cycle from async code.
+
+    For the methods in `async_methods`, the DRF view is set up exactly as
+    APIView.dispatch() would, and its initial() runs content negotiation,
+    authentication, permission and throttle checks. Then handle() builds
+    the response, errors go through the view's own exception handling,
+    and the response is finalized by the view.
+
+    Any other method is handed to the DRF view unchanged. CSRF is left to
+    DRF's SessionAuthentication, as it is for APIView.
+    """
+    view_class = None
+    async_methods = ()
+    # dispatch() serves every method, so there are no handlers to inspect
+    view_is_async = True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Schema generators document the DRF view in its place
+        view.cls = initkwargs.get('view_class', cls.view_class)
+        view.initkwargs = {}
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.async_methods:
+            return await sync_to_async(self.view_class.as_view())(request, *args, **kwargs)
+        view = self.view_class()
+        view.setup(request, *args, **kwargs)
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        view.headers = view.default_response_headers
+        try:
+            await sync_to_async(view.initial)(request, *args, **kwargs)
+            response = await self.handle(view, request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        view.response = view.finalize_response(request, response, *args, **kwargs)
+        return view.response
+
+    async def handle(self, view, request, *args, **kwargs):
+        raise NotImplementedError
+
+
+class AsyncReadView(AsyncAPIView):
+    """
+    Serve GET and HEAD for a DRF view from async code.
+
+    The view's `a<action>` method (`alist` or `aretrieve`) builds the
+    response.
+    """
+    async_methods = ('GET', 'HEAD')
+    action = 'list'
+
+    async def handle(self, view, request, *args, **kwargs):
+        return await getattr(view, f'a{self.action}')(request, *args, **kwargs)
@@ -0,0 +1,195 @@
+import asyncio
+import statistics
+import time
+from contextlib import ExitStack
+from urllib.parse import urlsplit
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.db import connections
+from django.test import AsyncRequestFactory, Client
+from django.urls import resolve
+
+from .async_views import AsyncReadView
+from .middleware import QueryRecorder
+
+SEED_USER_PREFIX = 'seed_user_'
+SEED_PASSWORD = 'benchmark'
+
+# Vocabulary for seeded content; search scenarios pick terms from it too
+WORDS = (
+    'api', 'async', 'backend', 'benchmark', 'browser', 'cache', 'celery', 'cluster',
+    'container', 'cursor', 'database', 'deploy', 'django', 'docker', 'endpoint', 'feature',
+    'framework', 'frontend', 'index', 'latency', 'migration', 'model', 'monitoring', 'network',
+    'pagination', 'performance', 'pipeline', 'postgres', 'python', 'query', 'queue', 'redis',
+    'release', 'replica', 'request', 'response', 'schema', 'search', 'serializer', 'server',
+    'session', 'signal', 'storage', 'template', 'testing', 'thread', 'throughput', 'token',
+    'transaction', 'tuning', 'upgrade', 'view', 'worker', 'workflow',
+)
+
+
+class BenchmarkContext:
+    """
+    Data the scenarios draw on: a seeded user and some post ids.
+    """
+
+    def __init__(self, rng, username, password, token, post_ids):
+        self.rng = rng
+        self.username = username
+        self.password = password
+        self.token = token
+        self.post_ids = post_ids
+
+
+class Scenario:
+    """
+    One kind of request: method, path and body are built per request.
+    """
+
+    def __init__(self, method, path, data=None, authenticated=False):
+        self.method = method
+        self.path = path
+        self.data = data
+        self.authenticated = authenticated
+
+    def request_kwargs(self, context):
+        path = self.path(context) if callable(self.path) else self.path
+        kwargs = {'path': path}
+        if self.data is not None:
+            kwargs['data'] = self.data(context)
+            kwargs['content_type'] = 'application/json'
+        if self.authenticated:
+            kwargs['HTTP_AUTHORIZATION'] = f'Token {context.token}'
+        return kwargs
+
+
+SCENARIOS = {
+    'list': Scenario('get', '/api/posts/'),
+    'detail': Scenario('get', lambda ctx: f'/api/posts/{ctx.rng.choice(ctx.post_ids)}/'),
+    'search': Scenario('get', lambda ctx: f'/api/posts/?search={ctx.rng.choice(WORDS)}'),
+    'navigation': Scenario('get', '/api/pages/navigation/'),
+    'login': Scenario(
+        'post', '/api/auth/login/',
+        data=lambda ctx: {'username': ctx.username, 'password': ctx.password},
+    ),
+    'my-posts': Scenario('get', '/api/posts/my-posts/', authenticated=True),
+}
+
+# Scenarios served by views that have an async version (AsyncReadView)
+ASYNC_SCENARIOS = ('list', 'detail', 'search', 'navigation')
+
+
+def percentile_summary(latencies):
+    """
+    Return p50/p95/p99 and mean of `latencies` (seconds) in milliseconds.
+    """
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        'p50_ms': round(p50 * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+        'p99_ms': round(p99 * 1000, 3),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+def run_scenario(scenario, context, requests, warmup=0, client=None):
+    """
+    Send `requests` requests for `scenario` through the test client, one at
+    a time, and return latency percentiles, throughput and queries per
+    request, plus the hit rate of responses that report `X-Cache`.
+    Warm-up requests are not measured.
+    """
+    client = client or Client(raise_request_exception=False)
+    send = getattr(client, scenario.method)
+    for _ in range(warmup):
+        send(**scenario.request_kwargs(context))
+
+    recorder = QueryRecorder(keep_slowest=0)
+    latencies = []
+    errors = 0
+    cache_hits = cache_lookups = 0
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        started = time.perf_counter()
+        for _ in range(requests):
+            kwargs = scenario.request_kwargs(context)
+            start = time.perf_counter()
+            response = send(**kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            if response.has_header('X-Cache'):
+                cache_lookups += 1
+                cache_hits += response['X-Cache'] != 'MISS'
+        elapsed = time.perf_counter() - started
+
+    result = {
+        'requests': requests,
+        'errors': errors,
+        **percentile_summary(latencies),
+        'throughput_rps': round(requests / elapsed, 2) if elapsed else 0.0,
+        'queries_per_request': round(recorder.count / requests, 2) if requests else 0.0,
+    }
+    if cache_lookups:
+        result['cache_hit_rate'] = round(cache_hits / cache_lookups, 3)
+    return result
+
+
+def resolve_views(path):
+    """
+    Return the sync DRF view and its AsyncReadView for `path`, plus the
+    URL kwargs.
+    """
+    match = resolve(urlsplit(path).path)
+    view_class = match.func.cls
+    action = 'retrieve' if view_class.lookup_field in match.kwargs else 'list'
+    return (
+        sync_to_async(view_class.as_view()),
+        AsyncReadView.as_view(view_class=view_class, action=action),
+        match.kwargs,
+    )
+
+
+def run_concurrent(scenario, context, requests, concurrency, use_async):
+    """
+    Send `requests` anonymous GETs for `scenario`, `concurrency` at a time,
+    to either the sync view (run in a thread, as under ASGI) or its async
+    version, and return latency percentiles and throughput.
+
+    The views are called directly, without middleware. Each request gets
+    its own ThreadSensitiveContext and closes its database connections
+    afterwards, as Django's ASGI handler does.
+    """
+    factory = AsyncRequestFactory()
+
+    async def send(semaphore, latencies):
+        path = scenario.request_kwargs(context)['path']
+        sync_view, async_view, kwargs = resolve_views(path)
+        view = async_view if use_async else sync_view
+        async with semaphore, ThreadSensitiveContext():
+            start = time.perf_counter()
+            response = await view(factory.get(path), **kwargs)
+            if hasattr(response, 'render'):
+                await sync_to_async(response.render)()
+            latencies.append(time.perf_counter() - start)
+            await sync_to_async(connections.close_all)()
+        return response.status_code
+
+    async def drive():
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(send(semaphore, latencies) for _ in range(requests)))
+        return statuses, latencies, time.perf_counter() - started
+
+    statuses, latencies, elapsed = asyncio.run(drive())
+    return {
+        'requests': requests,
+        'errors': sum(1 for code in statuses if code >= 400),
+        **percentile_summary(latencies),
+        'throughput_rps': round(requests / elapsed, 2) if elapsed else 0.0,
+    }
@@ -0,0 +1,447 @@
+import asyncio
+import hashlib
+import math
+import random
+import time
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from app.shared.conditional import check_conditional, set_validators, timestamp_etag
+from app.shared.routers import replica_reads
+
+
+class CacheStats:
+    """
+    In-process hit/miss counters for a cache layer.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+class GenerationalCache:
+    """
+    A cache namespace that is invalidated by bumping a generation counter.
+
+    Every key embeds the current generation, so invalidation is a single
+    write and old entries simply expire instead of being scanned for.
+    The cache alias and timeout are read from settings on each call so
+    tests can override them.
+    """
+
+    def __init__(self, namespace, alias_setting, timeout_setting, default_timeout=300):
+        self.namespace = namespace
+        self.alias_setting = alias_setting
+        self.timeout_setting = timeout_setting
+        self.default_timeout = default_timeout
+        self.stats = CacheStats()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, self.alias_setting, 'default')]
+
+    @property
+    def timeout(self):
+        return getattr(settings, self.timeout_setting, self.default_timeout)
+
+    @property
+    def generation_key(self):
+        return f'{self.namespace}:generation'
+
+    def generation(self):
+        generation = self.cache.get(self.generation_key)
+        if generation is None:
+            # Start from a fresh value rather than 1 so an evicted counter
+            # can never bring back entries cached under an old generation.
+            self.cache.add(self.generation_key, time.time_ns(), timeout=None)
+            generation = self.cache.get(self.generation_key)
+        return generation
+
+    async def ageneration(self):
+        generation = await self.cache.aget(self.generation_key)
+        if generation is None:
+            await self.cache.aadd(self.generation_key, time.time_ns(), timeout=None)
+            generation = await self.cache.aget(self.generation_key)
+        return generation
+
+    def make_key(self, key, generation=None):
+        if generation is None:
+            generation = self.generation()
+        return f'{self.namespace}:{generation}:{key}'
+
+    # Pass the `generation` read before loading the data to get() and
+    # set(), so data loaded before an invalidation is never stored under
+    # the generation that follows it.
+
+    def get(self, key, generation=None):
+        value = self.cache.get(self.make_key(key, generation))
+        self.stats.record(value is not None)
+        return value
+
+    async def aget(self, key, generation=None):
+        if generation is None:
+            generation = await self.ageneration()
+        value = await self.cache.aget(self.make_key(key, generation))
+        self.stats.record(value is not None)
+        return value
+
+    def set(self, key, value, generation=None):
+        self.cache.set(self.make_key(key, generation), value, self.timeout)
+
+    async def aset(self, key, value, generation=None):
+        if generation is None:
+            generation = await self.ageneration()
+        await self.cache.aset(self.make_key(key, generation), value, self.timeout)
+
+    def bump(self):
+        try:
+            self.cache.incr(self.generation_key)
+        except ValueError:
+            self.cache.add(self.generation_key, time.time_ns(), timeout=None)
+
+    def invalidate(self):
+        """
+        Bump the generation now and again once the current transaction
+        commits. The second bump drops anything a concurrent request cached
+        from data read before the commit.
+        """
+        self.bump()
+        transaction.on_commit(self.bump)
+
+
+class SingleFlightCache:
+    """
+    A per-key cache where only one caller at a time recomputes an entry.
+
+    Each entry records when it goes stale (`timeout` seconds after it was
+    computed) and how long computing it took. A caller refreshes it early
+    with a probability that rises as staleness nears, weighted by that
+    compute time ("XFetch"), so a hot key is usually refreshed before it
+    goes stale. The refresh runs under a short `cache.add()` lock. Callers
+    that lose the lock keep serving the old entry. With no entry at all,
+    they wait up to `lock_timeout` for the winner, then compute anyway.
+    A winner that stores nothing (its compute() raised, e.g. Http404)
+    frees the lock, and the next waiter to take it computes at once.
+    Entries are kept `stale_timeout` seconds past staleness so that there
+    is something to serve meanwhile.
+
+    expire() marks entries stale without dropping them, for edits that
+    may be served late. delete() drops them, for content that must
+    disappear at once. Both apply again when the current transaction
+    commits, like GenerationalCache.invalidate().
+    """
+    stale_timeout = 60
+    lock_timeout = 5
+    wait_interval = 0.05
+    beta = 1.0
+
+    def __init__(self, namespace, alias_setting, timeout_setting, default_timeout=300):
+        self.namespace = namespace
+        self.alias_setting = alias_setting
+        self.timeout_setting = timeout_setting
+        self.default_timeout = default_timeout
+        self.stats = CacheStats()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, self.alias_setting, 'default')]
+
+    @property
+    def timeout(self):
+        return getattr(settings, self.timeout_setting, self.default_timeout)
+
+    def make_key(self, key):
+        return f'{self.namespace}:{key}'
+
+    def make_lock_key(self, key):
+        return f'{self.namespace}:lock:{key}'
+
+    def make_entry(self, value, delta):
+        return {'value': value, 'stale_at': time.time() + self.timeout, 'delta': delta}
+
+    def should_refresh(self, entry):
+        # 1 - random() lies in (0, 1], so the log is finite and <= 0
+        early = entry['delta'] * self.beta * -math.log(1 - random.random())
+        return time.time() + early >= entry['stale_at']
+
+    def compute(self, cache_key, compute):
+        start = time.perf_counter()
+        value = compute()
+        entry = self.make_entry(value, time.perf_counter() - start)
+        self.cache.set(cache_key, entry, self.timeout + self.stale_timeout)
+        return value
+
+    async def acompute(self, cache_key, compute):
+        start = time.perf_counter()
+        value = await compute()
+        entry = self.make_entry(value, time.perf_counter() - start)
+        await self.cache.aset(cache_key, entry, self.timeout + self.stale_timeout)
+        return value
+
+    def compute_locked(self, cache_key, lock_key, token, compute):
+        self.stats.record(False)
+        try:
+            return self.compute(cache_key, compute)
+        finally:
+            # Leave the lock alone if it expired and someone else took it
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+    async def acompute_locked(self, cache_key, lock_key, token, compute):
+        self.stats.record(False)
+        try:
+            return await self.acompute(cache_key, compute)
+        finally:
+            if await self.cache.aget(lock_key) == token:
+                await self.cache.adelete(lock_key)
+
+    def get_or_set(self, key, compute):
+        """
+        Return `(value, status)`, where status is 'HIT', 'STALE' or 'MISS'
+        and `compute()` produced the value on a miss.
+        """
+        cache_key = self.make_key(key)
+        entry = self.cache.get(cache_key)
+        if entry is not None and not self.should_refresh(entry):
+            self.stats.record(True)
+            return entry['value'], 'HIT'
+
+        lock_key = self.make_lock_key(key)
+        token = uuid.uuid4().hex
+        if self.cache.add(lock_key, token, self.lock_timeout):
+            return self.compute_locked(cache_key, lock_key, token, compute), 'MISS'
+
+        if entry is not None:
+            self.stats.record(True)
+            return entry['value'], 'STALE'
+
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.wait_interval)
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                self.stats.record(True)
+                return entry['value'], 'HIT'
+            # The holder let go without storing an entry
+            if self.cache.add(lock_key, token, self.lock_timeout):
+                return self.compute_locked(cache_key, lock_key, token, compute), 'MISS'
+        self.stats.record(False)
+        return self.compute(cache_key, compute), 'MISS'
+
+    async def aget_or_set(self, key, compute):
+        """
+        get_or_set() for async callers; `compute` is a coroutine function.
+        """
+        cache_key = self.make_key(key)
+        entry = await self.cache.aget(cache_key)
+        if entry is not None and not self.should_refresh(entry):
+            self.stats.record(True)
+            return entry['value'], 'HIT'
+
+        lock_key = self.make_lock_key(key)
+        token = uuid.uuid4().hex
+        if await self.cache.aadd(lock_key, token, self.lock_timeout):
+            return await self.acompute_locked(cache_key, lock_key, token, compute), 'MISS'
+
+        if entry is not None:
+            self.stats.record(True)
+            return entry['value'], 'STALE'
+
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.wait_interval)
+            entry = await self.cache.aget(cache_key)
+            if entry is not None:
+                self.stats.record(True)
+                return entry['value'], 'HIT'
+            if await self.cache.aadd(lock_key, token, self.lock_timeout):
+                return await self.acompute_locked(cache_key, lock_key, token, compute), 'MISS'
+        self.stats.record(False)
+        return await self.acompute(cache_key, compute), 'MISS'
+
+    def mark_stale(self, keys):
+        entries = self.cache.get_many([self.make_key(key) for key in keys])
+        for entry in entries.values():
+            entry['stale_at'] = 0
+        self.cache.set_many(entries, self.stale_timeout)
+
+    def drop(self, keys):
+        self.cache.delete_many([self.make_key(key) for key in keys])
+
+    def expire(self, *keys):
+        """
+        Mark the entries for `keys` stale, now and on commit.
+        """
+        self.mark_stale(keys)
+        transaction.on_commit(lambda: self.mark_stale(keys))
+
+    def delete(self, *keys):
+        """
+        Drop the entries for `keys`, now and on commit.
+        """
+        self.drop(keys)
+        transaction.on_commit(lambda: self.drop(keys))
+
+
+class AnonymousListCacheMixin:
+    """
+    Cache whole list responses for anonymous GET and HEAD requests.
+
+    Entries live in `list_cache`, a GenerationalCache that is bumped
+    whenever the listed rows change. They are keyed on the host and the
+    query parameters in sorted order, so `?page=2&search=x` and
+    `?search=x&page=2` share an entry. The response's ETag is cached
+    with it, so a hit can still answer 304. Responses carry `X-Cache:
+    HIT` or `MISS`, and `list_cache.stats` counts hits and misses.
+    Authenticated users can see their own drafts and always bypass the
+    cache. Misses are filled from the primary: a lagging replica would
+    otherwise store pre-invalidation rows under the new generation.
+    """
+    list_cache = None
+
+    def use_list_cache(self, request):
+        return (
+            self.list_cache is not None
+            and request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+        )
+
+    def get_list_cache_key(self, request):
+        params = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+        url = f'{request.scheme}://{request.get_host()}?{urlencode(params)}'
+        return hashlib.md5(url.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+    def make_list_cache_entry(self, response):
+        if response.status_code != 200:
+            return None
+        return {'data': response.data, 'etag': response.get('ETag')}
+
+    def cached_list_response(self, request, entry):
+        response = check_conditional(request, entry['etag']) or set_validators(Response(entry['data']), entry['etag'])
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_list_cache(request):
+            return super().list(request, *args, **kwargs)
+
+        key = self.get_list_cache_key(request)
+        generation = self.list_cache.generation()
+        entry = self.list_cache.get(key, generation)
+        if entry is not None:
+            return self.cached_list_response(request, entry)
+
+        with replica_reads(False):
+            response = super().list(request, *args, **kwargs)
+        entry = self.make_list_cache_entry(response)
+        if entry is not None:
+            self.list_cache.set(key, entry, generation)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        if not self.use_list_cache(request):
+            return await super().alist(request, *args, **kwargs)
+
+        key = self.get_list_cache_key(request)
+        generation = await self.list_cache.ageneration()
+        entry = await self.list_cache.aget(key, generation)
+        if entry is not None:
+            return self.cached_list_response(request, entry)
+
+        with replica_reads(False):
+            response = await super().alist(request, *args, **kwargs)
+        entry = self.make_list_cache_entry(response)
+        if entry is not None:
+            await self.list_cache.aset(key, entry, generation)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class AnonymousDetailCacheMixin:
+    """
+    Serve anonymous detail GETs from `detail_cache`, a SingleFlightCache
+    keyed on the lookup value.
+
+    Used with ConditionalRetrieveMixin: the entry stores the serialized
+    object with its `last_modified_field`, so a hit answers 304 or 200
+    without touching the database. Responses carry `X-Cache: HIT`,
+    `STALE` or `MISS`. Requests with query parameters (e.g. `?fields=`)
+    and authenticated users, who may be reading their own drafts or
+    fresh edits, go straight to the view. Entries are computed on the
+    primary, since a refresh usually follows an edit that a replica may
+    not have caught up with yet.
+    """
+    detail_cache = None
+
+    def use_detail_cache(self, request):
+        return (
+            self.detail_cache is not None
+            and request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+            and not request.query_params
+        )
+
+    def get_detail_cache_key(self):
+        return self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+
+    def make_detail_cache_entry(self, instance):
+        return {
+            'data': self.get_serializer(instance).data,
+            'last_modified': getattr(instance, self.last_modified_field),
+        }
+
+    def cached_detail_response(self, request, entry, cache_status):
+        last_modified = entry['last_modified']
+        etag = timestamp_etag(last_modified)
+        response = (
+            check_conditional(request, etag, last_modified)
+            or set_validators(Response(entry['data']), etag, last_modified)
+        )
+        response['X-Cache'] = cache_status
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_detail_cache(request):
+            return super().retrieve(request, *args, **kwargs)
+
+        def compute():
+            with replica_reads(False):
+                return self.make_detail_cache_entry(self.get_object())
+
+        entry, cache_status = self.detail_cache.get_or_set(self.get_detail_cache_key(), compute)
+        return self.cached_detail_response(request, entry, cache_status)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        if not self.use_detail_cache(request):
+            return await super().aretrieve(request, *args, **kwargs)
+
+        async def compute():
+            with replica_reads(False):
+                return self.make_detail_cache_entry(await self.aget_object())
+
+        entry, cache_status = await self.detail_cache.aget_or_set(self.get_detail_cache_key(), compute)
+        return self.cached_detail_response(request, entry, cache_status)
@@ -0,0 +1,201 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def make_etag(payload):
+    """
+    Return a quoted ETag derived from a JSON-serializable payload.
+    """
+    body = json.dumps(payload, sort_keys=True, cls=DjangoJSONEncoder)
+    return quote_etag(hashlib.md5(body.encode('utf-8'), usedforsecurity=False).hexdigest())
+
+
+def timestamp_etag(value):
+    """
+    Return a quoted ETag for a datetime, with microsecond precision.
+    """
+    return quote_etag(format(int(value.timestamp()) * 1_000_000 + value.microsecond, 'x'))
+
+
+def has_conditional_headers(request):
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def set_validators(response, etag=None, last_modified=None):
+    """
+    Set ETag / Last-Modified headers. `last_modified` is an aware datetime.
+    """
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(int(last_modified.timestamp()))
+    return response
+
+
+def check_conditional(request, etag=None, last_modified=None):
+    """
+    Return a 304 (or 412) response if the request's preconditions say the
+    client's copy is current, otherwise None.
+    """
+    placeholder = set_validators(HttpResponse(), etag, last_modified)
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None,
+        response=placeholder,
+    )
+    return None if response is placeholder else response
+
+
+def conditional_response(request, response, etag=None, last_modified=None):
+    """
+    Attach validators to `response`, or answer 304 Not Modified instead
+    if they match the request's If-None-Match / If-Modified-Since headers.
+    """
+    return check_conditional(request, etag, last_modified) or set_validators(response, etag, last_modified)
+
+
+class ConditionalRetrieveMixin:
+    """
+    Conditional GET for detail views, validated by `last_modified_field`.
+
+    When the request carries If-None-Match or If-Modified-Since, only the
+    timestamp column is queried, so a 304 never loads or serializes the
+    row. The validator does not cover nested objects such as the author,
+    so renaming an author does not change the post's ETag.
+    """
+    last_modified_field = 'updated_at'
+
+    def get_sparse_columns(self, queryset):
+        # Used with SparseFieldsetMixin: the validators always read the timestamp
+        return [*super().get_sparse_columns(queryset), self.last_modified_field]
+
+    def get_last_modified_queryset(self, queryset):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return (
+            queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values_list(self.last_modified_field, flat=True)
+        )
+
+    def get_last_modified(self):
+        return self.get_last_modified_queryset(self.filter_queryset(self.get_queryset())).first()
+
+    async def aget_last_modified(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        return await self.get_last_modified_queryset(queryset).afirst()
+
+    def retrieve(self, request, *args, **kwargs):
+        if has_conditional_headers(request):
+            last_modified = self.get_last_modified()
+            if last_modified is not None:
+                response = check_conditional(request, timestamp_etag(last_modified), last_modified)
+                if response is not None:
+                    return response
+
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        last_modified = getattr(instance, self.last_modified_field)
+        return set_validators(Response(serializer.data), timestamp_etag(last_modified), last_modified)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        if has_conditional_headers(request):
+            last_modified = await self.aget_last_modified()
+            if last_modified is not None:
+                response = check_conditional(request, timestamp_etag(last_modified), last_modified)
+                if response is not None:
+                    return response
+
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        last_modified = getattr(instance, self.last_modified_field)
+        return set_validators(Response(serializer.data), timestamp_etag(last_modified), last_modified)
+
+
+class ConditionalListMixin:
+    """
+    Conditional GET for list views, validated by the page being returned.
+
+    The ETag combines the primary key and `last_modified_field` of every
+    row on the page with the pagination metadata (count and links), the
+    full request path and the requesting user. Any change that alters the
+    page therefore changes it, yet the rest of the result set is never
+    scanned, which matters once counts are estimated. A 304 still loads
+    the page's rows but skips serializing them. Unpaginated lists are
+    validated by a count and latest-timestamp aggregate instead. No
+    Last-Modified header is sent, because a delete does not move the
+    latest timestamp.
+    """
+    last_modified_field = 'updated_at'
+
+    def get_fast_extra_columns(self):
+        return [*super().get_fast_extra_columns(), self.last_modified_field]
+
+    def get_sparse_columns(self, queryset):
+        return [*super().get_sparse_columns(queryset), self.last_modified_field]
+
+    def make_list_etag(self, validator):
+        return make_etag([validator, self.request.get_full_path(), self.request.user.pk])
+
+    def get_page_validator(self, page, model):
+        pk_name = model._meta.pk.attname
+        if page and isinstance(page[0], dict):
+            rows = [[row[pk_name], row[self.last_modified_field]] for row in page]
+        else:
+            rows = [[getattr(obj, pk_name), getattr(obj, self.last_modified_field)] for obj in page]
+        metadata = self.paginator.get_paginated_response([]).data
+        metadata.pop('results', None)
+        return [metadata, rows]
+
+    def check_page(self, page, queryset):
+        """
+        Set the list ETag from `page`. If the client's copy matches,
+        remember the 304 and hand back an empty page to serialize.
+        """
+        if page is None:
+            return page
+        self.list_etag = self.make_list_etag(self.get_page_validator(page, queryset.model))
+        self.not_modified = check_conditional(self.request, self.list_etag)
+        return [] if self.not_modified is not None else page
+
+    def paginate_queryset(self, queryset):
+        return self.check_page(super().paginate_queryset(queryset), queryset)
+
+    async def apaginate_queryset(self, queryset):
+        return self.check_page(await super().apaginate_queryset(queryset), queryset)
+
+    def get_list_aggregates(self):
+        return {'count': Count('pk'), 'last_modified': Max(self.last_modified_field)}
+
+    def finalize_list(self, response):
+        if self.not_modified is not None:
+            return self.not_modified
+        return set_validators(response, self.list_etag)
+
+    def list(self, request, *args, **kwargs):
+        self.list_etag = self.not_modified = None
+        if self.paginator is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            self.list_etag = self.make_list_etag(queryset.order_by().aggregate(**self.get_list_aggregates()))
+            self.not_modified = check_conditional(request, self.list_etag)
+            if self.not_modified is not None:
+                return self.not_modified
+        return self.finalize_list(super().list(request, *args, **kwargs))
+
+    async def alist(self, request, *args, **kwargs):
+        self.list_etag = self.not_modified = None
+        if self.paginator is None:
+            queryset = await self.afilter_queryset(self.get_queryset())
+            self.list_etag = self.make_list_etag(
+                await queryset.order_by().aaggregate(**self.get_list_aggregates())
+            )
+            self.not_modified = check_conditional(request, self.list_etag)
+            if self.not_modified is not None:
+                return self.not_modified
+        return self.finalize_list(await super().alist(request, *args, **kwargs))
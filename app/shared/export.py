@@ -0,0 +1,125 @@
+import csv
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class _Echo:
+    """
+    File-like object whose write() hands back the line, for csv.writer.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_ndjson(rows, columns):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode({column: row[column] for column in columns}) + '\n'
+
+
+def iter_csv(rows, columns, header=True):
+    writer = csv.writer(_Echo())
+    if header:
+        yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[column]) for column in columns])
+
+
+def iter_export(queryset, columns, output, chunk_size):
+    """
+    Yield the export as text chunks of about `chunk_size` rows each.
+
+    Rows come from a server-side cursor via .iterator(), so memory use
+    does not grow with the size of the table.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    lines = iter_csv(rows, columns) if output == 'csv' else iter_ndjson(rows, columns)
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+async def aiter_export(queryset, columns, output, chunk_size):
+    """
+    iter_export() for ASGI, reading rows with .aiterator().
+
+    Under ASGI, StreamingHttpResponse reads a sync iterator to the end
+    before sending anything, so only an async one keeps memory flat.
+    """
+    header = output == 'csv'
+    rows = []
+
+    def render():
+        lines = iter_csv(rows, columns, header) if output == 'csv' else iter_ndjson(rows, columns)
+        return ''.join(lines)
+
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            yield render()
+            header = False
+            rows = []
+    if rows or header:
+        yield render()
+
+
+class StreamingExportMixin:
+    """
+    Turn a filtered list view's GET into a streaming NDJSON or CSV export.
+
+    The export goes through the view's own get_queryset() and filter
+    backends, so it honours the same visibility rules and query
+    parameters as the list. `export_fields` are plain values() names and
+    `export_expressions` maps extra column names to expressions. With
+    ASYNC_READ_VIEWS (i.e. under ASGI) the body is an async iterator.
+    """
+    export_fields = ()
+    export_expressions = {}
+    export_filename = 'export'
+    export_chunk_size = 2000
+    output_query_param = 'output'
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is not rendered, so accept any Accept header
+        return super().perform_content_negotiation(request, force=True)
+
+    def get_export_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        return queryset.values(*self.export_fields, **self.export_expressions)
+
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get(self.output_query_param, 'ndjson')
+        if output not in EXPORT_CONTENT_TYPES:
+            raise ValidationError({
+                self.output_query_param: [f'Choose one of: {", ".join(EXPORT_CONTENT_TYPES)}.']
+            })
+
+        columns = [*self.export_fields, *self.export_expressions]
+        stream = aiter_export if settings.ASYNC_READ_VIEWS else iter_export
+        response = StreamingHttpResponse(
+            stream(self.get_export_queryset(), columns, output, self.export_chunk_size),
+            content_type=EXPORT_CONTENT_TYPES[output],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.export_filename}.{output}"'
+        return response
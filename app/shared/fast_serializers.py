@@ -0,0 +1,177 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.response import Response
+
+from app.shared.pagination import KeysetCursorPagination
+
+# Fields whose to_representation() returns database values unchanged
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.FloatField,
+    serializers.IntegerField,
+)
+
+UNSUPPORTED_FIELDS = (
+    serializers.ListSerializer,
+    serializers.SerializerMethodField,
+    ManyRelatedField,
+    RelatedField,
+)
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer that works on .values() rows instead of instances.
+
+    The ModelSerializer's fields are inspected once and turned into a flat
+    list of (output name, values() column, converter) getters. Nested
+    serializers become joined columns such as `author__username`.
+    Serializing then skips model instantiation and DRF's per-field
+    attribute lookup, while producing the same output as
+    `serializer_class(instances, many=True).data`.
+
+    Fields that are not model columns (e.g. `search_rank`) are treated as
+    optional annotations: they are output only when the queryset
+    annotates them, just as DRF skips a missing read-only attribute.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.entries = self._compile(serializer_class(), self.model, prefix='')
+
+    def _compile(self, serializer, model, prefix):
+        entries = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, UNSUPPORTED_FIELDS) or field.source == '*' or '.' in field.source:
+                raise ImproperlyConfigured(
+                    f'{type(serializer).__name__}.{name} cannot be serialized from values() rows.'
+                )
+
+            column = prefix + field.source
+            if isinstance(field, serializers.BaseSerializer):
+                related_model = model._meta.get_field(field.source).related_model
+                nested = self._compile(field, related_model, column + '__')
+                entries.append((name, column, nested, True))
+                continue
+
+            try:
+                is_column = model._meta.get_field(field.source).concrete
+            except FieldDoesNotExist:
+                is_column = False
+            if not is_column and prefix:
+                raise ImproperlyConfigured(
+                    f'{type(serializer).__name__}.{name} is not a model column.'
+                )
+            converter = None if isinstance(field, IDENTITY_FIELDS) else field.to_representation
+            entries.append((name, column, converter, is_column))
+        return entries
+
+    def bind(self, queryset, extra_columns=(), fields=None):
+        """
+        Return `(values_queryset, serialize_rows)` for `queryset`.
+
+        `extra_columns` are selected but not output, e.g. for a paginator
+        that needs the ordering field of the last row. `fields` limits the
+        output to those top-level field names.
+        """
+        annotations = set(queryset.query.annotations)
+        entries = [
+            entry for entry in self.entries
+            if (entry[3] or entry[1] in annotations) and (fields is None or entry[0] in fields)
+        ]
+        columns = list(dict.fromkeys([*self._columns(entries), *extra_columns]))
+        serialize_row = self._build(entries)
+
+        def serialize_rows(rows):
+            return [serialize_row(row) for row in rows]
+
+        return queryset.values(*columns), serialize_rows
+
+    def _columns(self, entries):
+        columns = []
+        for name, column, converter, is_column in entries:
+            columns.append(column)
+            if isinstance(converter, list):
+                columns.extend(self._columns(converter))
+        return columns
+
+    def _build(self, entries):
+        getters = []
+        for name, column, converter, is_column in entries:
+            if isinstance(converter, list):
+                getters.append((name, column, self._build(converter), True))
+            else:
+                getters.append((name, column, converter, False))
+
+        def serialize_row(row):
+            item = {}
+            for name, column, converter, nested in getters:
+                value = row[column]
+                if value is None:
+                    item[name] = None
+                elif nested:
+                    item[name] = converter(row)
+                elif converter is None:
+                    item[name] = value
+                else:
+                    item[name] = converter(value)
+            return item
+
+        return serialize_row
+
+
+@lru_cache(maxsize=None)
+def values_serializer_for(serializer_class):
+    return ValuesSerializer(serializer_class)
+
+
+class FastListMixin:
+    """
+    List action that serializes from .values() rows via ValuesSerializer.
+
+    The view's ordering fields and the keyset cursor's ordering and
+    tiebreaker are always selected, so cursor pagination can read them from
+    the last row. A `sparse_fields` entry in the serializer context limits
+    the output fields.
+    """
+
+    def get_fast_extra_columns(self):
+        ordering_fields = getattr(self, 'ordering_fields', None)
+        if not isinstance(ordering_fields, (list, tuple)):
+            ordering_fields = []
+        cursor_ordering = getattr(self, 'cursor_ordering', KeysetCursorPagination.ordering)
+        return [
+            KeysetCursorPagination.tiebreaker,
+            *(field.lstrip('-') for field in cursor_ordering),
+            *ordering_fields,
+        ]
+
+    def bind_fast_serializer(self, queryset):
+        return values_serializer_for(self.get_serializer_class()).bind(
+            queryset,
+            self.get_fast_extra_columns(),
+            fields=self.get_serializer_context().get('sparse_fields'),
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset, serialize_rows = self.bind_fast_serializer(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_rows(page))
+        return Response(serialize_rows(queryset))
+
+    async def alist(self, request, *args, **kwargs):
+        queryset, serialize_rows = self.bind_fast_serializer(await self.afilter_queryset(self.get_queryset()))
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_rows(page))
+        return Response(serialize_rows([row async for row in queryset.aiterator()]))
@@ -0,0 +1,95 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _parse_field_list(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer mixin that keeps only the fields named in the
+    `sparse_fields` context entry, when the view sets one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('sparse_fields')
+        if selected is not None:
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """
+    `?fields=a,b` / `?omit=c` on read requests, plus column pruning.
+
+    The selection is validated against the GET serializer (unknown names
+    are a 400) and handed to it through the serializer context. The
+    queryset is narrowed with .only() to the model columns that the
+    remaining fields read. This also leaves out columns that no field
+    needs, such as `content` on lists and `search_vector` everywhere.
+    """
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def get_sparse_fields(self):
+        """
+        Return the set of selected field names, or None for all fields.
+        """
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = self._parse_sparse_fields()
+        return self._sparse_fields
+
+    def _parse_sparse_fields(self):
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return None
+        fields = _parse_field_list(self.request.query_params.get(self.fields_query_param, ''))
+        omit = _parse_field_list(self.request.query_params.get(self.omit_query_param, ''))
+        if not fields and not omit:
+            return None
+
+        available = set(self.get_serializer_class()().fields)
+        errors = {}
+        for param, names in ((self.fields_query_param, fields), (self.omit_query_param, omit)):
+            unknown = sorted(names - available)
+            if unknown:
+                errors[param] = [f'Unknown field(s): {", ".join(unknown)}.']
+        if errors:
+            raise ValidationError(errors)
+        return (fields or available) - omit
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+        return context
+
+    def get_sparse_columns(self, queryset):
+        """
+        Return the model columns the selected serializer fields read.
+        """
+        model = queryset.model
+        serializer = self.get_serializer_class()(context={'sparse_fields': self.get_sparse_fields()})
+        columns = []
+        for field in serializer.fields.values():
+            if field.write_only or field.source == '*':
+                continue
+            try:
+                model_field = model._meta.get_field(field.source.split('.')[0])
+            except FieldDoesNotExist:
+                # Annotations such as search_rank
+                continue
+            if model_field.concrete:
+                columns.append(model_field.name)
+
+        # Relations followed by select_related() must not be deferred
+        if isinstance(queryset.query.select_related, dict):
+            columns.extend(queryset.query.select_related)
+        return list(dict.fromkeys(columns)) or [model._meta.pk.name]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method in SAFE_METHODS:
+            queryset = queryset.only(*self.get_sparse_columns(queryset))
+        return queryset
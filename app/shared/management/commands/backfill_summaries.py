@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+SUMMARY_MODELS = {
+    'posts': 'app.posts.models.Post',
+    'pages': 'app.pages.models.Page',
+}
+
+# Called with each committed batch's primary keys to refresh cached
+# payloads that show the summary fields
+SUMMARY_CACHE_INVALIDATORS = {
+    'posts': 'app.posts.cache.invalidate_post_summaries',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill in excerpt, word_count and reading_time for rows saved before they existed. '
+        'Rows are processed in primary key order and each batch is committed, so an '
+        'interrupted run picks up where it stopped. Filled rows get a new updated_at, '
+        'so clients holding an old ETag or Last-Modified see the change.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('content', nargs='*', help='posts and/or pages (default: both)')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        names = options['content'] or sorted(SUMMARY_MODELS)
+        unknown = set(names) - set(SUMMARY_MODELS)
+        if unknown:
+            raise CommandError(f'Unknown content: {", ".join(sorted(unknown))}')
+
+        for name in names:
+            model = import_string(SUMMARY_MODELS[name])
+            invalidate = SUMMARY_CACHE_INVALIDATORS.get(name)
+            if invalidate is not None:
+                invalidate = import_string(invalidate)
+            updated = self.backfill(model, options['batch_size'], options['verbosity'], invalidate)
+            self.stdout.write(self.style.SUCCESS(f'{name}: filled in {updated} rows'))
+
+    def backfill(self, model, batch_size, verbosity=1, invalidate=None):
+        pending = model._default_manager.filter(word_count__isnull=True).order_by('pk')
+        updated = 0
+        last_pk = None
+        while True:
+            batch = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+            batch = list(batch.only('pk', model.summary_source_field)[:batch_size])
+            if not batch:
+                return updated
+
+            now = timezone.now()
+            for obj in batch:
+                obj.update_summary()
+                # bulk_update skips auto_now; the validators are built from updated_at
+                obj.updated_at = now
+            with transaction.atomic():
+                # Leaves the search trigger alone, which only fires on title or content
+                model._default_manager.bulk_update(batch, [*model.SUMMARY_FIELDS, 'updated_at'])
+            updated += len(batch)
+            last_pk = batch[-1].pk
+            if invalidate is not None:
+                invalidate([obj.pk for obj in batch])
+            if verbosity > 1:
+                self.stdout.write(f'{model._meta.verbose_name_plural}: {updated} rows, up to pk {last_pk}')
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+
+from app.shared.fast_serializers import values_serializer_for
+
+BENCHMARKS = {
+    'posts': ('app.posts.models.Post', 'app.posts.serializers.PostListSerializer'),
+    'pages': ('app.pages.models.Page', 'app.pages.serializers.PageListSerializer'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare DRF list serialization with the values() fast path on existing rows. '
+        'Both timings include the database query.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('content', choices=sorted(BENCHMARKS))
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per run (default: 1000)')
+        parser.add_argument('--repeat', type=int, default=10, help='Runs per serializer (default: 10)')
+
+    def handle(self, *args, **options):
+        model_path, serializer_path = BENCHMARKS[options['content']]
+        model = import_string(model_path)
+        serializer_class = import_string(serializer_path)
+        queryset = model.objects.select_related('author').order_by('-created_at', '-id')[:options['rows']]
+
+        def drf():
+            return serializer_class(list(queryset), many=True).data
+
+        values_queryset, serialize_rows = values_serializer_for(serializer_class).bind(queryset)
+
+        def fast():
+            return serialize_rows(list(values_queryset))
+
+        renderer = JSONRenderer()
+        expected = renderer.render(drf())
+        if renderer.render(fast()) != expected:
+            raise CommandError('Fast path output differs from the DRF serializer.')
+
+        rows = len(values_queryset)
+        if not rows:
+            raise CommandError(f'No {options["content"]} to serialize; run with some data first.')
+
+        drf_time = self._best_of(drf, options['repeat'])
+        fast_time = self._best_of(fast, options['repeat'])
+        self.stdout.write(f'{rows} {options["content"]}, best of {options["repeat"]} runs')
+        self.stdout.write(f'  DRF serializer: {drf_time * 1000:8.2f} ms')
+        self.stdout.write(f'  values() path:  {fast_time * 1000:8.2f} ms')
+        self.stdout.write(self.style.SUCCESS(f'  speedup:        {drf_time / fast_time:8.2f}x'))
+
+    def _best_of(self, func, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
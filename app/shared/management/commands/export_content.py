@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+EXPORT_VIEWS = {
+    'posts': 'app.posts.views.PostExportView',
+    'pages': 'app.pages.views.PageExportView',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream posts or pages to NDJSON or CSV. Runs the export endpoint in-process, '
+        'so --query accepts the same filters as the list views.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('content', choices=sorted(EXPORT_VIEWS))
+        parser.add_argument('--output-format', choices=['ndjson', 'csv'], default='ndjson')
+        parser.add_argument('--output', default='-', help='File to write, or - for stdout')
+        parser.add_argument(
+            '--query', default='',
+            help='List view query string, e.g. "published=true&search=django&ordering=-created_at"',
+        )
+        parser.add_argument(
+            '--user',
+            help='Export as this username, including their drafts (default: anonymous)',
+        )
+
+    def handle(self, *args, **options):
+        view_class = import_string(EXPORT_VIEWS[options['content']])
+        query = options['query'].lstrip('?')
+        separator = '&' if query else ''
+        request = APIRequestFactory().get(f'/?{query}{separator}output={options["output_format"]}')
+
+        if options['user']:
+            try:
+                force_authenticate(request, user=User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options["user"]}" does not exist')
+
+        response = view_class.as_view()(request)
+        if response.status_code != 200:
+            response.render()
+            raise CommandError(response.content.decode('utf-8'))
+
+        if options['output'] == '-':
+            for chunk in response.streaming_content:
+                self.stdout.write(chunk.decode('utf-8'), ending='')
+            return
+
+        with open(options['output'], 'w', newline='') as out:
+            for chunk in response.streaming_content:
+                out.write(chunk.decode('utf-8'))
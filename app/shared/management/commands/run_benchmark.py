@@ -0,0 +1,92 @@
+import json
+import random
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from app.authentication.tokens import get_or_create_fresh_token
+from app.posts.models import Post
+from app.shared.benchmark import (
+    ASYNC_SCENARIOS,
+    SCENARIOS,
+    SEED_PASSWORD,
+    SEED_USER_PREFIX,
+    BenchmarkContext,
+    run_concurrent,
+    run_scenario,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the API through the real URLconf and middleware and report latency '
+        'percentiles, throughput and queries per request as JSON. Run seed_data first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios', choices=sorted(SCENARIOS),
+            help='Scenario to run; repeat for several (default: all)',
+        )
+        parser.add_argument('--requests', type=int, default=100, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per scenario')
+        parser.add_argument('--username', default=f'{SEED_USER_PREFIX}0')
+        parser.add_argument('--password', default=SEED_PASSWORD)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for request parameters')
+        parser.add_argument(
+            '--concurrency', type=int, default=0,
+            help='Also compare the sync and async read views with this many requests in flight',
+        )
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1.')
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist; run seed_data first.')
+        post_ids = list(Post.objects.published().values_list('pk', flat=True)[:1000])
+        if not post_ids:
+            raise CommandError('No published posts to benchmark; run seed_data first.')
+
+        context = BenchmarkContext(
+            rng=random.Random(options['seed']),
+            username=options['username'],
+            password=options['password'],
+            token=get_or_create_fresh_token(user).key,
+            post_ids=post_ids,
+        )
+        names = options['scenarios'] or list(SCENARIOS)
+        report = {}
+        # The test client sends requests as "testserver"
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name in names:
+                report[name] = run_scenario(SCENARIOS[name], context, options['requests'], options['warmup'])
+
+        result = {'scenarios': report}
+        if options['concurrency'] > 0:
+            result['concurrency'] = self.compare_concurrency(
+                [name for name in names if name in ASYNC_SCENARIOS], context, options,
+            )
+
+        output = json.dumps(result, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Wrote benchmark report to {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def compare_concurrency(self, names, context, options):
+        comparison = {'concurrency': options['concurrency'], 'scenarios': {}}
+        for name in names:
+            comparison['scenarios'][name] = {
+                mode: run_concurrent(
+                    SCENARIOS[name], context, options['requests'], options['concurrency'], use_async,
+                )
+                for mode, use_async in (('sync', False), ('async', True))
+            }
+        return comparison
@@ -0,0 +1,105 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from app.pages.models import Page
+from app.posts.models import Post
+from app.shared.benchmark import SEED_PASSWORD, SEED_USER_PREFIX, WORDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-insert synthetic users, posts and pages for local load testing. '
+        'Seeded users are named seed_user_<n>; running again adds more rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--pages', type=int, default=50)
+        parser.add_argument('--published-ratio', type=float, default=0.8)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data')
+        parser.add_argument('--password', default=SEED_PASSWORD, help='Password for the seeded users')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.published_ratio = options['published_ratio']
+        self.now = timezone.now()
+        self.verbosity = options['verbosity']
+
+        users = self.seed_users(options['users'], options['password'])
+        authors = users or list(User.objects.filter(username__startswith=SEED_USER_PREFIX))
+        if not authors and (options['posts'] or options['pages']):
+            raise CommandError('No seeded users to author content; pass --users.')
+
+        posts = self.seed_content(Post, options['posts'], authors, self.make_post)
+        pages = self.seed_content(Page, options['pages'], authors, self.make_page)
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users, {posts} posts and {pages} pages'
+        ))
+
+    def seed_users(self, count, password):
+        # Hashing is the slow part of creating users, so hash once for all
+        password = make_password(password)
+        start = User.objects.filter(username__startswith=SEED_USER_PREFIX).count()
+        users = [
+            User(
+                username=f'{SEED_USER_PREFIX}{start + i}',
+                email=f'{SEED_USER_PREFIX}{start + i}@example.com',
+                password=password,
+            )
+            for i in range(count)
+        ]
+        return User.objects.bulk_create(users, batch_size=self.batch_size)
+
+    def seed_content(self, model, count, authors, make):
+        created = 0
+        while created < count:
+            objs = [make(self.rng.choice(authors)) for _ in range(min(self.batch_size, count - created))]
+            for obj in objs:
+                obj.update_summary()
+            model.assign_slugs(objs)
+            with transaction.atomic():
+                model.objects.bulk_create(objs)
+                # auto_now_add overrides timestamps on insert; spread them over a year
+                for obj in objs:
+                    obj.created_at = obj.updated_at = self.now - timedelta(
+                        seconds=self.rng.randrange(365 * 24 * 60 * 60)
+                    )
+                model.objects.bulk_update(objs, ['created_at', 'updated_at'])
+            created += len(objs)
+            if self.verbosity > 1:
+                self.stdout.write(f'{model._meta.verbose_name_plural}: {created}/{count}')
+        return created
+
+    def words(self, count):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def paragraphs(self, count):
+        return '\n\n'.join(self.words(self.rng.randint(40, 120)).capitalize() + '.' for _ in range(count))
+
+    def make_post(self, author):
+        return Post(
+            title=self.words(self.rng.randint(3, 8)).capitalize(),
+            content=self.paragraphs(self.rng.randint(2, 10)),
+            author=author,
+            published=self.rng.random() < self.published_ratio,
+        )
+
+    def make_page(self, author):
+        return Page(
+            title=self.words(self.rng.randint(1, 4)).capitalize(),
+            content=self.paragraphs(self.rng.randint(1, 5)),
+            meta_description=self.words(12)[:160],
+            author=author,
+            published=self.rng.random() < self.published_ratio,
+            order=self.rng.randint(0, 100),
+            show_in_navigation=self.rng.random() < 0.2,
+        )
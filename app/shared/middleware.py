@@ -0,0 +1,185 @@
+import hashlib
+import heapq
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .routers import replica_reads, wrote
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """
+    execute_wrapper that counts and times queries, keeping the slowest.
+    """
+
+    def __init__(self, keep_slowest=5):
+        self.count = 0
+        self.duration = 0.0
+        self.keep_slowest = keep_slowest
+        self._slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if self.keep_slowest:
+                # The counter breaks ties so statements are never compared
+                entry = (elapsed, self.count, context['connection'].alias, sql)
+                if len(self._slowest) < self.keep_slowest:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heappushpop(self._slowest, entry)
+
+    @property
+    def slowest(self):
+        """
+        Return `(seconds, alias, sql)` for the slowest statements, slowest first.
+        """
+        return [(elapsed, alias, sql) for elapsed, _, alias, sql in sorted(self._slowest, reverse=True)]
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Count and time every SQL query a request runs, on every database.
+
+    Logs requests above SLOW_REQUEST_QUERY_COUNT queries or
+    SLOW_REQUEST_MS milliseconds with their slowest statements. With
+    SERVER_TIMING_HEADER, responses also carry a `Server-Timing` header
+    with the query count and the database and total time.
+
+    Only queries run on the request's own thread are seen; for async views
+    that is the thread the async ORM hands queries to. Queries that run
+    later, while a streaming response is consumed, are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', True):
+            return self.get_response(request)
+
+        recorder = self.make_recorder()
+        start = time.perf_counter()
+        with self.record_queries(recorder):
+            response = self.get_response(request)
+        return self.process_response(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', True):
+            return await self.get_response(request)
+
+        recorder = self.make_recorder()
+        start = time.perf_counter()
+        # The async ORM runs queries on the thread sync_to_async() uses for
+        # this request, whose connections are not the ones seen from here
+        recording = await sync_to_async(self.record_queries)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.close)()
+        return self.process_response(request, response, recorder, time.perf_counter() - start)
+
+    def make_recorder(self):
+        return QueryRecorder(getattr(settings, 'SLOW_REQUEST_LOG_STATEMENTS', 5))
+
+    def record_queries(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def process_response(self, request, response, recorder, total):
+        if getattr(settings, 'SERVER_TIMING_HEADER', False):
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+                f'total;dur={total * 1000:.1f}'
+            )
+        if (recorder.count > getattr(settings, 'SLOW_REQUEST_QUERY_COUNT', 50)
+                or total * 1000 > getattr(settings, 'SLOW_REQUEST_MS', 500)):
+            self.log_slow_request(request, response, recorder, total)
+        return response
+
+    def log_slow_request(self, request, response, recorder, total):
+        statements = ''.join(
+            f'\n  {elapsed * 1000:.1f} ms [{alias}] {sql}' for elapsed, alias, sql in recorder.slowest
+        )
+        logger.warning(
+            'Slow request %s %s (%s): %.1f ms, %d queries in %.1f ms. Slowest statements:%s',
+            request.method, request.get_full_path(), response.status_code,
+            total * 1000, recorder.count, recorder.duration * 1000, statements,
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let safe requests read from the database replicas (see ReplicaRouter).
+
+    A request that writes makes its client sticky for REPLICA_STICKY_SECONDS:
+    until then the client reads from the primary, so an author sees their
+    new draft despite replication lag. Clients are told apart by a hash of
+    the Authorization header or session cookie; clients with neither are
+    never sticky.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = self.get_sticky_key(request)
+        use_replica = request.method in SAFE_METHODS and not (key and self.cache.get(key))
+        with replica_reads(use_replica):
+            response = self.get_response(request)
+            if key and wrote():
+                self.cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key = self.get_sticky_key(request)
+        use_replica = request.method in SAFE_METHODS and not (key and await self.cache.aget(key))
+        with replica_reads(use_replica):
+            response = await self.get_response(request)
+            if key and wrote():
+                await self.cache.aset(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    @property
+    def cache(self):
+        return caches[settings.REPLICA_STICKY_CACHE_ALIAS]
+
+    def get_sticky_key(self, request):
+        credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not credential:
+            return None
+        return f'db:sticky:{hashlib.sha256(credential.encode()).hexdigest()}'
@@ -1,4 +1,8 @@
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.utils.text import slugify
+
+from .slugs import allocate_slugs
+from .summary import summarize
 
 
 class TimestampMixin(models.Model):
@@ -11,3 +15,110 @@ class TimestampMixin(models.Model):
 
     class Meta:
         abstract = True
+
+
+class ContentSummaryMixin(models.Model):
+    """
+    Abstract base model that stores an excerpt, word count and reading
+    time (in minutes) computed from `summary_source_field` on save.
+
+    `word_count` is NULL until computed, which the backfill_summaries
+    command uses to find rows to fill in. bulk_create()/bulk_update()
+    skip save(), so call update_summary() before them.
+    """
+    SUMMARY_FIELDS = ('excerpt', 'word_count', 'reading_time')
+    summary_source_field = 'content'
+
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(null=True, editable=False)
+    reading_time = models.PositiveSmallIntegerField(null=True, editable=False, help_text="Minutes")
+
+    class Meta:
+        abstract = True
+
+    def update_summary(self):
+        self.excerpt, self.word_count, self.reading_time = summarize(
+            getattr(self, self.summary_source_field)
+        )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.summary_source_field in update_fields:
+            self.update_summary()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.SUMMARY_FIELDS}
+        super().save(*args, **kwargs)
+
+
+class PublishableQuerySet(models.QuerySet):
+    """
+    QuerySet for models with `published` and `author` fields.
+    """
+
+    def published(self):
+        return self.filter(published=True)
+
+    def visible_to(self, user):
+        """
+        Published rows plus the user's own drafts.
+
+        The draft branch repeats `published=False` so each side of the OR
+        matches its own index: the partial index on published rows and the
+        index leading with `author`. Postgres combines the two with a
+        BitmapOr instead of scanning the table.
+        """
+        if not user.is_authenticated:
+            return self.published()
+        return self.filter(models.Q(published=True) | models.Q(published=False, author=user))
+
+
+class UniqueSlugMixin(models.Model):
+    """
+    Abstract base model that fills a blank unique `slug` field
+    from `slug_source_field` on save.
+
+    The next free suffix is found with a single query. If a concurrent
+    insert takes the slug first, the save is retried with a fresh one.
+    """
+    slug_source_field = 'title'
+    slug_max_attempts = 5
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.slug:
+            super().save(*args, **kwargs)
+            return
+
+        model = type(self)
+        base = slugify(getattr(self, self.slug_source_field))
+        using = kwargs.get('using') or router.db_for_write(model, instance=self)
+        for attempt in range(self.slug_max_attempts):
+            self.slug = allocate_slugs(model._default_manager.using(using), [base])[0]
+            try:
+                with transaction.atomic(using=using):
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                taken = model._default_manager.using(using).filter(slug=self.slug).exists()
+                self.slug = ''
+                if not taken or attempt == self.slug_max_attempts - 1:
+                    raise
+
+    @classmethod
+    def assign_slugs(cls, objs, using=None):
+        """
+        Fill in blank slugs for unsaved instances, e.g. before bulk_create().
+
+        Bulk inserts cannot be retried per row, so callers should be ready
+        to call this again if the insert hits the unique constraint.
+        """
+        pending = [obj for obj in objs if not obj.slug]
+        if not pending:
+            return objs
+        manager = cls._default_manager.using(using or router.db_for_write(cls))
+        bases = [slugify(getattr(obj, obj.slug_source_field)) for obj in pending]
+        for obj, slug in zip(pending, allocate_slugs(manager, bases)):
+            obj.slug = slug
+        return objs
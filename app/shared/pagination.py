@@ -0,0 +1,379 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+KeysetCursor = namedtuple('KeysetCursor', ['values', 'pk', 'reverse'])
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for `queryset`, read from EXPLAIN.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class LookaheadPage(Page):
+    """
+    Page fetched with one row past its end, which decides has_next().
+
+    Used when the paginator's count is an estimate: num_pages may then
+    end before the real last page. The rows are read and trimmed on
+    first use, so async callers can replace `object_list` with the
+    fetched rows before that.
+    """
+    loaded = False
+
+    def load(self):
+        if not self.loaded:
+            rows = list(self.object_list)
+            self.more = len(rows) > self.paginator.per_page
+            self.object_list = rows[:self.paginator.per_page]
+            self.loaded = True
+
+    def __len__(self):
+        self.load()
+        return super().__len__()
+
+    def __getitem__(self, index):
+        self.load()
+        return super().__getitem__(index)
+
+    def has_next(self):
+        self.load()
+        return self.more
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that counts exactly up to PAGINATION_EXACT_COUNT_LIMIT rows
+    and uses the planner's estimate beyond that.
+
+    The exact count reads at most limit + 1 rows, so it costs the same on
+    any table size. Only when it hits the limit is the estimate used;
+    `count_approximate` is then True. Since the estimate can be short,
+    pages past it are still served rather than rejected, and each page
+    reads one extra row to tell whether another follows. A limit of 0
+    turns estimates off.
+    """
+    count_approximate = False
+
+    @property
+    def exact_count_limit(self):
+        return settings.PAGINATION_EXACT_COUNT_LIMIT
+
+    @property
+    def estimates(self):
+        return (
+            self.exact_count_limit > 0
+            and isinstance(self.object_list, QuerySet)
+            and connections[self.object_list.db].vendor == 'postgresql'
+        )
+
+    def get_limited_queryset(self):
+        return self.object_list.order_by().values('pk')[:self.exact_count_limit + 1]
+
+    def use_estimate(self, estimate):
+        self.count_approximate = True
+        return max(estimate, self.exact_count_limit + 1)
+
+    @cached_property
+    def count(self):
+        if not self.estimates:
+            return super().count
+        count = self.get_limited_queryset().count()
+        if count > self.exact_count_limit:
+            count = self.use_estimate(estimate_count(self.object_list))
+        return count
+
+    async def acount(self):
+        """
+        Work out `count` through the async ORM, so that the paginator
+        never queries by itself afterwards.
+        """
+        if self.estimates:
+            count = await self.get_limited_queryset().acount()
+            if count > self.exact_count_limit:
+                count = self.use_estimate(await sync_to_async(estimate_count)(self.object_list))
+        else:
+            count = await self.object_list.acount()
+        self.count = count
+        return count
+
+    def validate_number(self, number):
+        # Reading count first settles count_approximate
+        if not (self.count and self.count_approximate):
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        return max(number, 1)
+
+    def page(self, number):
+        if not (self.count and self.count_approximate):
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return LookaheadPage(self.object_list[bottom:bottom + self.per_page + 1], number, self)
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on (ordering fields, id).
+
+    DRF's CursorPagination stores a position plus an offset, which degrades
+    into an OFFSET scan when many rows share the same ordering value. Here the
+    cursor holds the ordering values *and* the primary key of the boundary
+    row, so every page is a single index range scan no matter how deep it is.
+    """
+    ordering = ('-created_at',)
+    tiebreaker = 'id'
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Use the fields chosen by the view's OrderingFilter. When the client
+        did not ask for one, fall back to the view's `cursor_ordering`, which
+        views set to the ordering of their page number mode, then to
+        `ordering`.
+        """
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return tuple(ordering)
+        return tuple(getattr(view, 'cursor_ordering', self.ordering))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the query for this page plus one row, which tells whether
+        there is a further page, or None if pagination is turned off.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = remove_query_param(request.build_absolute_uri(), 'page')
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+        model_fields = [queryset.model._meta.get_field(field) for field in self.fields]
+        self.cursor = self.decode_cursor(request, model_fields)
+        reverse = self.cursor.reverse if self.cursor else False
+
+        # Walking backwards flips the scan direction, not the page order.
+        # The tiebreaker follows the leading field.
+        scan = [field.startswith('-') != reverse for field in self.ordering]
+        queryset = queryset.order_by(*(
+            ('-' if descending else '') + field
+            for field, descending in zip([*self.fields, self.tiebreaker], [*scan, scan[0]])
+        ))
+
+        if self.cursor is not None:
+            queryset = queryset.filter(self._after(self.cursor, scan))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        reverse = self.cursor.reverse if self.cursor else False
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None and bool(self.page)
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _after(self, cursor, scan):
+        """
+        Rows strictly past the cursor in scan order.
+
+        Written as `f1 <= v1 AND (f1 < v1 OR f1 = v1 AND (f2 < v2 OR ...))`
+        rather than a plain OR so that the planner gets an index range bound
+        on the leading column.
+        """
+        columns = [
+            *zip(self.fields, cursor.values, scan),
+            (self.tiebreaker, cursor.pk, scan[0]),
+        ]
+        field, value, descending = columns[0]
+        op = 'lt' if descending else 'gt'
+        return Q(**{f'{field}__{op}e': value}) & self._past(columns)
+
+    def _past(self, columns):
+        field, value, descending = columns[0]
+        op = 'lt' if descending else 'gt'
+        past = Q(**{f'{field}__{op}': value})
+        if len(columns) > 1:
+            past |= Q(**{field: value}) & self._past(columns[1:])
+        return past
+
+    def decode_cursor(self, request, model_fields):
+        """
+        Decode the opaque cursor token. An empty `?cursor=` opts in to
+        cursor mode and starts from the first page.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padding = '=' * (-len(encoded) % 4)
+            tokens = json.loads(urlsafe_b64decode(encoded + padding).decode('utf-8'))
+            if len(tokens['v']) != len(model_fields):
+                raise ValueError('Cursor does not match the ordering')
+            return KeysetCursor(
+                values=[field.to_python(value) for field, value in zip(model_fields, tokens['v'])],
+                pk=int(tokens['i']),
+                reverse=bool(tokens.get('r')),
+            )
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse=False):
+        values = [self._get_value(row, field) for field in self.fields]
+        tokens = {
+            'v': [value.isoformat() if hasattr(value, 'isoformat') else value for value in values],
+            'i': self._get_value(row, self.tiebreaker),
+        }
+        if reverse:
+            tokens['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(tokens, separators=(',', ':')).encode('utf-8'))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode('ascii').rstrip('='))
+
+    def _get_value(self, row, field_name):
+        if isinstance(row, dict):
+            return row[field_name]
+        return getattr(row, field_name)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # A reverse cursor ran off the start, so "next" is the first page.
+            return replace_query_param(self.base_url, self.cursor_query_param, '')
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    Page number pagination whose `count` may be a planner estimate.
+
+    Responses carry `count_approximate`, which is true when `count` is an
+    estimate (see EstimatedCountPaginator).
+    """
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_approximate': self.page.paginator.count_approximate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        properties = response_schema['properties']
+        response_schema['properties'] = {
+            'count': properties.pop('count'),
+            'count_approximate': {'type': 'boolean', 'example': False},
+            **properties,
+        }
+        return response_schema
+
+
+class PageNumberOrCursorPagination(EstimatedCountPagination):
+    """
+    Page number pagination by default, keyset cursor pagination on request.
+
+    Passing `?cursor=` (empty for the first page) switches the response to
+    `{next, previous, results}` with opaque cursors and no COUNT(*) query.
+    """
+    cursor_pagination_class = KeysetCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_pagination_class.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views, with the COUNT and the page
+        query run through the async ORM.
+        """
+        if self.cursor_pagination_class.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return await self.cursor_paginator.apaginate_queryset(queryset, request, view)
+        self.cursor_paginator = None
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        await paginator.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        return parameters + self.cursor_pagination_class().get_schema_operation_parameters(view)
@@ -0,0 +1,72 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# The replica reads go to, picked per request by ReplicaRoutingMiddleware;
+# None while reads must use the primary
+_replica = ContextVar('replica', default=None)
+# Whether anything was written through the router during the request
+_wrote = ContextVar('wrote', default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Allow (or forbid) reads from replicas inside the block.
+
+    One replica is picked for the whole block, so a request's count, page
+    and validators all come from the same replica rather than from
+    replicas that may lag by different amounts.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    replica_token = _replica.set(random.choice(replicas) if enabled and replicas else None)
+    wrote_token = _wrote.set(False)
+    try:
+        yield
+    finally:
+        _replica.reset(replica_token)
+        _wrote.reset(wrote_token)
+
+
+def wrote():
+    """
+    Return True if a write was routed since the enclosing replica_reads().
+    """
+    return _wrote.get()
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica picked by replica_reads() and writes to default.
+
+    Replicas are only read from inside replica_reads(), which the
+    middleware enters for safe requests with a random entry of
+    DATABASE_REPLICAS, so every read of a request goes to the same
+    replica. Management commands, Celery tasks and writes always see the
+    primary. Once a request writes, its
+    remaining reads go to the primary too. Tokens and sessions are always
+    read from the primary, since a client uses them right after creating
+    them.
+    """
+    primary_only_apps = {'authtoken', 'sessions'}
+
+    def db_for_read(self, model, **hints):
+        replica = _replica.get()
+        if replica is None or _wrote.get() or model._meta.app_label in self.primary_only_apps:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,71 @@
+import re
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+from rest_framework import filters
+
+# Text search configuration used by the search_vector triggers in the
+# posts and pages migrations. Queries must use the same configuration.
+SEARCH_CONFIG = 'english'
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for SearchFilter backed by a tsvector column.
+
+    Searches the view's `search_vector_field` (a GIN-indexed column kept up
+    to date by a database trigger) instead of OR-ing ILIKE clauses over
+    `search_fields`. Every term is matched as a prefix and all terms must
+    match, like SearchFilter. Results are annotated with `search_rank`
+    and a highlighted `search_headline` of `search_headline_field`. They are
+    ordered by relevance unless the client asks for another ordering.
+
+    On non-PostgreSQL databases it falls back to SearchFilter.
+    """
+    search_vector_field = 'search_vector'
+    search_headline_field = 'content'
+    headline_options = {
+        'start_sel': '<mark>',
+        'stop_sel': '</mark>',
+        'max_words': 35,
+        'min_words': 15,
+        'max_fragments': 2,
+        'fragment_delimiter': ' … ',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        query = self.get_search_query(search_terms)
+        if query is None or connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        vector_field = getattr(view, 'search_vector_field', self.search_vector_field)
+        headline_field = getattr(view, 'search_headline_field', self.search_headline_field)
+
+        queryset = queryset.filter(**{vector_field: query}).annotate(
+            search_rank=SearchRank(F(vector_field), query),
+            search_headline=SearchHeadline(
+                headline_field, query, config=SEARCH_CONFIG, **self.headline_options
+            ),
+        )
+        return queryset.order_by('-search_rank', *queryset.model._meta.ordering)
+
+    def get_search_query(self, search_terms):
+        """
+        Build a prefix-matching tsquery, e.g. `djan rest` -> `djan:* & rest:*`.
+
+        Only word characters are passed through, so user input can never
+        produce tsquery syntax errors. Returns None if no words remain.
+        """
+        words = [word for term in search_terms for word in re.findall(r'\w+', term)]
+        if not words:
+            return None
+        return SearchQuery(
+            ' & '.join(f'{word}:*' for word in words),
+            search_type='raw',
+            config=SEARCH_CONFIG,
+        )
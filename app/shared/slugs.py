@@ -0,0 +1,59 @@
+import re
+
+from django.db.models import Count, IntegerField, Max, Q
+from django.db.models.functions import Cast, Substr
+
+# Bases looked up per query when allocating slugs for a batch
+SLUG_BATCH_SIZE = 100
+
+
+def next_free_suffixes(queryset, bases, field='slug'):
+    """
+    Return a dict mapping each base slug to its next free suffix.
+
+    0 means the bare base is free; otherwise `f'{base}-{suffix}'` is one past
+    the highest numbered duplicate. Each chunk of bases costs one aggregate
+    query that only touches index entries starting with the base, instead
+    of one `exists()` round trip per candidate.
+    """
+    bases = list(dict.fromkeys(bases))
+    suffixes = {}
+    for start in range(0, len(bases), SLUG_BATCH_SIZE):
+        chunk = bases[start:start + SLUG_BATCH_SIZE]
+        matches = Q()
+        aggregates = {}
+        for i, base in enumerate(chunk):
+            prefix = f'{base}-'
+            numbered = Q(**{
+                f'{field}__startswith': prefix,
+                f'{field}__regex': rf'^{re.escape(prefix)}[0-9]{{1,9}}$',
+            })
+            matches |= Q(**{field: base}) | Q(**{f'{field}__startswith': prefix})
+            aggregates[f'taken_{i}'] = Count('pk', filter=Q(**{field: base}))
+            aggregates[f'max_{i}'] = Max(
+                Cast(Substr(field, len(prefix) + 1), IntegerField()),
+                filter=numbered,
+            )
+
+        result = queryset.filter(matches).aggregate(**aggregates)
+        for i, base in enumerate(chunk):
+            if result[f'taken_{i}']:
+                suffixes[base] = (result[f'max_{i}'] or 0) + 1
+            else:
+                suffixes[base] = 0
+    return suffixes
+
+
+def allocate_slugs(queryset, bases, field='slug'):
+    """
+    Return one unique slug per entry in `bases`, in order.
+
+    Repeated bases within the batch get consecutive suffixes.
+    """
+    suffixes = next_free_suffixes(queryset, bases, field=field)
+    slugs = []
+    for base in bases:
+        suffix = suffixes[base]
+        slugs.append(f'{base}-{suffix}' if suffix else base)
+        suffixes[base] = suffix + 1
+    return slugs
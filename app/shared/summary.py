@@ -0,0 +1,35 @@
+import math
+import re
+
+from django.utils.html import strip_tags
+
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 280
+
+_whitespace = re.compile(r'\s+')
+
+
+def plain_text(text):
+    """
+    Return `text` without markup and with whitespace collapsed.
+    """
+    return _whitespace.sub(' ', strip_tags(text or '')).strip()
+
+
+def summarize(text, excerpt_length=EXCERPT_LENGTH):
+    """
+    Return `(excerpt, word_count, reading_time)` for a block of content.
+
+    The excerpt is cut at a word boundary. Reading time is in whole
+    minutes at WORDS_PER_MINUTE, and at least one minute for any text.
+    """
+    text = plain_text(text)
+    words = len(text.split())
+    excerpt = text
+    if len(text) > excerpt_length:
+        excerpt = text[:excerpt_length]
+        if text[excerpt_length] != ' ':
+            # Drop the word that was cut in half
+            excerpt = excerpt.rsplit(' ', 1)[0]
+        excerpt = excerpt.rstrip(' ,.;:') + '…'
+    return excerpt, words, math.ceil(words / WORDS_PER_MINUTE)
@@ -0,0 +1,68 @@
+import logging
+import time
+from datetime import datetime
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PUBLISHED_AT_HEADER = 'published_at'
+
+# Monotonic start times of the tasks running in this process, by task id
+_started = {}
+
+
+def queue_wait(request, now):
+    """
+    Return the seconds a task spent in the broker before a worker started
+    it, or None if it was not published with a timestamp (e.g. eager
+    calls). Time before an `eta` or `countdown` is not counted as waiting.
+    """
+    published_at = getattr(request, PUBLISHED_AT_HEADER, None)
+    if published_at is None:
+        return None
+    ready_at = published_at
+    if request.eta:
+        ready_at = max(ready_at, datetime.fromisoformat(request.eta).timestamp())
+    return max(now - ready_at, 0.0)
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    """
+    Record the publish time in the message headers
+    """
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    _started[task_id] = (time.monotonic(), queue_wait(task.request, time.time()))
+
+
+@task_postrun.connect
+def log_task_metrics(task_id=None, task=None, state=None, **kwargs):
+    """
+    Log how long a task waited in its queue and how long it ran. Tasks
+    over either SLOW_TASK_MS or SLOW_TASK_QUEUE_WAIT_MS are
+    logged as warnings.
+    """
+    started = _started.pop(task_id, None)
+    if started is None:
+        return
+    start, wait = started
+    duration_ms = (time.monotonic() - start) * 1000
+    wait_ms = wait * 1000 if wait is not None else None
+    queue = (task.request.delivery_info or {}).get('routing_key') or 'eager'
+
+    slow = duration_ms > settings.SLOW_TASK_MS or (
+        wait_ms is not None and wait_ms > settings.SLOW_TASK_QUEUE_WAIT_MS
+    )
+    logger.log(
+        logging.WARNING if slow else logging.INFO,
+        'Task %s [%s] on %s: %s, ran %.1f ms, waited %s',
+        task.name, task_id, queue, state, duration_ms,
+        f'{wait_ms:.1f} ms' if wait_ms is not None else 'n/a',
+    )
@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for asserting an upper bound on the queries a block runs.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context)
+        if executed > budget:
+            statements = '\n'.join(
+                f'{index}. {query["sql"]}' for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f'{executed} queries executed, budget is {budget}:\n{statements}')
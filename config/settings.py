@@ -3,6 +3,7 @@ Django settings for config project.
 """
 
 from pathlib import Path
+from celery.schedules import crontab
 from decouple import config
 import os
 
@@ -40,10 +41,14 @@ INSTALLED_APPS = [
     'app.authentication',
     'app.posts',
     'app.pages',
+    'app.authors',
+    'app.outbox',
     'django_filters',
 ]
 
 MIDDLEWARE = [
+    'app.shared.middleware.QueryInstrumentationMiddleware',
+    'app.shared.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -54,6 +59,15 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request SQL counts and timings; requests over either threshold are
+# logged with their slowest statements. The Server-Timing header exposes
+# them to clients, so it is only sent in development by default
+QUERY_INSTRUMENTATION = config('QUERY_INSTRUMENTATION', default=True, cast=bool)
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=DEBUG, cast=bool)
+SLOW_REQUEST_QUERY_COUNT = config('SLOW_REQUEST_QUERY_COUNT', default=50, cast=int)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+SLOW_REQUEST_LOG_STATEMENTS = 5
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -89,6 +103,88 @@ DATABASES = {
     }
 }
 
+# Read replicas of the primary, as comma-separated host or host:port entries.
+# Safe requests read from a random replica; after a write, the client reads
+# from the primary for REPLICA_STICKY_SECONDS so it sees its own changes.
+POSTGRES_REPLICA_HOSTS = config(
+    'POSTGRES_REPLICA_HOSTS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
+for index, replica in enumerate(POSTGRES_REPLICA_HOSTS):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        # Tests run against the primary's test database
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['app.shared.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+REPLICA_STICKY_CACHE_ALIAS = 'default'
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# cache such as Redis when running more than one process.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+NAVIGATION_CACHE_ALIAS = 'default'
+NAVIGATION_CACHE_TIMEOUT = config('NAVIGATION_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
+# Anonymous /api/posts/ responses; any post write invalidates them
+POST_LIST_CACHE_ALIAS = 'default'
+POST_LIST_CACHE_TIMEOUT = config('POST_LIST_CACHE_TIMEOUT', default=60, cast=int)
+
+# Anonymous post detail payloads, refreshed by one request at a time
+POST_DETAIL_CACHE_ALIAS = 'default'
+POST_DETAIL_CACHE_TIMEOUT = config('POST_DETAIL_CACHE_TIMEOUT', default=5 * 60, cast=int)
+
+# Token authentication cache: shared cache entries plus a small per-process LRU,
+# whose copies can outlive a revocation by up to TOKEN_CACHE_LOCAL_TIMEOUT seconds
+TOKEN_CACHE_ALIAS = 'default'
+TOKEN_CACHE_TIMEOUT = config('TOKEN_CACHE_TIMEOUT', default=5 * 60, cast=int)
+TOKEN_CACHE_LOCAL_TIMEOUT = config('TOKEN_CACHE_LOCAL_TIMEOUT', default=5, cast=int)
+TOKEN_CACHE_LOCAL_SIZE = 1024
+
+# Token lifetime in seconds (0 disables expiry); expired tokens are
+# rejected at authentication and deleted by cleanup_expired_tokens
+TOKEN_TTL = config('TOKEN_TTL', default=7 * 24 * 60 * 60, cast=int)
+TOKEN_CLEANUP_BATCH_SIZE = 1000
+
+# Users per batch when reconcile_author_stats checks AuthorStats for drift
+AUTHOR_STATS_RECONCILE_BATCH_SIZE = 500
+
+# Tasks recorded in the outbox are published by relay_outbox, which Celery
+# Beat runs every OUTBOX_RELAY_INTERVAL seconds
+OUTBOX_RELAY_INTERVAL = config('OUTBOX_RELAY_INTERVAL', default=5, cast=int)
+OUTBOX_RELAY_BATCH_SIZE = 500
+OUTBOX_MAX_ATTEMPTS = 10
+# Seconds a relay holds the messages it is publishing; a relay that dies
+# leaves them to the next one after this
+OUTBOX_CLAIM_TIMEOUT = 60
+
+# Serve register/login/change-password with async views that hash
+# passwords on a bounded thread pool (run under ASGI: config.asgi).
+# When the pool and its queue are full, requests get a 503.
+AUTH_ASYNC_VIEWS = config('AUTH_ASYNC_VIEWS', default=False, cast=bool)
+AUTH_HASH_MAX_WORKERS = config('AUTH_HASH_MAX_WORKERS', default=4, cast=int)
+AUTH_HASH_MAX_QUEUE = config('AUTH_HASH_MAX_QUEUE', default=16, cast=int)
+AUTH_HASH_RETRY_AFTER = 1
+
+# Serve GET/HEAD on the post and page list/detail views and the navigation
+# menu with async views on the async ORM (run under ASGI: config.asgi).
+# Writes keep using the sync DRF views.
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -139,14 +235,18 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'app.authentication.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'app.shared.pagination.EstimatedCountPagination',
     'PAGE_SIZE': 10,
 }
 
+# Paginated lists count exactly up to this many rows and use the planner's
+# estimate beyond it (0 always counts exactly)
+PAGINATION_EXACT_COUNT_LIMIT = config('PAGINATION_EXACT_COUNT_LIMIT', default=10000, cast=int)
+
 
 # DRF Spectacular settings
 SPECTACULAR_SETTINGS = {
@@ -175,3 +275,62 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+# Nothing reads task results, so none are stored; a task that needs its
+# result kept must opt in with ignore_result=False
+CELERY_TASK_IGNORE_RESULT = True
+
+# Mail goes out on its own queue so that long maintenance jobs cannot
+# hold it up; each queue has its own worker in docker-compose.yml
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {
+    'app.authentication.tasks.send_welcome_email': {'queue': 'email'},
+    'app.authentication.tasks.flush_welcome_emails': {'queue': 'email'},
+    'app.authentication.tasks.cleanup_expired_tokens': {'queue': 'maintenance'},
+    'app.authors.tasks.reconcile_author_stats': {'queue': 'maintenance'},
+}
+
+# Tasks are logged with their run time and queue wait; above either
+# threshold the log line is a warning
+SLOW_TASK_MS = config('SLOW_TASK_MS', default=60 * 1000, cast=int)
+SLOW_TASK_QUEUE_WAIT_MS = config('SLOW_TASK_QUEUE_WAIT_MS', default=5 * 1000, cast=int)
+CELERY_BEAT_SCHEDULE = {
+    # Catches welcome emails whose scheduled flush was lost
+    'flush-welcome-emails': {
+        'task': 'app.authentication.tasks.flush_welcome_emails',
+        'schedule': crontab(minute='*/5'),
+    },
+    'cleanup-expired-tokens': {
+        'task': 'app.authentication.tasks.cleanup_expired_tokens',
+        'schedule': crontab(minute=15),
+    },
+    'reconcile-author-stats': {
+        'task': 'app.authors.tasks.reconcile_author_stats',
+        'schedule': crontab(minute=30, hour=3),
+    },
+    'relay-outbox': {
+        'task': 'app.outbox.tasks.relay_outbox',
+        'schedule': OUTBOX_RELAY_INTERVAL,
+    },
+}
+
+
+# Email
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@example.com')
+
+# Welcome emails are queued and sent in batches: the first registration
+# schedules a flush this many seconds later, which sends everything queued
+WELCOME_EMAIL_BATCH_WINDOW = config('WELCOME_EMAIL_BATCH_WINDOW', default=10, cast=int)
+WELCOME_EMAIL_BATCH_SIZE = config('WELCOME_EMAIL_BATCH_SIZE', default=100, cast=int)
+WELCOME_EMAIL_MAX_ATTEMPTS = config('WELCOME_EMAIL_MAX_ATTEMPTS', default=5, cast=int)
+# A failed message waits WELCOME_EMAIL_RETRY_BACKOFF seconds, doubled per
+# attempt up to the max; a flush claims rows for WELCOME_EMAIL_CLAIM_TIMEOUT
+# seconds while it sends them
+WELCOME_EMAIL_RETRY_BACKOFF = config('WELCOME_EMAIL_RETRY_BACKOFF', default=60, cast=int)
+WELCOME_EMAIL_RETRY_BACKOFF_MAX = config('WELCOME_EMAIL_RETRY_BACKOFF_MAX', default=60 * 60, cast=int)
+WELCOME_EMAIL_CLAIM_TIMEOUT = config('WELCOME_EMAIL_CLAIM_TIMEOUT', default=5 * 60, cast=int)
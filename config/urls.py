@@ -10,6 +10,7 @@ urlpatterns = [
     path('api/auth/', include('app.authentication.urls')),
     path('api/posts/', include('app.posts.urls')),
     path('api/pages/', include('app.pages.urls')),
+    path('api/authors/', include('app.authors.urls')),
 
     # API Documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),